@@ -1,30 +1,88 @@
 # backend/agents/knowledge_agent.py
 
-import boto3
+import os
+import sys
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from kb_retrieval import KB_QUERY_MODE, RETRIEVE_THEN_GENERATE, KnowledgeBaseRetriever
+from shared.bedrock_gateway import get_gateway
 
 # Bedrock Agent setup
-bedrock = boto3.client("bedrock-agent-runtime", region_name="us-east-1")  # adjust if needed
 agent_id = "AOI3TVWWRP"
 agent_alias_id = "MUBOOI7BWE"
 
-def query_knowledge_base(prompt):
+# Used instead of the agent with KB_QUERY_MODE=retrieve_then_generate
+knowledge_base_id = os.environ.get("KNOWLEDGE_BASE_ID", "1BSXCFNWOS")
+model_id = os.environ.get("KNOWLEDGE_AGENT_MODEL_ID", "us.anthropic.claude-3-5-haiku-20241022-v1:0")
+_retriever = None
+
+def get_retriever():
+    """
+    The knowledge base retriever with its passage cache, created on first use
+    """
+    global _retriever
+    if _retriever is None:
+        _retriever = KnowledgeBaseRetriever(get_gateway(), knowledge_base_id).start_sync_watch()
+    return _retriever
+
+async def generate_async(messages):
+    """
+    Generation step of retrieve_then_generate: one Converse call
+    """
+    response = await get_gateway().converse(model_id, messages)
+    return "".join(block.get("text", "") for block in response["output"]["message"]["content"])
+
+def read_completion(response):
+    """
+    The agent completion is an event stream of byte chunks; join them into text
+    """
+    return "".join(
+        event["chunk"]["bytes"].decode("utf-8")
+        for event in response["completion"]
+        if "chunk" in event
+    )
+
+async def query_knowledge_base_async(prompt, session_id=None, timings=None):
+    """
+    Async variant of query_knowledge_base, for callers already on an event loop
+
+    In retrieve_then_generate mode the question goes through the cached knowledge
+    base retrieval and one model call instead of the agent (session_id is not
+    used), and the retrieval and generation timings are added to `timings`, if given.
+    """
+    if KB_QUERY_MODE == RETRIEVE_THEN_GENERATE:
+        result, stage_timings = await get_retriever().answer(prompt, generate_async)
+        if timings is not None:
+            timings.update(stage_timings)
+        return result
+
+    gateway = get_gateway()
+    return await gateway.call(
+        "bedrock-agent-runtime", "invoke_agent",
+        agentId=agent_id,
+        agentAliasId=agent_alias_id,
+        # Reusing a user's session ID lets the agent keep context between questions
+        sessionId=session_id or uuid.uuid4().hex,
+        inputText=prompt,
+        read_response=read_completion
+    )
+
+def query_knowledge_base(prompt, session_id=None, timings=None):
     """
     Query the Bedrock knowledge agent with a user prompt
     
     Args:
         prompt (str): The user's query text
-        
+        session_id (str): The user's chat session ID; a one-off session is used if omitted
+        timings (dict): filled with retrieval/generation milliseconds in retrieve_then_generate mode
+
     Returns:
         str: The agent's response
     """
     try:
-        response = bedrock.invoke_agent(
-            agentId=agent_id,
-            agentAliasId=agent_alias_id,
-            sessionId="user-session-123",  # you can use per-user/session logic
-            input={"text": prompt}
-        )
-
-        return response["completion"]["content"]
+        return get_gateway().run(query_knowledge_base_async(prompt, session_id, timings))
     except Exception as e:
-        return f"Error from knowledge agent: {str(e)}"
\ No newline at end of file
+        return f"Error from knowledge agent: {str(e)}"
@@ -0,0 +1,134 @@
+# careconnect/backend/bedrock-chat/fanout.py
+"""
+Hedged fan-out between the chat backends.
+
+Instead of guessing one backend and making the client retry when the guess is
+wrong, hedged_race starts the preferred backend, starts the other one as well
+(immediately or after a short hedge delay) and returns the first acceptable
+answer, cancelling the loser. A HedgeBudget caps how often the second backend is
+started, which bounds the extra model calls spent on hedging.
+"""
+
+import asyncio
+import threading
+
+
+class HedgeBudget:
+    """
+    Token bucket limiting hedged requests to a fraction of all requests.
+
+    Every request earns `ratio` credits (up to `burst`); starting a second
+    backend spends one. ratio=0.3 therefore means at most ~30% of requests pay
+    for a second model call over time, while a short burst can still hedge.
+    """
+
+    def __init__(self, ratio=0.5, burst=10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._credits = burst
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.denied = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+            self._credits = min(self.burst, self._credits + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._credits >= 1.0:
+                self._credits -= 1.0
+                self.hedged += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "denied": self.denied,
+                "hedge_ratio": self.ratio,
+                "credits": round(self._credits, 2),
+            }
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    # Let the cancellations settle so no "task was destroyed" warnings leak out
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def hedged_race(primary, secondary, is_acceptable, budget=None, hedge_delay=0.0,
+                      merge=None, merge_window=0.0):
+    """
+    Race two backends and return the first acceptable answer.
+
+    Args:
+        primary (tuple): (name, zero-argument coroutine function) of the preferred backend
+        secondary (tuple): (name, coroutine function) of the fallback backend
+        is_acceptable (callable): (name, result) -> bool
+        budget (HedgeBudget): optional; when exhausted only the primary runs
+        hedge_delay (float): seconds to give the primary before starting the secondary
+        merge (callable): optional (results_by_name) -> result, used when both backends
+            answer acceptably within merge_window seconds of each other
+        merge_window (float): how long to wait for the other backend once one has answered
+
+    Returns:
+        tuple: (source name, result, whether the secondary was started)
+    """
+    if budget is not None:
+        budget.record_request()
+
+    names = {}
+    primary_task = asyncio.ensure_future(primary[1]())
+    names[primary_task] = primary[0]
+    pending = {primary_task}
+    hedged = False
+
+    if hedge_delay > 0:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+        if done and not primary_task.exception() and is_acceptable(primary[0], primary_task.result()):
+            return primary[0], primary_task.result(), False
+        # The primary either failed or is still running, start the hedge
+
+    if budget is None or budget.try_spend():
+        secondary_task = asyncio.ensure_future(secondary[1]())
+        names[secondary_task] = secondary[0]
+        pending.add(secondary_task)
+        hedged = True
+
+    results = {}
+    fallback = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = names[task]
+            try:
+                result = task.result()
+            except Exception as e:
+                result = f"Error from {name}: {e}"
+            if fallback is None or name == primary[0]:
+                fallback = (name, result)
+            if is_acceptable(name, result):
+                results[name] = result
+
+        if results:
+            if merge is not None and pending and merge_window > 0:
+                late, pending = await asyncio.wait(pending, timeout=merge_window)
+                for task in late:
+                    if not task.exception() and is_acceptable(names[task], task.result()):
+                        results[names[task]] = task.result()
+            await _cancel(pending)
+            if merge is not None and len(results) > 1:
+                return "merged", merge(results), hedged
+            # Prefer the primary's answer when both finished in the same step
+            name = primary[0] if primary[0] in results else next(iter(results))
+            return name, results[name], hedged
+
+    # Nothing acceptable: surface the primary's answer (or error) as before
+    return fallback[0], fallback[1], hedged
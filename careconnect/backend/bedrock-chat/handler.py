@@ -1,27 +1,34 @@
-import boto3  # type: ignore
-import json
 import os
+import sys
 
-bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")  # Adjust your region
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from shared.bedrock_gateway import get_gateway
+
+MODEL_ID = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
 
 def generate_conversation(messages):
-    # Create the Bedrock Runtime client
-    bedrock_client = boto3.client(service_name='bedrock-runtime', region_name="us-east-1")
-    model_id = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
-    
+    # Shared Bedrock client, created once per process
+    gateway = get_gateway()
+
     # Send the message to the model
-    response = bedrock_client.converse(
-        modelId=model_id,
-        messages=messages
-    )
+    response = gateway.run(gateway.converse(MODEL_ID, messages))
     
     # Return the model-generated content
     return response["output"]["message"]["content"][0]["text"]
 
+async def generate_conversation_async(messages):
+    """
+    Async variant of generate_conversation for callers already on an event loop
+    """
+    response = await get_gateway().converse(MODEL_ID, messages)
+    return response["output"]["message"]["content"][0]["text"]
+
 
-messages = [{
-    "role": "user",
-    "content": [{"text": "hello world"}]
-}]
+if __name__ == "__main__":
+    messages = [{
+        "role": "user",
+        "content": [{"text": "hello world"}]
+    }]
 
-generate_conversation(messages)
\ No newline at end of file
+    print(generate_conversation(messages))
@@ -0,0 +1,166 @@
+# careconnect/backend/bedrock-chat/intent_router.py
+"""
+Routes a chat prompt to the knowledge base or the general model.
+
+The router is built once at startup from router_config.json:
+
+- a single regex compiled from a prefix trie of all knowledge keywords (the
+  regex equivalent of an Aho-Corasick automaton), anchored on word boundaries
+  and tolerant of plurals and hyphen/space variants ("heart-rate", "symptoms"),
+  so "health" no longer matches inside "healthy" or "wealth"
+- an optional hashing-vectorizer + logistic regression classifier in NumPy,
+  trained on the config's example prompts, for prompts with no keyword at all
+
+route() returns a RouteDecision in a few microseconds, about what the old
+substring scan cost; what the router buys is accuracy (see
+benchmarks/bench_router.py for both on hand-labelled prompts).
+"""
+
+import json
+import math
+import re
+import zlib
+from collections import namedtuple
+
+KNOWLEDGE_BASE = "knowledge_base"
+BEDROCK_RUNTIME = "bedrock_runtime"
+
+# Confidence reported for a keyword hit and for the no-keyword default
+KEYWORD_CONFIDENCE = 0.95
+DEFAULT_CONFIDENCE = 0.6
+
+RouteDecision = namedtuple("RouteDecision", ["route", "confidence", "matched"])
+
+_WORD = re.compile(r"\w+")
+
+
+def _trie_pattern(node):
+    """Regex for a character trie; shared prefixes are matched once instead of per keyword."""
+    alternatives = []
+    terminal = False
+    for ch, child in sorted(node.items()):
+        if ch == "":
+            terminal = True
+            continue
+        # Inner whitespace matches any run of spaces or hyphens ("heart-rate")
+        head = r"[\s-]+" if ch == " " else re.escape(ch)
+        alternatives.append(head + _trie_pattern(child))
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return f"(?:{body})?" if terminal else body
+
+
+def compile_keywords(keywords):
+    """
+    Compile keywords into one case-insensitive regex built from a prefix trie.
+
+    The trie form keeps the cost close to one pass over the prompt however many
+    keywords there are. Matches must sit on word boundaries, and an optional
+    plural suffix is allowed ("symptom" matches "symptoms").
+    """
+    trie = {}
+    for keyword in {k.strip().lower() for k in keywords if k.strip()}:
+        node = trie
+        for ch in " ".join(keyword.split()):
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return re.compile(r"(?<!\w)" + _trie_pattern(trie) + r"(?:s|es)?(?!\w)", re.IGNORECASE)
+
+
+class HashingClassifier:
+    """
+    Binary logistic regression over hashed unigram + bigram counts.
+
+    Small enough to train at startup on a few dozen examples; predicts with one
+    sparse dot product.
+    """
+
+    def __init__(self, n_features=4096):
+        self.n_features = n_features
+        self.weights = None
+        self.bias = 0.0
+
+    def _features(self, text):
+        words = _WORD.findall(text.lower())
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        counts = {}
+        for gram in grams:
+            index = zlib.crc32(gram.encode("utf-8")) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def fit(self, texts, labels, epochs=300, learning_rate=0.5, l2=1e-3):
+        import numpy as np
+
+        X = np.zeros((len(texts), self.n_features))
+        for row, text in enumerate(texts):
+            for index, count in self._features(text).items():
+                X[row, index] = 1.0 + np.log(count)
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        X /= np.where(norms == 0, 1.0, norms)
+        y = np.asarray(labels, dtype=float)
+
+        w = np.zeros(self.n_features)
+        b = 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+            error = p - y
+            w -= learning_rate * (X.T @ error / len(y) + l2 * w)
+            b -= learning_rate * error.mean()
+        # Plain list: per-feature lookups at predict time are faster than numpy scalars
+        self.weights = w.tolist()
+        self.bias = float(b)
+        return self
+
+    def predict_proba(self, text):
+        """Probability that text belongs to the positive class."""
+        counts = self._features(text)
+        if not counts:
+            return 0.5
+        values = {index: 1.0 + math.log(count) for index, count in counts.items()}
+        norm = math.sqrt(sum(v * v for v in values.values()))
+        score = self.bias + sum(self.weights[index] * v / norm for index, v in values.items())
+        return 1.0 / (1.0 + math.exp(-score))
+
+
+class IntentRouter:
+    """
+    Keyword regex first, classifier for prompts the keywords don't cover.
+
+    Args:
+        keywords (list): phrases that send a prompt to the knowledge base
+        classifier (HashingClassifier): optional, trained with knowledge base as the positive class
+        threshold (float): classifier probability needed to route to the knowledge base
+    """
+
+    def __init__(self, keywords, classifier=None, threshold=0.75):
+        self._pattern = compile_keywords(keywords)
+        self.classifier = classifier
+        self.threshold = threshold
+
+    @classmethod
+    def from_config(cls, path):
+        with open(path) as f:
+            config = json.load(f)
+        classifier = None
+        threshold = 0.75
+        settings = config.get("classifier", {})
+        if settings.get("enabled"):
+            examples = settings["examples"]
+            texts = examples[KNOWLEDGE_BASE] + examples[BEDROCK_RUNTIME]
+            labels = [1] * len(examples[KNOWLEDGE_BASE]) + [0] * len(examples[BEDROCK_RUNTIME])
+            classifier = HashingClassifier(settings.get("n_features", 4096)).fit(texts, labels)
+            threshold = settings.get("threshold", threshold)
+        return cls(config["knowledge_keywords"], classifier, threshold)
+
+    def route(self, prompt):
+        match = self._pattern.search(prompt)
+        if match:
+            return RouteDecision(KNOWLEDGE_BASE, KEYWORD_CONFIDENCE, match.group(0))
+        if self.classifier is not None:
+            probability = self.classifier.predict_proba(prompt)
+            if probability >= self.threshold:
+                return RouteDecision(KNOWLEDGE_BASE, probability, None)
+            return RouteDecision(BEDROCK_RUNTIME, 1.0 - probability, None)
+        return RouteDecision(BEDROCK_RUNTIME, DEFAULT_CONFIDENCE, None)
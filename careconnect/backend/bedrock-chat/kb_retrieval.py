@@ -0,0 +1,202 @@
+# careconnect/backend/bedrock-chat/kb_retrieval.py
+"""
+Knowledge base queries split into a cached retrieval stage and a generation stage.
+
+retrieve_and_generate (and the knowledge agent) search the knowledge base and
+run the model in one opaque call, so every paraphrase of a popular question
+pays for the search again and nothing says where the time went. With
+KB_QUERY_MODE=retrieve_then_generate, KnowledgeBaseRetriever instead:
+
+    retrieve   calls Bedrock `retrieve` for the top passages, cached per
+               normalized query (TTL + LRU, optionally matching paraphrases by
+               embedding similarity - the same ResponseCache the answers use)
+    generate   sends the question with those passages to the chat model
+
+and reports both timings. Cached passages are dropped when the knowledge base
+syncs: a watcher polls the data source's latest completed ingestion job
+(KB_DATA_SOURCE_ID) and invalidate() can also be called directly.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from response_cache import ResponseCache
+from retrieval import build_prompt
+
+KB_QUERY_MODE = os.environ.get("KB_QUERY_MODE", "retrieve_and_generate")
+RETRIEVE_THEN_GENERATE = "retrieve_then_generate"
+KB_NUMBER_OF_RESULTS = int(os.environ.get("KB_NUMBER_OF_RESULTS", "5"))
+KB_PASSAGE_CACHE_SIZE = int(os.environ.get("KB_PASSAGE_CACHE_SIZE", "2048"))
+KB_PASSAGE_CACHE_TTL = float(os.environ.get("KB_PASSAGE_CACHE_TTL", "900"))
+# e.g. 0.9 lets paraphrased questions share retrieved passages
+KB_PASSAGE_CACHE_SIMILARITY = os.environ.get("KB_PASSAGE_CACHE_SIMILARITY")
+KB_DATA_SOURCE_ID = os.environ.get("KB_DATA_SOURCE_ID")
+KB_SYNC_POLL_SECONDS = float(os.environ.get("KB_SYNC_POLL_SECONDS", "60"))
+
+# Same opening as the knowledge base's own non-answer, so callers treat it alike
+NO_PASSAGES_REPLY = "Sorry, I am unable to assist you with this request based on the available records."
+
+_NOT_CHECKED = object()
+
+
+def read_passages(results):
+    """[{"text", "score", "source"}] from Bedrock retrievalResults."""
+    passages = []
+    for result in results:
+        text = (result.get("content") or {}).get("text")
+        if not text:
+            continue
+        location = result.get("location") or {}
+        source = ((location.get("s3Location") or {}).get("uri")
+                  or (location.get("webLocation") or {}).get("url")
+                  or location.get("type"))
+        passages.append({"text": text, "score": result.get("score"), "source": source})
+    return passages
+
+
+class KnowledgeBaseRetriever:
+    """
+    Args:
+        gateway: shared BedrockGateway
+        knowledge_base_id (str): Bedrock knowledge base
+        cache (ResponseCache): retrieved passages, namespaced by knowledge base
+        number_of_results (int): passages retrieved per query
+        data_source_id (str): data source whose ingestion jobs signal a sync
+        on_invalidate (callable): also run when the knowledge base syncs, e.g. to
+            drop cached answers built on the old passages
+    """
+
+    def __init__(self, gateway, knowledge_base_id, cache=None, number_of_results=KB_NUMBER_OF_RESULTS,
+                 data_source_id=KB_DATA_SOURCE_ID, on_invalidate=None):
+        self.gateway = gateway
+        self.knowledge_base_id = knowledge_base_id
+        self.cache = cache or ResponseCache(max_entries=KB_PASSAGE_CACHE_SIZE, ttl_seconds=KB_PASSAGE_CACHE_TTL)
+        self.number_of_results = number_of_results
+        self.data_source_id = data_source_id
+        self.on_invalidate = on_invalidate
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._sync_marker = _NOT_CHECKED
+        self._watcher = None
+        self.invalidations = 0
+        self._totals = {"queries": 0, "retrieval_ms": 0.0, "generation_ms": 0.0, "retrievals": 0}
+
+    async def _cache(self, method, *args):
+        # Semantic lookups embed the query with a blocking gateway call; keep them off the event loop
+        if self.cache.semantic_enabled:
+            return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+        return method(*args)
+
+    async def retrieve(self, query):
+        """
+        Returns:
+            tuple: (passages, whether they came from the cache, retrieval milliseconds)
+        """
+        start = time.perf_counter()
+        passages = await self._cache(self.cache.get, self.knowledge_base_id, query)
+        if passages is not None:
+            return passages, True, (time.perf_counter() - start) * 1000
+        generation = self._generation
+        results = await self.gateway.retrieve(self.knowledge_base_id, query, self.number_of_results)
+        passages = read_passages(results)
+        # A sync that finished while we were retrieving makes these passages stale
+        if passages and generation == self._generation:
+            await self._cache(self.cache.put, self.knowledge_base_id, query, passages)
+        with self._lock:
+            self._totals["retrievals"] += 1
+        return passages, False, (time.perf_counter() - start) * 1000
+
+    async def answer(self, query, generate, history=()):
+        """
+        Retrieve passages for the query, then generate the answer from them.
+
+        Args:
+            generate: async callable, Converse-style messages -> reply text
+            history (list): earlier turns of the conversation
+
+        Returns:
+            tuple: (reply text, {"retrieval_ms", "generation_ms", "passages", "passages_cached"})
+        """
+        passages, cached, retrieval_ms = await self.retrieve(query)
+        start = time.perf_counter()
+        if passages:
+            prompt = build_prompt(query, [passage["text"] for passage in passages])
+            text = await generate(list(history) + [{"role": "user", "content": [{"text": prompt}]}])
+        else:
+            text = NO_PASSAGES_REPLY
+        generation_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._totals["queries"] += 1
+            self._totals["retrieval_ms"] += retrieval_ms
+            self._totals["generation_ms"] += generation_ms
+        return text, {"retrieval_ms": round(retrieval_ms, 1), "generation_ms": round(generation_ms, 1),
+                      "passages": len(passages), "passages_cached": cached}
+
+    def answer_sync(self, query, generate, history=()):
+        return self.gateway.run(self.answer(query, generate, history))
+
+    # --- knowledge base syncs ---
+
+    def invalidate(self):
+        """Forget every cached passage for this knowledge base."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+        self.cache.clear(self.knowledge_base_id)
+        if self.on_invalidate is not None:
+            self.on_invalidate()
+
+    def latest_sync(self):
+        """Id of the data source's most recent completed ingestion job, or None."""
+        response = self.gateway.call_sync(
+            "bedrock-agent", "list_ingestion_jobs",
+            knowledgeBaseId=self.knowledge_base_id, dataSourceId=self.data_source_id,
+            filters=[{"attribute": "STATUS", "operator": "EQ", "values": ["COMPLETE"]}],
+            sortBy={"attribute": "STARTED_AT", "order": "DESCENDING"}, maxResults=1,
+        )
+        jobs = response.get("ingestionJobSummaries") or []
+        return jobs[0]["ingestionJobId"] if jobs else None
+
+    def check_sync(self):
+        """Invalidate if a newer ingestion job has completed since the last check."""
+        marker = self.latest_sync()
+        with self._lock:
+            changed = self._sync_marker is not _NOT_CHECKED and marker != self._sync_marker
+            self._sync_marker = marker
+        if changed:
+            self.invalidate()
+        return changed
+
+    def start_sync_watch(self, poll_seconds=KB_SYNC_POLL_SECONDS):
+        """Poll for knowledge base syncs in a daemon thread (needs data_source_id)."""
+        if self.data_source_id is None or self._watcher is not None:
+            return self
+
+        def watch():
+            while True:
+                try:
+                    self.check_sync()
+                except Exception as e:
+                    print(f"Error checking knowledge base sync: {e}")
+                time.sleep(poll_seconds)
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="kb-sync-watch")
+        self._watcher.start()
+        return self
+
+    def stats(self):
+        with self._lock:
+            totals = dict(self._totals)
+            invalidations = self.invalidations
+        queries = totals["queries"]
+        return {
+            "queries": queries,
+            "retrievals": totals["retrievals"],
+            "mean_retrieval_ms": round(totals["retrieval_ms"] / queries, 1) if queries else None,
+            "mean_generation_ms": round(totals["generation_ms"] / queries, 1) if queries else None,
+            "invalidations": invalidations,
+            "watching_syncs": self._watcher is not None,
+            "passage_cache": self.cache.stats(),
+        }
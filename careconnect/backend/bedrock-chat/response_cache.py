@@ -0,0 +1,222 @@
+# careconnect/backend/bedrock-chat/response_cache.py
+"""
+In-memory response cache for model and knowledge base answers.
+
+Entries are keyed by a namespace (model ID or KB ID) plus the normalized prompt,
+expire after a TTL and are evicted least-recently-used once the cache is full.
+When an embedding function and a similarity threshold are configured, a miss on
+the exact key falls back to the most similar cached prompt in the same namespace:
+each namespace keeps its entries' unit-length embeddings as rows of one NumPy
+matrix, so the lookup is a single matrix-vector product. The prompt is embedded
+outside the lock, and only once for a miss followed by put() of its answer.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Punctuation is dropped unless it sits between digits ("120/80", "98.6")
+_PUNCTUATION = re.compile(r"(?<!\d)[^\w\s]|[^\w\s](?!\d)")
+_WHITESPACE = re.compile(r"\s+")
+# Missed prompts whose embeddings are kept until their answer is put()
+QUERY_EMBEDDING_MEMO = 64
+
+
+def normalize_prompt(prompt):
+    """Lower-case, drop punctuation and collapse whitespace so trivial variants share a key."""
+    text = _PUNCTUATION.sub(" ", prompt.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _unit(vector):
+    """vector scaled to unit length as float32, or None for a zero vector."""
+    import numpy as np
+
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+class _Vectors:
+    """One namespace's entry embeddings, a unit-length row per key, packed at the top of the matrix."""
+
+    def __init__(self, dim):
+        import numpy as np
+
+        self.matrix = np.zeros((8, dim), dtype=np.float32)
+        self.keys = []
+        self.rows = {}
+
+    def add(self, key, vector):
+        if vector.shape != self.matrix.shape[1:]:
+            return
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            if row == len(self.matrix):
+                import numpy as np
+
+                self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+        self.matrix[row] = vector
+
+    def remove(self, key):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        # The last row takes the freed one
+        last = self.keys.pop()
+        if last != key:
+            self.matrix[row] = self.matrix[len(self.keys)]
+            self.keys[row] = last
+            self.rows[last] = row
+
+    def matches(self, query, threshold):
+        """Keys whose similarity to query is at least threshold, most similar first."""
+        import numpy as np
+
+        if query.shape != self.matrix.shape[1:] or not self.keys:
+            return []
+        scores = self.matrix[:len(self.keys)] @ query
+        candidates = np.flatnonzero(scores >= threshold)
+        return [self.keys[i] for i in candidates[np.argsort(-scores[candidates], kind="stable")]]
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of generated responses.
+
+    Args:
+        max_entries (int): entries kept before the least recently used is evicted
+        ttl_seconds (float): how long an entry stays valid
+        embed_fn (callable): optional, maps text to a list of floats
+        similarity_threshold (float): cosine similarity needed for a semantic hit;
+            semantic matching is off unless both this and embed_fn are set
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, embed_fn=None, similarity_threshold=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (namespace, normalized) -> (expires_at, value)
+        self._vectors = {}  # namespace -> _Vectors
+        # Embeddings of recently missed prompts, for the put() that usually follows
+        self._query_embeddings = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def semantic_enabled(self):
+        return self.embed_fn is not None and self.similarity_threshold is not None
+
+    def get(self, namespace, prompt):
+        """Return the cached response for prompt, or None on a miss."""
+        key = (namespace, normalize_prompt(prompt))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._drop(key)
+
+        if self.semantic_enabled:
+            value = self._semantic_lookup(namespace, key[1], now)
+            if value is not None:
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _drop(self, key):
+        """Remove an entry and its embedding row. Caller holds _lock."""
+        del self._entries[key]
+        vectors = self._vectors.get(key[0])
+        if vectors is not None:
+            vectors.remove(key)
+
+    def _embed(self, normalized):
+        """Unit-length embedding of a normalized prompt, or None; called without the lock held."""
+        with self._lock:
+            query = self._query_embeddings.get(normalized)
+        if query is not None:
+            return query
+        return _unit(self.embed_fn(normalized))
+
+    def _semantic_lookup(self, namespace, normalized, now):
+        try:
+            query = self._embed(normalized)
+        except Exception as e:
+            print(f"Embedding failed, skipping semantic cache lookup: {e}")
+            return None
+        if query is None:
+            return None
+
+        with self._lock:
+            vectors = self._vectors.get(namespace)
+            for key in vectors.matches(query, self.similarity_threshold) if vectors is not None else ():
+                if self._entries[key][0] <= now:
+                    self._drop(key)
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.semantic_hits += 1
+                return self._entries[key][1]
+            # Kept for the put() of this prompt's answer, so it is not embedded twice
+            self._query_embeddings[normalized] = query
+            self._query_embeddings.move_to_end(normalized)
+            while len(self._query_embeddings) > QUERY_EMBEDDING_MEMO:
+                self._query_embeddings.popitem(last=False)
+            return None
+
+    def put(self, namespace, prompt, value):
+        """Store a response; evicts the least recently used entry when full."""
+        normalized = normalize_prompt(prompt)
+        embedding = None
+        if self.semantic_enabled:
+            try:
+                embedding = self._embed(normalized)
+            except Exception as e:
+                print(f"Embedding failed, caching without semantic key: {e}")
+
+        key = (namespace, normalized)
+        with self._lock:
+            self._query_embeddings.pop(normalized, None)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            if embedding is not None:
+                if namespace not in self._vectors:
+                    self._vectors[namespace] = _Vectors(len(embedding))
+                self._vectors[namespace].add(key, embedding)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self, namespace=None):
+        """Drop every entry, or only the entries of one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._vectors.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[key]
+                self._vectors.pop(namespace, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,120 @@
+# careconnect/backend/bedrock-chat/retrieval.py
+"""
+Retrieval over our own vector index, as an alternative to Bedrock's
+retrieve_and_generate.
+
+A query goes through three timed stages:
+
+    embed     the query text with Titan (shared Embedder, LRU-cached)
+    search    top-k in the vector index, filtered on patient/doctor metadata
+    generate  one Claude call with the retrieved passages as context
+
+Indexed items carry their passage in metadata["text"], plus whatever fields
+they can be filtered on ("patient", "doctor", "report_id", ...).
+"""
+
+import threading
+import time
+
+DEFAULT_TOP_K = 5
+# Keep the prompt a reasonable size however long the passages are
+MAX_CONTEXT_CHARS = 8000
+
+FILTER_FIELDS = ("patient", "doctor")
+
+
+def build_filter(patient=None, doctor=None):
+    """Pinecone-style metadata filter for the given fields, or None."""
+    values = {"patient": patient, "doctor": doctor}
+    conditions = {field: {"$eq": values[field]} for field in FILTER_FIELDS if values[field]}
+    return conditions or None
+
+
+def build_prompt(query, passages, max_chars=MAX_CONTEXT_CHARS):
+    """The question with the retrieved passage texts, best first, as numbered context."""
+    numbered = []
+    used = 0
+    for n, text in enumerate(passages, 1):
+        if not text or used + len(text) > max_chars:
+            continue
+        used += len(text)
+        numbered.append(f"[{n}] {text}")
+    if not numbered:
+        return query
+    context = "\n\n".join(numbered)
+    return (
+        "Answer the question using the excerpts from CareConnect records below. "
+        "If they do not contain the answer, say so.\n\n"
+        f"<excerpts>\n{context}\n</excerpts>\n\nQuestion: {query}"
+    )
+
+
+class Retriever:
+    """
+    Args:
+        embedder: shared.embeddings.Embedder
+        index: vector index (shared.vector_index)
+        generate (callable): messages -> reply text, e.g. app.generate_conversation
+        top_k (int): passages retrieved per query by default
+    """
+
+    def __init__(self, embedder, index, generate, top_k=DEFAULT_TOP_K):
+        self.embedder = embedder
+        self.index = index
+        self.generate = generate
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._totals = {"queries": 0, "embed_ms": 0.0, "search_ms": 0.0, "generate_ms": 0.0}
+
+    def _record(self, timings):
+        with self._lock:
+            self._totals["queries"] += 1
+            for stage, ms in timings.items():
+                self._totals[stage] = self._totals.get(stage, 0.0) + ms
+
+    def search(self, query, filter=None, top_k=None):
+        """
+        Returns:
+            tuple: (list of Match, {"embed_ms", "search_ms"})
+        """
+        start = time.perf_counter()
+        vector = self.embedder.embed_sync(query)
+        embedded = time.perf_counter()
+        matches = self.index.query(vector, top_k=top_k or self.top_k, filter=filter)
+        searched = time.perf_counter()
+        return matches, {"embed_ms": (embedded - start) * 1000, "search_ms": (searched - embedded) * 1000}
+
+    def answer(self, query, patient=None, doctor=None, top_k=None):
+        """
+        Retrieve passages for the query and generate an answer from them.
+
+        Returns:
+            dict: "response", "matches" (id, score, metadata without the text) and
+                  per-stage "timings" in milliseconds
+        """
+        matches, timings = self.search(query, build_filter(patient, doctor), top_k)
+        start = time.perf_counter()
+        prompt = build_prompt(query, [(match.metadata or {}).get("text") for match in matches])
+        response = self.generate([{"role": "user", "content": [{"text": prompt}]}])
+        timings["generate_ms"] = (time.perf_counter() - start) * 1000
+        self._record(timings)
+        return {
+            "response": response,
+            "matches": [
+                {"id": match.id, "score": round(match.score, 4),
+                 "metadata": {k: v for k, v in (match.metadata or {}).items() if k != "text"}}
+                for match in matches
+            ],
+            "timings": {stage: round(ms, 1) for stage, ms in timings.items()},
+        }
+
+    def stats(self):
+        with self._lock:
+            totals = dict(self._totals)
+        queries = totals.pop("queries")
+        return {
+            "queries": queries,
+            "mean_ms": {stage: round(ms / queries, 1) if queries else None for stage, ms in totals.items()},
+            "embedder": self.embedder.stats(),
+            "index": self.index.stats(),
+        }
@@ -0,0 +1,243 @@
+# careconnect/backend/bedrock-chat/session_store.py
+"""
+Per-user conversation sessions for the chat endpoints.
+
+A Session keeps the recent turns of one conversation plus the Bedrock knowledge
+base sessionId, so follow-up questions reach the model with their context and KB
+retrieval can continue where it left off. History is trimmed to a token budget;
+each turn is counted once when it is added and a running total is kept, so
+trimming never recounts the whole transcript.
+
+Sessions live in a pluggable backend: InMemorySessionBackend (LRU, default) or
+SqliteSessionBackend for sessions that survive restarts (pruned by age and
+count). Session ids are always generated here, never taken from a client, and
+exchanges on one session are recorded one at a time.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+# Rough token estimate for English text (~4 characters per token); close enough for
+# budgeting without shipping a tokenizer
+CHARS_PER_TOKEN = 4
+# Per-session locks are striped over this many locks instead of kept per id
+SESSION_LOCK_STRIPES = 64
+
+
+def estimate_tokens(text):
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+class Session:
+    """
+    One conversation: ordered (role, text, tokens) turns and a running token total.
+
+    The turns are guarded by a lock, so a request can read the history while
+    another one on the same session appends to it.
+    """
+
+    def __init__(self, session_id, turns=None, kb_session_id=None, updated_at=None):
+        self.session_id = session_id
+        self.turns = deque(turns or [])
+        self.total_tokens = sum(turn[2] for turn in self.turns)
+        self.kb_session_id = kb_session_id
+        self.updated_at = updated_at or time.time()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.turns)
+
+    def append(self, role, text):
+        tokens = estimate_tokens(text)
+        with self._lock:
+            self.turns.append((role, text, tokens))
+            self.total_tokens += tokens
+            self.updated_at = time.time()
+
+    def trim(self, token_budget):
+        """Drop the oldest turns until the history fits token_budget."""
+        with self._lock:
+            while self.turns and self.total_tokens > token_budget:
+                self.total_tokens -= self.turns.popleft()[2]
+            # Claude expects the conversation to open with a user turn
+            while self.turns and self.turns[0][0] != "user":
+                self.total_tokens -= self.turns.popleft()[2]
+
+    def update_from(self, other):
+        """Take the turns and timestamps of another copy of this session."""
+        with other._lock:
+            turns, total_tokens, updated_at = deque(other.turns), other.total_tokens, other.updated_at
+        with self._lock:
+            self.turns, self.total_tokens, self.updated_at = turns, total_tokens, updated_at
+
+    def to_messages(self):
+        """History as Converse-style messages."""
+        with self._lock:
+            return [{"role": role, "content": [{"text": text}]} for role, text, _ in self.turns]
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "session_id": self.session_id,
+                "turns": [list(turn) for turn in self.turns],
+                "kb_session_id": self.kb_session_id,
+                "updated_at": self.updated_at,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["session_id"], [tuple(turn) for turn in data["turns"]],
+                   data.get("kb_session_id"), data.get("updated_at"))
+
+
+class InMemorySessionBackend:
+    """Keeps the most recently used max_sessions sessions in process memory."""
+
+    def __init__(self, max_sessions=10000):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def get(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def put(self, session):
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def delete(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SqliteSessionBackend:
+    """
+    Stores sessions as JSON rows in a SQLite file, so they survive restarts.
+
+    Args:
+        path (str): SQLite file; ":memory:" for tests
+        ttl (float): seconds after its last update that a session expires; None keeps them
+        max_sessions (int): past this many, the least recently updated are deleted
+        prune_every (int): writes between pruning passes
+    """
+
+    def __init__(self, path, ttl=None, max_sessions=100000, prune_every=100):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.prune_every = prune_every
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+        self._conn.commit()
+        self.prune()
+
+    def _expired_before(self):
+        return -math.inf if self.ttl is None else time.time() - self.ttl
+
+    def get(self, session_id):
+        row = self._conn.execute("SELECT data FROM sessions WHERE id = ? AND updated_at >= ?",
+                                 (session_id, self._expired_before())).fetchone()
+        return Session.from_dict(json.loads(row[0])) if row else None
+
+    def put(self, session):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+            (session.session_id, json.dumps(session.to_dict()), session.updated_at),
+        )
+        self._conn.commit()
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete expired sessions, then the least recently updated beyond max_sessions."""
+        deleted = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (self._expired_before(),)).rowcount
+        excess = len(self) - self.max_sessions
+        if excess > 0:
+            deleted += self._conn.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated_at LIMIT ?)", (excess,)
+            ).rowcount
+        self._conn.commit()
+        return deleted
+
+    def delete(self, session_id):
+        self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SessionStore:
+    """
+    Session lookup and bounded history on top of a backend.
+
+    Args:
+        backend: InMemorySessionBackend, SqliteSessionBackend or anything with get/put/delete
+        token_budget (int): maximum estimated tokens of history kept per session
+    """
+
+    def __init__(self, backend=None, token_budget=4000):
+        self.backend = backend if backend is not None else InMemorySessionBackend()
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+
+    def _session_lock(self, session_id):
+        return self._session_locks[hash(session_id) % len(self._session_locks)]
+
+    def get_or_create(self, session_id=None):
+        """
+        Return the stored session for session_id, or a new one. New sessions always
+        get a server-generated id (an unknown or expired session_id is not adopted)
+        and are only stored once an exchange is recorded.
+        """
+        if session_id:
+            with self._lock:
+                session = self.backend.get(session_id)
+            if session is not None:
+                return session
+        return Session(uuid.uuid4().hex)
+
+    def record_exchange(self, session, prompt, reply):
+        """Append a user prompt and the assistant reply, trim to budget and save."""
+        with self._session_lock(session.session_id):
+            with self._lock:
+                stored = self.backend.get(session.session_id)
+            # A backend that returns copies (SQLite) may hold newer turns from a
+            # concurrent request on this session: append to those, not over them
+            target = stored if stored is not None else session
+            if target is not session:
+                target.kb_session_id = session.kb_session_id or target.kb_session_id
+            target.append("user", prompt)
+            target.append("assistant", reply)
+            target.trim(self.token_budget)
+            self.save(target)
+            if target is not session:
+                session.update_from(target)
+
+    def save(self, session):
+        with self._lock:
+            self.backend.put(session)
+
+    def delete(self, session_id):
+        with self._lock:
+            self.backend.delete(session_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self.backend)
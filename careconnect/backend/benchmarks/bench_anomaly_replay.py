@@ -0,0 +1,133 @@
+# careconnect/backend/benchmarks/bench_anomaly_replay.py
+"""
+Replays recorded vitals streams through the anomaly detector.
+
+    python benchmarks/bench_anomaly_replay.py [recording.ndjson]
+    python benchmarks/bench_anomaly_replay.py --synthetic [patients] [seconds]
+
+A recording is one device reading per line, in the POST /api/vitals format.
+Without one, a synthetic recording is generated for `patients` patients at 1 Hz
+with a few injected episodes (tachycardia, desaturation, a blood-pressure spike)
+whose detection is reported next to throughput. Alerts go to a counting sender,
+not SMS.
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "health"))
+
+from anomaly import AnomalyDetector  # noqa: E402
+from timeseries import VitalsStore, parse_reading  # noqa: E402
+
+T0 = 1_700_000_000.0
+
+
+def synthetic_recording(path, patients, seconds, episodes):
+    """Write the recording; returns {(patient_id, metric): episode start}."""
+    baselines = {f"patient-{i}": (random.uniform(60, 90), random.uniform(105, 125), random.uniform(96, 99))
+                 for i in range(patients)}
+    injected = {}
+    for patient_id in random.sample(sorted(baselines), episodes):
+        metric = random.choice(["heart_rate", "spo2", "systolic"])
+        # After the detector's warmup, so deviations (not just thresholds) can fire
+        injected[(patient_id, metric)] = T0 + random.randint(min(70, seconds // 2), seconds - 25)
+
+    with open(path, "w") as f:
+        for second in range(seconds):
+            timestamp = T0 + second
+            for patient_id, (hr, sys_bp, spo2) in baselines.items():
+                heart_rate = hr + random.gauss(0, 2)
+                systolic = sys_bp + random.gauss(0, 3)
+                oxygen = min(100.0, spo2 + random.gauss(0, 0.7))
+                start = injected.get((patient_id, "heart_rate"))
+                if start is not None and start <= timestamp < start + 20:
+                    heart_rate += 55
+                start = injected.get((patient_id, "spo2"))
+                if start is not None and start <= timestamp < start + 20:
+                    oxygen -= 12
+                start = injected.get((patient_id, "systolic"))
+                if start is not None and start <= timestamp < start + 20:
+                    systolic += 40
+                f.write(json.dumps({
+                    "patient_id": patient_id,
+                    "timestamp": timestamp,
+                    "heart_rate": round(heart_rate),
+                    "blood_pressure": f"{round(systolic)}/{round(systolic * 0.65)}",
+                    "temperature": round(98.2 + random.gauss(0, 0.2), 1),
+                    "spo2": round(oxygen),
+                    "respiration_rate": round(16 + random.gauss(0, 1.5)),
+                }) + "\n")
+    return injected
+
+
+def load_rounds(path):
+    """Readings grouped by timestamp second, as devices would deliver them."""
+    rounds = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                reading = json.loads(line)
+                rounds.setdefault(int(float(reading.get("timestamp", 0))), []).append(reading)
+    return [rounds[second] for second in sorted(rounds)]
+
+
+def main():
+    args = sys.argv[1:]
+    tmp = tempfile.mkdtemp(prefix="anomaly-bench-")
+    injected = None
+    try:
+        if args and args[0] != "--synthetic":
+            path = args[0]
+        else:
+            patients = int(args[1]) if len(args) > 1 else 5000
+            seconds = int(args[2]) if len(args) > 2 else 120
+            path = os.path.join(tmp, "recording.ndjson")
+            injected = synthetic_recording(path, patients, seconds, episodes=max(1, patients // 100))
+        rounds = load_rounds(path)
+        parsed = [[parse_reading(reading) for reading in batch] for batch in rounds]
+        samples = sum(len(values) for batch in parsed for _, _, values in batch)
+        per_second = samples / max(1, len(rounds))
+
+        # Detector alone
+        alerts = []
+        detector = AnomalyDetector(on_alert=alerts.append)
+        start = time.perf_counter()
+        for batch in parsed:
+            for patient_id, timestamp, values in batch:
+                for metric, value in values.items():
+                    detector.observe(patient_id, metric, timestamp, value)
+        elapsed = time.perf_counter() - start
+        print(f"detector: {samples / elapsed:>12,.0f} samples/s ({elapsed / samples * 1e6:.2f} us/sample, "
+              f"stream needs {per_second:,.0f}/s, {elapsed / len(rounds) * 100:.1f}% of one core)")
+
+        # In the ingestion path: bulk ingest with the detector as a sample listener
+        store = VitalsStore(os.path.join(tmp, "store"), capacity=60)
+        ingest_detector = AnomalyDetector(on_alert=lambda alert: None)
+        store.add_sample_listener(ingest_detector.observe)
+        start = time.perf_counter()
+        for batch in rounds:
+            store.ingest_many(batch)
+        elapsed = time.perf_counter() - start
+        print(f"ingest+detect: {len(rounds) * len(rounds[0]) / elapsed:>7,.0f} readings/s")
+
+        print(detector.stats())
+        if injected:
+            caught = {(a.patient_id, a.metric) for a in alerts
+                      if (a.patient_id, a.metric) in injected
+                      and injected[(a.patient_id, a.metric)] <= a.timestamp < injected[(a.patient_id, a.metric)] + 20}
+            episode_patients = {patient_id for patient_id, _ in injected}
+            false_alerts = sum(1 for a in alerts if a.patient_id not in episode_patients)
+            print(f"injected episodes: {len(injected)}, detected: {len(caught)}, "
+                  f"alerts for patients without an episode: {false_alerts}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
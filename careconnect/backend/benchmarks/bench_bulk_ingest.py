@@ -0,0 +1,67 @@
+# careconnect/backend/benchmarks/bench_bulk_ingest.py
+"""
+Reports per minute: one POST /api/reports per record (add + get, as before)
+against the batched bulk importer, on the Firestore fake with a simulated
+round trip:
+
+    python benchmarks/bench_bulk_ingest.py [records] [rtt_ms]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "reports"))
+
+from bulk_ingest import BulkIngestor, validate_record  # noqa: E402
+from fake_firestore import FakeFirestore  # noqa: E402
+
+
+def records(count, offset=0):
+    for i in range(offset, offset + count):
+        yield json.dumps({
+            "idempotency_key": f"clinic-1/rec-{i}",
+            "title": f"Visit {i}",
+            "date": f"2021-{i % 12 + 1:02d}-{i % 28 + 1:02d}T10:00:00Z",
+            "diagnosis": "Mild hypertension, monitor at home.",
+            "recommendations": "Reduce salt intake, recheck in 3 months.",
+        })
+
+
+def one_by_one(db, lines):
+    """The old create_report path: add, then read the document back."""
+    collection = db.collection('reports')
+    for line in lines:
+        _, data = validate_record(json.loads(line))
+        _, ref = collection.add(data)
+        ref.get()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+
+    # The per-record path is far too slow to run in full; time a sample and extrapolate
+    sample = 100
+    db = FakeFirestore(latency=rtt)
+    start = time.perf_counter()
+    one_by_one(db, records(sample))
+    per_record = (time.perf_counter() - start) / sample
+    print(f"one by one: {60 / per_record:>10,.0f} reports/min (sampled {sample}, rtt {rtt * 1000:.0f} ms)")
+
+    for concurrency in (1, 4, 8, 16):
+        db = FakeFirestore(latency=rtt)
+        summary = list(BulkIngestor(db, concurrency=concurrency).run(records(count)))[-1]
+        assert summary["committed"] == count, summary
+        print(f"bulk x{concurrency:<3}: {summary['per_minute']:>10,} reports/min ({count} in {summary['elapsed_s']} s)")
+
+    # Re-running the same import is idempotent
+    db = FakeFirestore()
+    for _ in range(2):
+        list(BulkIngestor(db).run(records(1000)))
+    assert len(db.collection('reports').get()) == 1000
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# careconnect/backend/benchmarks/bench_fanout.py
+"""
+p50/p95 latency of routed vs. hedged unified chat.
+
+Simulates the two backends with random latencies. In "routed" mode a wrong
+keyword guess costs a second request to the other backend (what the client does
+today); in "hedged" mode both start together and the first good answer wins:
+
+    python benchmarks/bench_fanout.py
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bedrock-chat"))
+
+from fanout import HedgeBudget, hedged_race  # noqa: E402
+
+REQUESTS = 400
+MISROUTE_RATE = 0.2
+
+
+def backend(name, mean_latency, good):
+    async def run():
+        await asyncio.sleep(random.expovariate(1 / mean_latency))
+        return f"{name} answer" if good else "Error: not found"
+    return name, run
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def one_request(mode, budget):
+    misrouted = random.random() < MISROUTE_RATE
+    primary = backend("knowledge_base", 0.8, good=not misrouted)
+    secondary = backend("bedrock_runtime", 0.4, good=True)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    if mode == "routed":
+        answer = await primary[1]()
+        if answer.startswith("Error"):
+            await secondary[1]()
+    else:
+        await hedged_race(primary, secondary, lambda name, result: not result.startswith("Error"), budget=budget)
+    return loop.time() - start
+
+
+async def run(mode, ratio=1.0):
+    budget = HedgeBudget(ratio=ratio)
+    latencies = await asyncio.gather(*(one_request(mode, budget) for _ in range(REQUESTS)))
+    return latencies, budget.stats()
+
+
+def main():
+    random.seed(7)
+    for mode, ratio in (("routed", 0.0), ("hedged", 1.0), ("hedged", 0.3)):
+        latencies, stats = asyncio.run(run(mode, ratio))
+        label = mode if mode == "routed" else f"hedged (budget {ratio:.0%})"
+        extra = "" if mode == "routed" else f"  hedged {stats['hedged']}/{stats['requests']}"
+        print(f"{label:22s} p50={statistics.median(latencies) * 1000:7.1f} ms  "
+              f"p95={percentile(latencies, 0.95) * 1000:7.1f} ms{extra}")
+
+
+if __name__ == "__main__":
+    main()
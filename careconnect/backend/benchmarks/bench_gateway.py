@@ -0,0 +1,71 @@
+# careconnect/backend/benchmarks/bench_gateway.py
+"""
+Concurrent chat throughput through the shared Bedrock gateway.
+
+Fires a burst of invoke_model calls at the fake Bedrock client (fixed latency per
+call, some of them throttled) and reports wall time, throughput and retries:
+
+    python benchmarks/bench_gateway.py [concurrent_chats]
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from shared.bedrock_gateway import BedrockGateway  # noqa: E402
+from shared.fake_bedrock import FakeBedrockRuntime  # noqa: E402
+
+MODEL_ID = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
+CALL_LATENCY = 0.25
+
+
+class ThrottlingError(Exception):
+    def __init__(self):
+        super().__init__("Rate exceeded")
+        self.response = {"Error": {"Code": "ThrottlingException"}}
+
+
+class ThrottlingFake(FakeBedrockRuntime):
+    """Throttles every tenth call once, like a burst hitting the account quota."""
+
+    def __init__(self):
+        super().__init__(reply="ok", first_token_latency=CALL_LATENCY, token_latency=0)
+        self._count = 0
+        self._count_lock = threading.Lock()
+
+    def invoke_model(self, modelId, body, **kwargs):
+        with self._count_lock:
+            self._count += 1
+            throttle = self._count % 10 == 0
+        if throttle:
+            raise ThrottlingError()
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+async def burst(gateway, chats):
+    request = {"anthropic_version": "bedrock-2023-05-31", "max_tokens": 10,
+               "messages": [{"role": "user", "content": "hi"}]}
+    results = await asyncio.gather(*(gateway.invoke_model_json(MODEL_ID, request) for _ in range(chats)))
+    assert all(r["content"][0]["text"] == "ok" for r in results)
+
+
+def main():
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for concurrency in (8, 64, 256):
+        gateway = BedrockGateway(max_concurrency=concurrency, base_delay=0.05,
+                                 client_factory=lambda service, region: ThrottlingFake())
+        start = time.perf_counter()
+        asyncio.run(burst(gateway, chats))
+        elapsed = time.perf_counter() - start
+        stats = gateway.stats()
+        gateway.close()
+        print(f"concurrency={concurrency:4d}  {chats} chats in {elapsed:6.2f}s  "
+              f"({chats / elapsed:7.1f}/s, retries={stats['retries']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# careconnect/backend/benchmarks/bench_integrations.py
+"""
+Meeting creation cost: the old per-meeting flow (token + user lookup + create,
+each with bare requests and a new connection) against the pooled ZoomClient,
+on the local fake Zoom with 100 ms latency and 100 ms per new connection
+standing in for the TLS handshake.
+
+    python benchmarks/bench_integrations.py [meetings] [threads]
+
+Also checks single-flight token refresh: `threads` threads creating meetings
+on a cold client should fetch one token between them.
+"""
+
+import base64
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "careteam"))
+os.environ["CARECONNECT_FAKE_ZOOM"] = "1"
+
+from fake_zoom import serve_in_thread  # noqa: E402
+from integrations import ZoomClient, pooled_session  # noqa: E402
+
+
+def old_flow(base_url):
+    """What zoom_app.py did for every meeting."""
+    auth = base64.b64encode(b"id:secret").decode()
+    token = requests.post(f"{base_url}/oauth/token", headers={"Authorization": f"Basic {auth}"},
+                          data={"grant_type": "account_credentials", "account_id": "acct"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    user_id = requests.get(f"{base_url}/v2/users?status=active&page_size=1", headers=headers).json()["users"][0]["id"]
+    return requests.post(f"{base_url}/v2/users/{user_id}/meetings", headers=headers,
+                         json={"topic": "CareConnect Video Consultation", "type": 2, "duration": 30}).json()
+
+
+def measure(server, name, create, meetings):
+    counts = server.app.counts
+    before = dict(counts)
+    latencies = []
+    for _ in range(meetings):
+        start = time.perf_counter()
+        create()
+        latencies.append(time.perf_counter() - start)
+    calls = (counts["requests"] - before["requests"]) / meetings
+    connections = (counts["connections"] - before["connections"]) / meetings
+    warm = statistics.median(latencies[1:]) if meetings > 1 else latencies[0]
+    print(f"{name:<14} first {latencies[0] * 1000:6.0f} ms, then p50 {warm * 1000:6.0f} ms | "
+          f"{calls:.2f} calls and {connections:.2f} new connections per meeting")
+
+
+def main():
+    meetings = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    server, base_url = serve_in_thread(latency=0.1, handshake=0.1, rate=1000)
+
+    measure(server, "old flow", lambda: old_flow(base_url), meetings)
+    client = ZoomClient(oauth_url=f"{base_url}/oauth/token", api_url=f"{base_url}/v2", session=pooled_session())
+    measure(server, "ZoomClient", client.create_meeting, meetings)
+
+    cold = ZoomClient(oauth_url=f"{base_url}/oauth/token", api_url=f"{base_url}/v2", session=pooled_session())
+    workers = [threading.Thread(target=cold.create_meeting) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    print(f"{threads} threads on a cold client: {cold.token_refreshes} token request(s), {cold.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
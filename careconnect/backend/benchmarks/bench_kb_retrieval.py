@@ -0,0 +1,100 @@
+# careconnect/backend/benchmarks/bench_kb_retrieval.py
+"""
+Knowledge base questions through /api/knowledge-query: one retrieve_and_generate
+call per question against a cached retrieve followed by generation only.
+
+    python benchmarks/bench_kb_retrieval.py [rounds]
+
+Runs on the fake Bedrock: retrieve_and_generate takes 800 ms, of which the
+vector search (`retrieve`) is 300 ms and generation 500 ms. Each round asks a
+set of popular questions in several paraphrases (different wording, so the
+answer cache misses). Prints median latency per mode, the retrieval/generation
+split for cold and warm questions, and how many `retrieve` calls were made;
+then simulates a knowledge base sync and checks that the passages are fetched
+again.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+os.environ["CARECONNECT_FAKE_BEDROCK"] = "1"
+os.environ["KB_QUERY_MODE"] = "retrieve_then_generate"
+os.environ.setdefault("KB_PASSAGE_CACHE_SIMILARITY", "0.75")
+os.environ["KB_DATA_SOURCE_ID"] = "fake-data-source"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "bedrock-chat"))
+
+import app as chat_app  # noqa: E402
+import kb_retrieval  # noqa: E402
+from shared.fake_bedrock import FakeBedrockAgentRuntime, FakeBedrockRuntime  # noqa: E402
+
+QUESTIONS = [
+    ["What is my blood pressure trend?", "Tell me my blood pressure trend", "How is my blood pressure trend looking"],
+    ["What medications am I taking?", "Which medications am I taking right now", "List the medications I am taking"],
+    ["What did Dr. Phil D say about my recent medical history?",
+     "Summarize my recent medical history from Dr. Phil D",
+     "What is the recent medical history Dr. Phil D recorded"],
+]
+
+
+def ask(client, prompt):
+    start = time.perf_counter()
+    body = client.post("/api/knowledge-query", json={"prompt": prompt}).get_json()
+    return (time.perf_counter() - start) * 1000, body
+
+
+def run(client, rounds, mode):
+    previous = chat_app.KB_QUERY_MODE
+    chat_app.KB_QUERY_MODE = mode
+    latencies = []
+    try:
+        for _ in range(rounds):
+            chat_app.response_cache.clear()
+            for paraphrases in QUESTIONS:
+                for prompt in paraphrases:
+                    ms, body = ask(client, prompt)
+                    assert "error" not in body, body
+                    latencies.append((ms, body))
+    finally:
+        chat_app.KB_QUERY_MODE = previous
+    return latencies
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    agent_runtime = FakeBedrockAgentRuntime(latency=0.8, retrieve_latency=0.3)
+    chat_app.gateway.set_client("bedrock-agent-runtime", agent_runtime)
+    chat_app.gateway.set_client("bedrock-runtime", FakeBedrockRuntime(first_token_latency=0.5, token_latency=0.0))
+    client = chat_app.app.test_client()
+
+    combined = run(client, rounds, "retrieve_and_generate")
+    print(f"retrieve_and_generate:  p50 {statistics.median(ms for ms, _ in combined):6.0f} ms per question")
+
+    split = run(client, rounds, kb_retrieval.RETRIEVE_THEN_GENERATE)
+    cold = [body["timings"] for _, body in split if not body["timings"]["passages_cached"]]
+    warm = [body["timings"] for _, body in split if body["timings"]["passages_cached"]]
+    retrieves = sum(1 for call in agent_runtime.calls if call[0] == "retrieve")
+    print(f"retrieve_then_generate: p50 {statistics.median(ms for ms, _ in split):6.0f} ms per question, "
+          f"{retrieves} retrieve calls for {len(split)} questions")
+    for name, timings in (("cold", cold), ("warm", warm)):
+        if timings:
+            print(f"  {name}: {len(timings):3d} questions, retrieval p50 "
+                  f"{statistics.median(t['retrieval_ms'] for t in timings):6.1f} ms, generation p50 "
+                  f"{statistics.median(t['generation_ms'] for t in timings):6.1f} ms")
+
+    # A finished ingestion job is noticed by the sync watcher's poll and drops the passages
+    chat_app.kb_retriever.check_sync()
+    chat_app.gateway.client("bedrock-agent").complete_ingestion_job()
+    assert chat_app.kb_retriever.check_sync(), "sync not detected"
+    chat_app.response_cache.clear()
+    _, body = ask(client, QUESTIONS[0][0])
+    print(f"after a KB sync: passages_cached={body['timings']['passages_cached']}, "
+          f"retrieval {body['timings']['retrieval_ms']:.0f} ms")
+    print(client.get("/api/knowledge-base/stats").get_json())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# careconnect/backend/benchmarks/bench_outbound_queue.py
+"""
+Outbound SMS queue against the local fake Twilio server.
+
+    python benchmarks/bench_outbound_queue.py [messages] [senders] [workers]
+
+Compares POST /api/send-message latency (now an enqueue) with a direct Twilio
+call, then pushes a burst spread over `senders` numbers through the queue and
+reports delivery throughput against the per-sender limit, 429s seen by the
+fake, retries and failures. The fake answers after 200 ms, allows 5 messages/s
+per sender and fails 2% of requests with 503.
+"""
+
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "careteam"))
+
+from fake_twilio import serve_in_thread  # noqa: E402
+
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+SENDER_RATE = 5.0
+server, base_url = serve_in_thread(latency=0.2, rate=SENDER_RATE, burst=SENDER_RATE, error_rate=0.02)
+os.environ["CARECONNECT_FAKE_TWILIO"] = "1"
+os.environ["FAKE_TWILIO_URL"] = base_url
+os.environ.setdefault("OUTBOUND_DB", os.path.join(tempfile.mkdtemp(prefix="outbound-bench-"), "outbound.db"))
+os.environ.setdefault("OUTBOUND_SENDER_RATE", str(SENDER_RATE))
+os.environ.setdefault("OUTBOUND_SENDER_BURST", str(SENDER_RATE))
+os.environ.setdefault("TWILIO_ALLOWED_TO", "+15551230000")
+
+import app as careteam_app  # noqa: E402
+from twilio_messaging import outbound_queue, send_direct, twilio_number  # noqa: E402
+
+outbound = outbound_queue()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    senders = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    outbound.workers = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    direct = []
+    for _ in range(5):
+        start = time.perf_counter()
+        try:
+            send_direct("+15550000999", "+15551230000", "direct")
+        except Exception:
+            pass
+        direct.append(time.perf_counter() - start)
+
+    client = careteam_app.app.test_client()
+    latencies = []
+    for n in range(50):
+        start = time.perf_counter()
+        response = client.post("/api/send-message", json={"body": f"hello {n}", "to": "+15551230000"},
+                               headers={"Idempotency-Key": f"bench-{n}"})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 202
+    # A retried request returns the message it already queued
+    repeat = client.post("/api/send-message", json={"body": "hello 0"}, headers={"Idempotency-Key": "bench-0"})
+    assert repeat.get_json()["duplicate"]
+    print(f"direct Twilio call:  p50 {statistics.median(direct) * 1000:7.1f} ms")
+    print(f"POST /api/send-message (enqueue): p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    outbound.wait_idle()
+
+    numbers = [f"+1555000{n:04d}" for n in range(senders)]
+    burst = [(numbers[n % senders], f"+1555999{n % 1000:04d}", f"burst {n}", None) for n in range(messages)]
+    start = time.perf_counter()
+    outbound.enqueue_many(burst)
+    enqueued = time.perf_counter() - start
+    outbound.wait_idle()
+    elapsed = time.perf_counter() - start
+    ceiling = senders * SENDER_RATE
+    print(f"burst of {messages} over {senders} senders with {outbound.workers} workers: enqueued in "
+          f"{enqueued * 1000:.0f} ms, delivered in {elapsed:.1f} s = {messages / elapsed:.1f} msg/s "
+          f"(limit {ceiling:.0f} msg/s)")
+    print("queue:", outbound.stats())
+    print("fake Twilio:", server.app.counts, "| main sender:", twilio_number)
+    outbound.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
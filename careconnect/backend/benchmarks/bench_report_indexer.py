@@ -0,0 +1,154 @@
+# careconnect/backend/benchmarks/bench_report_indexer.py
+"""
+Report indexing throughput and freshness, on the Firestore and Bedrock fakes
+(50 ms per Titan embedding) and a Pinecone stand-in that adds 20 ms per request.
+
+    python benchmarks/bench_report_indexer.py [reports] [workers]
+
+Times a full backfill and counts vector-store requests, re-runs it (every
+chunk unchanged, so nothing is embedded or upserted), then edits a report
+through the report cache and measures how long until retrieval returns the
+new text. The per-chunk flow (embed, then upsert one vector) is timed on a
+few reports and extrapolated for comparison.
+"""
+
+import datetime
+import os
+import sys
+import threading
+import time
+
+os.environ["CARECONNECT_FAKE_BEDROCK"] = "1"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "reports"))
+
+from fake_firestore import FakeFirestore  # noqa: E402
+from report_cache import ReportCache  # noqa: E402
+from report_indexer import ReportIndexer, report_chunks  # noqa: E402
+from shared.bedrock_gateway import get_gateway  # noqa: E402
+from shared.embeddings import Embedder  # noqa: E402
+from shared.fake_bedrock import FakeBedrockRuntime  # noqa: E402
+from shared.vector_index import InMemoryVectorIndex, PineconeVectorIndex  # noqa: E402
+
+DIAGNOSIS = ("Patient presents with elevated blood pressure ({bp}) and mild tachycardia. "
+             "Lipid panel shows LDL above target. No signs of end-organ damage on examination. ") * 6
+RECOMMENDATIONS = "Reduce salt intake, walk 30 minutes daily, start lisinopril 10 mg and recheck in {weeks} weeks."
+DOCTORS = ["Dr. Phil D", "Dr. Ana Ruiz", "Dr. Lee Chen"]
+
+
+class SlowPinecone:
+    """The pinecone Index calls PineconeVectorIndex makes, over a memory index, with a round trip each."""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.memory = InMemoryVectorIndex()
+        self.requests = {"upsert": 0, "fetch": 0, "update": 0, "delete": 0, "query": 0}
+        self.vectors_upserted = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+        time.sleep(self.latency)
+
+    def upsert(self, vectors, namespace=None):
+        self._round_trip("upsert")
+        with self._lock:
+            self.vectors_upserted += len(vectors)
+        self.memory.upsert((v["id"], v["values"], v["metadata"]) for v in vectors)
+
+    def fetch(self, ids, namespace=None):
+        self._round_trip("fetch")
+        return {"vectors": {item_id: {"metadata": metadata} for item_id, metadata in self.memory.fetch(ids).items()}}
+
+    def update(self, id, set_metadata, namespace=None):
+        self._round_trip("update")
+        self.memory.update_metadata([(id, dict(self.memory.fetch([id]).get(id) or {}, **set_metadata))])
+
+    def delete(self, ids, namespace=None):
+        self._round_trip("delete")
+        self.memory.delete(ids)
+
+    def query(self, vector, top_k, filter=None, include_metadata=True, namespace=None):
+        self._round_trip("query")
+        return {"matches": [{"id": m.id, "score": m.score, "metadata": m.metadata}
+                            for m in self.memory.query(vector, top_k=top_k, filter=filter)]}
+
+
+def populate(db, count):
+    reports = db.collection('reports')
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for i in range(count):
+        reports.add({
+            "icon_name": "LineChart",
+            "title": f"Report {i}",
+            "date": base + datetime.timedelta(minutes=i),
+            "patient": f"p-{i % 1000}",
+            "doctor": DOCTORS[i % len(DOCTORS)],
+            "content": {"diagnosis": DIAGNOSIS.format(bp=f"{130 + i % 40}/{85 + i % 10}"),
+                        "recommendations": RECOMMENDATIONS.format(weeks=i % 8 + 2)},
+        })
+
+
+def backfill(indexer, db, workers):
+    start = time.perf_counter()
+    for summary in indexer.backfill(db.collection('reports').stream(), workers):
+        pass
+    return summary, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    gateway = get_gateway()
+    gateway.set_client("bedrock-runtime", FakeBedrockRuntime(embedding_latency=0.05))
+    db = FakeFirestore()
+    populate(db, count)
+    pinecone = SlowPinecone()
+    embedder = Embedder(gateway, cache_size=0)
+    indexer = ReportIndexer(embedder, PineconeVectorIndex(pinecone))
+
+    summary, elapsed = backfill(indexer, db, workers)
+    print(f"backfill of {count} reports: {elapsed:.1f} s ({summary['per_minute']} reports/min), "
+          f"{summary['embedded']} chunks embedded, failed batches: {len(summary['failed'])}")
+    print(f"  vector store requests {pinecone.requests}, "
+          f"{pinecone.vectors_upserted / max(1, pinecone.requests['upsert']):.0f} vectors per upsert")
+
+    before = dict(pinecone.requests)
+    summary, elapsed = backfill(indexer, db, workers)
+    print(f"re-index, nothing changed: {elapsed:.1f} s, embedded {summary['embedded']}, "
+          f"skipped {summary['skipped']}, upserts {pinecone.requests['upsert'] - before['upsert']}")
+
+    # Edit one report through the cache, as create_report / the change listener would
+    cache = ReportCache()
+    cache.add_listener(indexer.notify)
+    indexer.start()
+    report = next(iter(db.collection('reports').stream()))
+    data = report.to_dict()
+    data["content"] = dict(data["content"], recommendations="Switch to amlodipine 5 mg; recheck in 2 weeks.")
+    db.collection('reports').document(report.id).set(data)
+    start = time.perf_counter()
+    cache.put(report.id, data)
+    query = embedder.embed_sync("switch to amlodipine")
+    while True:
+        matches = indexer.index.query(query, top_k=1, filter={"report_id": {"$eq": report.id}})
+        if matches and "amlodipine" in matches[0].metadata["text"]:
+            break
+        time.sleep(0.05)
+    print(f"edit visible in retrieval after {time.perf_counter() - start:.2f} s "
+          f"(flush window {indexer.flush_seconds:.1f} s); {indexer.stats()['embedded']} chunks embedded in total")
+    indexer.stop()
+
+    # One embedding call and one single-vector upsert per chunk, one report after another
+    sample = list(db.collection('reports').stream())[:20]
+    start = time.perf_counter()
+    for snapshot in sample:
+        for item_id, text, metadata in report_chunks(snapshot.id, snapshot.to_dict(), embedder.model_id):
+            pinecone.upsert([{"id": item_id, "values": embedder.embed_sync(text).tolist(), "metadata": metadata}])
+    per_report = (time.perf_counter() - start) / len(sample)
+    print(f"per-chunk flow: {per_report * 1000:.0f} ms per report, ~{per_report * count / 60:.1f} min for {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# careconnect/backend/benchmarks/bench_report_listing.py
+"""
+GET /api/reports latency vs. collection size: the old full-collection listing
+against one cursor page, on the in-memory Firestore fake:
+
+    python benchmarks/bench_report_listing.py [max_reports]
+
+The old path grows linearly with the collection; a page (first page and a deep
+page reached through its cursor) should stay flat.
+"""
+
+import datetime
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "reports"))
+
+from fake_firestore import DESCENDING, FakeFirestore  # noqa: E402
+from report_listing import list_reports_page, serialize_report  # noqa: E402
+
+PAGE_SIZE = 50
+DIAGNOSIS = "Patient presents with elevated blood pressure and mild tachycardia. " * 20
+
+
+def populate(db, count, start_at=0):
+    reports = db.collection('reports')
+    base = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for i in range(start_at, count):
+        reports.add({
+            "icon_name": "LineChart",
+            "title": f"Report {i}",
+            # Whole minutes, so many reports share a timestamp and the id tie-breaker matters
+            "date": base + datetime.timedelta(minutes=random.randrange(count)),
+            "content": {"diagnosis": DIAGNOSIS, "recommendations": "Reduce salt intake."},
+        })
+
+
+def legacy_listing(db):
+    """What get_reports did before pagination: every report, every field."""
+    reports = [serialize_report(doc) for doc in
+               db.collection('reports').order_by('date', direction=DESCENDING).stream()]
+    return json.dumps(reports)
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    max_reports = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sizes = [size for size in (1_000, 10_000, 100_000, 200_000, 500_000) if size <= max_reports]
+    db = FakeFirestore()
+    populated = 0
+
+    print(f"{'reports':>9} {'legacy ms':>10} {'bytes':>11} {'page ms':>8} {'deep page ms':>13} {'bytes':>7}")
+    for size in sizes:
+        populate(db, size, populated)
+        populated = size
+
+        # Walk 10 pages in to get a cursor from the middle of the collection
+        cursor = None
+        for _ in range(10):
+            _, cursor = list_reports_page(db, PAGE_SIZE, cursor)
+
+        legacy_ms = timed(lambda: legacy_listing(db), repeat=1 if size > 10_000 else 3)
+        legacy_bytes = len(legacy_listing(db)) if size <= 10_000 else float("nan")
+        page_ms = timed(lambda: json.dumps(list_reports_page(db, PAGE_SIZE)[0]))
+        deep_ms = timed(lambda: json.dumps(list_reports_page(db, PAGE_SIZE, cursor)[0]))
+        page_bytes = len(json.dumps(list_reports_page(db, PAGE_SIZE)[0]))
+        print(f"{size:>9} {legacy_ms:>10.1f} {legacy_bytes:>11.0f} {page_ms:>8.2f} {deep_ms:>13.2f} {page_bytes:>7}")
+
+    # Paging through everything visits each report exactly once
+    seen, cursor = set(), None
+    while True:
+        page, cursor = list_reports_page(db, 500, cursor)
+        seen.update(report["id"] for report in page)
+        if not cursor:
+            break
+    assert len(seen) == populated, (len(seen), populated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# careconnect/backend/benchmarks/bench_retrieval.py
+"""
+Recall and latency of the in-memory vector index, and per-stage timings of
+the retrieval endpoint.
+
+    python benchmarks/bench_retrieval.py [vectors] [dimensions]
+
+Builds a synthetic clustered corpus (vectors scattered around a thousand
+centres, tagged with patient/doctor metadata), then for a set of queries
+compares exact search with the IVF index at several nprobe settings:
+recall@10 against the exact answer and median query latency. Filtered
+queries (one patient) are timed as well. Finally /api/retrieval-query runs
+against the fake Bedrock (30 ms per embedding, 300 ms per generation) and
+the embed/search/generate split is printed.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+os.environ["CARECONNECT_FAKE_BEDROCK"] = "1"
+os.environ["VECTOR_INDEX"] = "memory"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "bedrock-chat"))
+
+import app as chat_app  # noqa: E402
+from shared.fake_bedrock import FakeBedrockRuntime  # noqa: E402
+from shared.vector_index import InMemoryVectorIndex  # noqa: E402
+
+QUERIES = 200
+TOP_K = 10
+PATIENTS = 500
+DOCTORS = ["Dr. Phil D", "Dr. Ana Ruiz", "Dr. Lee Chen", "Dr. Sam Okafor"]
+
+
+def corpus(count, dimensions, clusters=1024, seed=7):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centres[labels] + rng.normal(scale=1.0, size=(count, dimensions)).astype(np.float32)
+    queries = centres[rng.integers(0, clusters, size=QUERIES)]
+    queries = queries + rng.normal(scale=1.0, size=queries.shape).astype(np.float32)
+    return vectors, queries
+
+
+def timed_queries(index, queries, **kwargs):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append({match.id for match in index.query(query, top_k=TOP_K, **kwargs)})
+        latencies.append(time.perf_counter() - start)
+    return results, statistics.median(latencies) * 1000
+
+
+def recall(results, truth):
+    return sum(len(found & expected) for found, expected in zip(results, truth)) / sum(map(len, truth))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    vectors, queries = corpus(count, dimensions)
+
+    index = InMemoryVectorIndex(dimensions)
+    start = time.perf_counter()
+    for offset in range(0, count, 1000):
+        index.upsert((f"chunk-{n}", vectors[n], {"patient": f"p-{n % PATIENTS}", "doctor": DOCTORS[n % len(DOCTORS)]})
+                     for n in range(offset, min(count, offset + 1000)))
+    print(f"{count} x {dimensions} vectors upserted in {time.perf_counter() - start:.1f} s")
+
+    truth, exact_ms = timed_queries(index, queries, exact=True)
+    print(f"{'exact':<12} recall@{TOP_K} 1.000  p50 {exact_ms:7.2f} ms")
+
+    start = time.perf_counter()
+    index.train()
+    print(f"IVF trained ({index.nlist} lists) in {time.perf_counter() - start:.1f} s")
+    for nprobe in (1, 4, 8, 16, 32):
+        results, ms = timed_queries(index, queries, nprobe=nprobe)
+        print(f"{'nprobe=' + str(nprobe):<12} recall@{TOP_K} {recall(results, truth):.3f}  p50 {ms:7.2f} ms "
+              f"({exact_ms / ms:.1f}x)")
+
+    patient_filter = {"patient": {"$eq": "p-17"}}
+    truth, exact_ms = timed_queries(index, queries, filter=patient_filter, exact=True)
+    results, ms = timed_queries(index, queries, filter=patient_filter, nprobe=32)
+    print(f"one patient's {count // PATIENTS} chunks: exact p50 {exact_ms:.2f} ms, "
+          f"nprobe=32 p50 {ms:.2f} ms recall@{TOP_K} {recall(results, truth):.3f}")
+
+    # End to end through the endpoint, on the fake Bedrock
+    chat_app.gateway.set_client("bedrock-runtime",
+                                FakeBedrockRuntime(first_token_latency=0.3, token_latency=0.0, embedding_latency=0.03))
+    notes = [f"Patient p-{n % 20} follow-up note {n}: blood pressure {110 + n % 40}/{70 + n % 20}, "
+             f"{'continue' if n % 3 else 'adjust'} lisinopril, recheck in {n % 8 + 1} weeks" for n in range(2000)]
+    retriever = chat_app.services.get("retriever")
+    embeddings = retriever.embedder.embed_many_sync(notes)
+    retriever.index.upsert((f"note-{n}", embeddings[n], {"text": notes[n], "patient": f"p-{n % 20}"})
+                           for n in range(len(notes)))
+    client = chat_app.app.test_client()
+    timings = []
+    for n in range(20):
+        response = client.post("/api/retrieval-query",
+                               json={"prompt": f"What did the doctor say about blood pressure, visit {n}?",
+                                     "patient": f"p-{n}"})
+        body = response.get_json()
+        assert all(match["metadata"]["patient"] == f"p-{n}" for match in body["matches"])
+        timings.append(body["timings"])
+    for stage in ("embed_ms", "search_ms", "generate_ms"):
+        print(f"{stage:<12} p50 {statistics.median(t[stage] for t in timings):7.1f} ms")
+    print(retriever.stats())
+
+
+if __name__ == "__main__":
+    main()
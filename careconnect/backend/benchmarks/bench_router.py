@@ -0,0 +1,134 @@
+# careconnect/backend/benchmarks/bench_router.py
+"""
+Compiled intent router vs. the old per-request keyword scan.
+
+The router is not faster than the substring scan it replaced (a regex search
+costs about the same as the scan, and route() adds a few hundred nanoseconds
+to build its decision); it is there for accuracy. This scores both on
+LABELLED, hand-labelled prompts none of which are classifier training
+examples, then times them on a synthetic corpus:
+
+    python benchmarks/bench_router.py [n_prompts]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+BEDROCK_CHAT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bedrock-chat")
+sys.path.insert(0, BEDROCK_CHAT_DIR)
+
+from intent_router import KNOWLEDGE_BASE, IntentRouter  # noqa: E402
+
+TEMPLATES = [
+    "what is my {topic}",
+    "can you explain my {topic} to me",
+    "tell me about {topic}",
+    "is my {topic} normal for someone my age",
+    "{chit}",
+    "{chit}, also what about my {topic}",
+    "I feel {feeling} today, {chit}",
+]
+TOPICS = ["blood pressure", "heart rate", "medication", "cholesterol", "diagnosis", "recent labs",
+          "blood sugar", "weekend plans", "favourite movie", "pulse", "treatment plan"]
+CHIT = ["hello there", "tell me a joke", "what's the weather", "thanks a lot", "good morning",
+        "write me a haiku", "who are you"]
+FEELINGS = ["healthy", "tired", "great", "sick", "wealthy"]
+
+# (prompt, should go to the knowledge base)
+LABELLED = [
+    ("what is my blood pressure today", True),
+    ("is my heart-rate normal", True),
+    ("can you go over my cholesterol numbers", True),
+    ("what did my doctor say about the rash", True),
+    ("can I take ibuprofen with my medications", True),
+    ("what were my recent symptoms", True),
+    ("when is my next appointment with Dr. Patel", True),
+    ("how high was my fever last night", True),
+    ("is my glucose too high", True),
+    ("what did the nurse write in my care plan", True),
+    ("is this dosage safe for me", True),
+    ("what treatment options do I have", True),
+    ("does my report mention diabetes", True),
+    ("what does my lab result mean", True),
+    ("am I allergic to penicillin", True),
+    ("I feel healthy and happy today", False),
+    ("tips for building wealth", False),
+    ("tell me something funny", False),
+    ("write me a haiku about autumn", False),
+    ("what's the weather in chicago", False),
+    ("good morning, how are you", False),
+    ("what is the tallest mountain in europe", False),
+    ("recommend a healthy breakfast recipe", False),
+    ("suggest a movie for tonight", False),
+    ("help me plan a trip to the mountains", False),
+    ("translate thank you into spanish", False),
+    ("what's the temperature outside", False),
+    ("I'm feeling great, thanks", False),
+]
+
+
+def legacy_route(prompt):
+    """The scan unified_chat used before the router: list rebuilt and scanned per request."""
+    knowledge_keywords = [
+        "blood pressure", "heart rate", "vital signs", "health data",
+        "medical", "diagnosis", "symptoms", "treatment", "medication",
+        "blood sugar", "cholesterol", "temperature", "pulse", "oxygen",
+        "health", "medical condition", "disease", "illness", "patient",
+        "doctor", "medical history", "Dr.", "physician"
+    ]
+    return any(keyword in prompt.lower() for keyword in knowledge_keywords)
+
+
+def corpus(n, seed=42):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(topic=rng.choice(TOPICS), chit=rng.choice(CHIT),
+                                         feeling=rng.choice(FEELINGS))
+            for _ in range(n)]
+
+
+def accuracy(to_knowledge_base, labelled=LABELLED):
+    """Share of labelled prompts routed as labelled."""
+    return sum(to_knowledge_base(prompt) == label for prompt, label in labelled) / len(labelled)
+
+
+def timed(fn, prompts):
+    start = time.perf_counter()
+    results = [fn(p) for p in prompts]
+    return results, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    prompts = corpus(n)
+
+    config_path = os.path.join(BEDROCK_CHAT_DIR, "router_config.json")
+    start = time.perf_counter()
+    router = IntentRouter.from_config(config_path)
+    build = time.perf_counter() - start
+    with open(config_path) as f:
+        keyword_only = IntentRouter(json.load(f)["knowledge_keywords"])
+
+    print(f"accuracy on {len(LABELLED)} labelled prompts: legacy {accuracy(legacy_route):.0%}, "
+          f"regex {accuracy(lambda p: keyword_only.route(p).route == KNOWLEDGE_BASE):.0%}, "
+          f"regex + classifier {accuracy(lambda p: router.route(p).route == KNOWLEDGE_BASE):.0%}")
+    legacy, legacy_time = timed(legacy_route, prompts)
+    _, search_time = timed(keyword_only._pattern.search, prompts)
+    compiled, compiled_time = timed(lambda p: keyword_only.route(p).route == KNOWLEDGE_BASE, prompts)
+    full, full_time = timed(lambda p: router.route(p).route == KNOWLEDGE_BASE, prompts)
+
+    print(f"router build (regex + classifier training): {build * 1000:.1f} ms")
+    for label, elapsed in (("legacy keyword scan", legacy_time), ("regex search only", search_time),
+                           ("compiled regex route()", compiled_time),
+                           ("regex + classifier", full_time)):
+        print(f"{label:22s} {elapsed * 1e6 / n:7.2f} us/prompt  ({elapsed:.2f}s for {n})")
+    print(f"legacy vs regex disagreements: {sum(a != b for a, b in zip(legacy, compiled))} "
+          f"(e.g. 'healthy' no longer matches 'health')")
+    print(f"prompts sent to the knowledge base: legacy {sum(legacy)}, regex {sum(compiled)}, "
+          f"regex + classifier {sum(full)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# careconnect/backend/benchmarks/bench_server.py
+"""
+The backend as it runs today - one `app.run(debug=True)` Flask dev server per
+service - against server.py serving every service from one uvicorn process.
+
+    python benchmarks/bench_server.py [clients] [seconds] [workers]
+
+Both setups run on the local fakes (Bedrock, Firestore, Twilio, Zoom) and get
+the same mix of requests from `clients` keep-alive connections: vitals
+polling, care-team stats, chat health checks and chat prompts (200 ms of fake
+model latency). Prints requests/s, p50/p99 latency, errors, and the resident
+memory of each setup's whole process tree (the debug reloader runs every dev
+server twice). Services whose dependencies are not installed are left out of
+both setups.
+"""
+
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+FAKE_ENV = {
+    "CARECONNECT_FAKE_BEDROCK": "1",
+    "CARECONNECT_FAKE_FIRESTORE": "1",
+    "CARECONNECT_FAKE_TWILIO": "1",
+    "CARECONNECT_FAKE_ZOOM": "1",
+    "VITALS_SIMULATE": "0",
+    "PYTHONUNBUFFERED": "1",
+}
+
+# (service, directory, module, port for its own dev server)
+DEV_SERVERS = [
+    ("chat", "bedrock-chat", "app.py", 5101),
+    ("careteam", "careteam", "app.py", 5102),
+    ("vitals", "health", "vitals.py", 5103),
+    ("reports", "reports", "api.py", 5104),
+]
+
+# (service, method, path, body)
+REQUEST_MIX = [
+    ("vitals", "GET", "/api/vitals", None),
+    ("vitals", "GET", "/api/vitals", None),
+    ("careteam", "GET", "/api/appointments/stats", None),
+    ("careteam", "GET", "/api/messages/stats", None),
+    ("chat", "GET", "/api/health", None),
+    ("chat", "POST", "/api/chat", {"prompt": "How much water should I drink a day?"}),
+    ("reports", "GET", "/api/reports", None),
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else float("nan")
+
+
+def serve_dev(directory, module, port):
+    """Run one service the way its __main__ block does, on the given port."""
+    directory = os.path.join(BACKEND_DIR, directory)
+    os.chdir(directory)
+    sys.path.insert(0, directory)
+    sys.path.insert(1, BACKEND_DIR)
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("__service__", os.path.join(directory, module))
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    service.app.run(debug=True, port=port)
+
+
+def process_tree_rss(pid):
+    """Resident memory (bytes) of a process and all its descendants, from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, ()))
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+
+def wait_ready(port, path, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", path)
+            status = conn.getresponse().status
+            conn.close()
+            if status < 500:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+def start(args, env):
+    return subprocess.Popen([sys.executable] + args, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop(processes):
+    for process in processes:
+        try:
+            os.killpg(process.pid, signal.SIGINT)
+        except ProcessLookupError:
+            pass
+    for process in processes:
+        try:
+            process.wait(timeout=35)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def load(targets, clients, seconds):
+    """targets: [(port, method, path, body)]; returns (latencies, errors, elapsed)."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(offset):
+        connections = {}
+        n = offset
+        while time.perf_counter() < deadline:
+            port, method, path, body = targets[n % len(targets)]
+            n += 1
+            payload = json.dumps(body).encode() if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload else {}
+            start_at = time.perf_counter()
+            try:
+                conn = connections.get(port) or http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                connections[port] = conn
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 500
+            except (OSError, http.client.HTTPException):
+                connections.pop(port, None)
+                ok = False
+            elapsed = time.perf_counter() - start_at
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+        for conn in connections.values():
+            conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(name, latencies, errors, elapsed, rss):
+    print(f"{name:<22} {len(latencies) / elapsed:8.0f} req/s   p50 {percentile(latencies, 0.5) * 1000:7.1f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms   errors {len(errors):5d}   "
+          f"RSS {rss / 2 ** 20:6.0f} MB")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    env = dict(os.environ, **FAKE_ENV, VITALS_DATA_DIR=tempfile.mkdtemp(prefix="server-bench-"))
+
+    # Today: one debug dev server per service
+    processes, ports = [], {}
+    for service, directory, module, port in DEV_SERVERS:
+        process = start([os.path.abspath(__file__), "--serve", directory, module, str(port)], env)
+        if wait_ready(port, "/"):
+            processes.append(process)
+            ports[service] = port
+        else:
+            print(f"dev server for {service} did not start (missing dependencies?); left out")
+            stop([process])
+    mix = [entry for entry in REQUEST_MIX if entry[0] in ports]
+    time.sleep(2)
+    latencies, errors, elapsed = load([(ports[s], m, p, b) for s, m, p, b in mix], clients, seconds)
+    report(f"{len(processes)} dev servers", latencies, errors, elapsed, sum(process_tree_rss(p.pid) for p in processes))
+    stop(processes)
+
+    # server.py: the same services, one port
+    port = 5100
+    server_env = dict(env, SERVER_SERVICES=",".join(ports))
+    process = start(["server.py", "--port", str(port), "--workers", str(workers)], server_env)
+    if not wait_ready(port, "/server/status"):
+        stop([process])
+        raise SystemExit("server.py did not start")
+    time.sleep(2)
+    latencies, errors, elapsed = load([(port, m, p, b) for _, m, p, b in mix], clients, seconds)
+    report(f"server.py, {workers} worker{'s' if workers > 1 else ''}", latencies, errors, elapsed,
+           process_tree_rss(process.pid))
+    stop([process])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve_dev(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
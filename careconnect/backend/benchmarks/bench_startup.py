@@ -0,0 +1,103 @@
+# careconnect/backend/benchmarks/bench_startup.py
+"""
+Cold import time of each service, from `python -X importtime`.
+
+    python benchmarks/bench_startup.py [--repeat 3] [--max-ms 500]
+
+Imports every service's entry module in a fresh interpreter from its own
+directory, with no fakes, no network access needed and background warm-up
+off, and prints the best-of-`repeat` wall time, the module's cumulative
+import time and the slowest of its direct imports. With --max-ms it exits
+non-zero if any service takes longer, so CI can hold the line. Services whose
+dependencies are not installed are reported and skipped.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# (service, directory, module)
+SERVICES = [
+    ("chat", "bedrock-chat", "app"),
+    ("chat-basic", "bedrock-chat", "api"),
+    ("careteam", "careteam", "app"),
+    ("vitals", "health", "vitals_stream"),
+    ("reports", "reports", "api"),
+]
+
+ENV = {
+    "CHAT_WARM_START": "0",
+    "REPORTS_WARM_START": "0",
+    "VITALS_SIMULATE": "0",
+    # Whatever a service would do with AWS at import must not need real credentials
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_once(directory, module, env):
+    """
+    Returns:
+        tuple: (wall ms, the module's cumulative import us, {module it imports directly: cumulative us})
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=os.path.join(BACKEND_DIR, directory), env=env, capture_output=True, text=True,
+                            timeout=120)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if line and not line.startswith("import time:")]
+        raise RuntimeError(errors[-1] if errors else f"exit status {result.returncode}")
+    own_us, children = 0, {}
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        # Imported by -c itself at one space of indent; what it imports directly at three
+        if len(indent) == 1 and name == module:
+            own_us = int(cumulative)
+        elif len(indent) == 3:
+            children[name] = int(cumulative)
+    return wall_ms, own_us, children
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ms", type=float, help="fail if any service's own import takes longer")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+    env = dict(os.environ, **ENV)
+    for name in ("CARECONNECT_FAKE_BEDROCK", "CARECONNECT_FAKE_FIRESTORE", "CARECONNECT_FAKE_TWILIO"):
+        env.pop(name, None)
+
+    # The interpreter alone, to subtract from the wall times
+    baseline = min(import_once(BACKEND_DIR, "os", env)[0] for _ in range(args.repeat))
+    print(f"interpreter start: {baseline:.0f} ms")
+    over = []
+    for service, directory, module in SERVICES:
+        try:
+            runs = [import_once(directory, module, env) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{service:<11} skipped ({e})")
+            continue
+        wall_ms, own_us, children = min(runs, key=lambda run: run[0])
+        own_ms = own_us / 1000
+        slowest = sorted(((us, name) for name, us in children.items()), reverse=True)[:args.top]
+        print(f"{service:<11} {wall_ms - baseline:6.0f} ms after interpreter start, {module} imports in "
+              f"{own_ms:6.0f} ms; slowest: " + ", ".join(f"{name} {us / 1000:.0f}" for us, name in slowest))
+        if args.max_ms is not None and own_ms > args.max_ms:
+            over.append(service)
+    if over:
+        print(f"over the {args.max_ms:g} ms budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# careconnect/backend/benchmarks/bench_streaming.py
+"""
+Time-to-first-token of the streaming chat path vs. the blocking one.
+
+Runs bedrock-chat/app.py against the fake Bedrock client, so no AWS calls are made:
+
+    python benchmarks/bench_streaming.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+os.environ["CARECONNECT_FAKE_BEDROCK"] = "1"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "bedrock-chat"))
+
+import app as chat_app  # noqa: E402
+from shared.fake_bedrock import FakeBedrockRuntime  # noqa: E402
+
+RUNS = 5
+REPLY = " ".join(f"word{i}" for i in range(200))
+
+
+def main():
+    chat_app.gateway.set_client("bedrock-runtime",
+                                FakeBedrockRuntime(reply=REPLY, first_token_latency=0.3, token_latency=0.01))
+    messages = [{"role": "user", "content": [{"text": "Explain hypertension"}]}]
+
+    blocking, first_token, total = [], [], []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        text = chat_app.generate_conversation(messages)
+        blocking.append(time.perf_counter() - start)
+        assert text == REPLY
+
+        start = time.perf_counter()
+        chunks = []
+        for chunk in chat_app.generate_conversation_stream(messages):
+            if not chunks:
+                first_token.append(time.perf_counter() - start)
+            chunks.append(chunk)
+        total.append(time.perf_counter() - start)
+        assert "".join(chunks) == REPLY, "chunks arrived out of order"
+
+    # The fallback path must still produce the full reply
+    chat_app.gateway.set_client("bedrock-runtime",
+                                FakeBedrockRuntime(reply=REPLY, first_token_latency=0.3, token_latency=0.0,
+                                                   fail_stream=True))
+    assert list(chat_app.generate_conversation_stream(messages)) == [REPLY]
+
+    print(f"blocking reply:       {statistics.median(blocking) * 1000:8.1f} ms")
+    print(f"stream first token:   {statistics.median(first_token) * 1000:8.1f} ms")
+    print(f"stream full reply:    {statistics.median(total) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# careconnect/backend/benchmarks/bench_vitals_ingest.py
+"""
+Vitals store throughput: can one node keep up with thousands of patients
+reporting at 1 Hz?
+
+    python benchmarks/bench_vitals_ingest.py [patients] [seconds]
+
+Feeds `seconds` rounds of one reading per patient (5 vitals + blood pressure),
+as single POST-style ingests and as one bulk batch per round, into a store that
+flushes to a temporary directory, then times latest() and range queries.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "health"))
+
+from timeseries import VitalsStore  # noqa: E402
+
+
+def reading(patient_id, timestamp):
+    return {
+        "patient_id": patient_id,
+        "timestamp": timestamp,
+        "heart_rate": random.randint(60, 100),
+        "blood_pressure": f"{random.randint(100, 130)}/{random.randint(60, 85)}",
+        "temperature": round(random.uniform(97.0, 99.5), 1),
+        "spo2": random.randint(94, 100),
+        "respiration_rate": random.randint(12, 20),
+    }
+
+
+def main():
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    ids = [f"patient-{i}" for i in range(patients)]
+    t0 = 1_700_000_000.0
+    root = tempfile.mkdtemp(prefix="vitals-bench-")
+    try:
+        # Small ring so the run exercises flushing to disk
+        store = VitalsStore(os.path.join(root, "bulk"), capacity=60)
+        rounds = [[reading(patient_id, t0 + second) for patient_id in ids] for second in range(seconds)]
+
+        start = time.perf_counter()
+        for batch in rounds:
+            store.ingest_many(batch)
+        bulk_elapsed = time.perf_counter() - start
+        total = patients * seconds
+        print(f"bulk:    {total / bulk_elapsed:>10,.0f} readings/s "
+              f"({total} readings, {bulk_elapsed:.1f} s, needs {patients:,}/s)")
+
+        single = VitalsStore(os.path.join(root, "single"), capacity=60)
+        sample_rounds = rounds[:5]
+        start = time.perf_counter()
+        for batch in sample_rounds:
+            for item in batch:
+                single.ingest(item)
+        single_elapsed = time.perf_counter() - start
+        print(f"single:  {patients * len(sample_rounds) / single_elapsed:>10,.0f} readings/s")
+
+        samples = [random.choice(ids) for _ in range(10_000)]
+        start = time.perf_counter()
+        for patient_id in samples:
+            store.latest(patient_id)
+        print(f"latest:  {(time.perf_counter() - start) / len(samples) * 1e6:>10.1f} us per patient (6 metrics)")
+
+        start = time.perf_counter()
+        for patient_id in samples[:1000]:
+            timestamps, _ = store.range(patient_id, "heart_rate", t0 + seconds / 4, t0 + seconds)
+        elapsed = (time.perf_counter() - start) / 1000
+        print(f"range:   {elapsed * 1e6:>10.1f} us for {len(timestamps)} points (disk + ring)")
+        assert np.all(np.diff(timestamps) == 1.0)
+        print(store.stats())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
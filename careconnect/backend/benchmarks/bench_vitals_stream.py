@@ -0,0 +1,103 @@
+# careconnect/backend/benchmarks/bench_vitals_stream.py
+"""
+Push latency of the vitals SSE stream with thousands of open connections.
+
+Drives the ASGI stream handler in-process (no sockets): `connections` clients
+spread over `patients` patients, a tenth of them deliberately slow, while a
+device thread ingests one reading per patient per second:
+
+    python benchmarks/bench_vitals_stream.py [connections] [patients] [seconds]
+"""
+
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault("VITALS_DATA_DIR", tempfile.mkdtemp(prefix="vitals-stream-bench-"))
+os.environ["VITALS_SIMULATE"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "health"))
+
+import vitals_stream  # noqa: E402
+from vitals_stream import broker, stream_vitals, vitals_store  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def client(patient_id, slow, latencies, stop):
+    async def receive():
+        await stop.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        body = message.get("body", b"")
+        if body.startswith(b"event: vitals"):
+            payload = json.loads(body.split(b"data: ", 1)[1])
+            if "heart_rate" in payload:
+                latencies.append(time.time() - payload["sent_at"])
+        if slow:
+            await asyncio.sleep(2.5)
+
+    scope = {"type": "http", "path": "/api/vitals/stream", "query_string": f"patient_id={patient_id}".encode()}
+    await stream_vitals(scope, receive, send)
+
+
+def device_feed(patients, seconds, done):
+    store = vitals_store()
+    for _ in range(seconds):
+        round_start = time.time()
+        for i in range(patients):
+            store.ingest({"patient_id": f"p{i}", "heart_rate": random.randint(60, 100)})
+        time.sleep(max(0.0, 1.0 - (time.time() - round_start)))
+    done.set()
+
+
+async def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    patients = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seconds = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    # Stamp each snapshot so clients can measure ingest -> delivery latency
+    snapshot = broker.snapshot
+    broker.snapshot = lambda patient_id: dict(snapshot(patient_id) or {}, sent_at=time.time())
+    broker.attach(asyncio.get_running_loop())
+
+    tracemalloc.start()
+    stop = asyncio.Event()
+    fast, slow = [], []
+    tasks = []
+    for n in range(connections):
+        is_slow = n % 10 == 0
+        tasks.append(asyncio.ensure_future(client(f"p{n % patients}", is_slow, slow if is_slow else fast, stop)))
+    await asyncio.sleep(0.5)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{connections} connections open: {broker.stats()['subscribers']} subscribers, "
+          f"{memory / connections / 1024:.1f} KiB traced per connection")
+
+    done = threading.Event()
+    threading.Thread(target=device_feed, args=(patients, seconds, done), daemon=True).start()
+    while not done.is_set():
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.5)
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    for name, latencies in (("fast clients", fast), ("slow clients", slow)):
+        if latencies:
+            print(f"{name}: {len(latencies)} events, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                  f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(broker.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
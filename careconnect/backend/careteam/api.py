@@ -1,14 +1,5 @@
-import requests # type: ignore
+from integrations import tmobile
 
 def send_sms_alert(to_number: str, message: str):
-    url = "https://api.devedge.t-mobile.com/sms/v1/messages"
-    headers = {
-        "Authorization": f"Bearer {YOUR_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "to": to_number,
-        "message": message
-    }
-    res = requests.post(url, json=payload, headers=headers)
-    return res.status_code, res.json()
+    # Access token from TMOBILE_ACCESS_TOKEN; the request goes over the shared keep-alive session
+    return tmobile.send_sms(to_number, message)
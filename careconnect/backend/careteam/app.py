@@ -2,9 +2,11 @@
 
 from flask import Flask
 from twilio_messaging import twilio_api
+from scheduling import scheduling_api
 
 app = Flask(__name__)
 app.register_blueprint(twilio_api)
+app.register_blueprint(scheduling_api)
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,86 @@
+# careconnect/backend/careteam/fake_twilio.py
+"""
+Local stand-in for Twilio's Messages API, for tests and throughput benchmarks.
+
+Serves POST /2010-04-01/Accounts/<sid>/Messages.json (form fields From, To,
+Body) with Twilio-shaped JSON, after FAKE_TWILIO_LATENCY seconds. Each From
+number is limited to FAKE_TWILIO_RATE messages per second (burst
+FAKE_TWILIO_BURST); above that it answers 429 with Twilio's error code 20429,
+like the real API. FAKE_TWILIO_ERROR_RATE makes a fraction of requests fail
+with 503.
+
+    python careteam/fake_twilio.py            # http://127.0.0.1:5055
+    CARECONNECT_FAKE_TWILIO=1 python careteam/app.py
+"""
+
+import os
+import random
+import threading
+import time
+import uuid
+
+from flask import Flask, jsonify, request
+
+from rate_limit import RateLimiter
+
+FAKE_TWILIO_PORT = int(os.environ.get("FAKE_TWILIO_PORT", "5055"))
+FAKE_TWILIO_LATENCY = float(os.environ.get("FAKE_TWILIO_LATENCY", "0.2"))
+FAKE_TWILIO_RATE = float(os.environ.get("FAKE_TWILIO_RATE", "1"))
+FAKE_TWILIO_BURST = float(os.environ.get("FAKE_TWILIO_BURST", "5"))
+FAKE_TWILIO_ERROR_RATE = float(os.environ.get("FAKE_TWILIO_ERROR_RATE", "0"))
+
+
+def create_app(latency=FAKE_TWILIO_LATENCY, rate=FAKE_TWILIO_RATE, burst=FAKE_TWILIO_BURST,
+               error_rate=FAKE_TWILIO_ERROR_RATE):
+    app = Flask(__name__)
+    limiter = RateLimiter(rate, burst)
+    lock = threading.Lock()
+    counts = {"accepted": 0, "rate_limited": 0, "errors": 0}
+    messages = {}
+
+    @app.route("/2010-04-01/Accounts/<account_sid>/Messages.json", methods=["POST"])
+    def create_message(account_sid):
+        time.sleep(latency)
+        sender = request.form.get("From")
+        recipient = request.form.get("To")
+        if not sender or not recipient:
+            return jsonify({"code": 21604, "message": "A 'To' and 'From' phone number is required.",
+                            "status": 400}), 400
+        if error_rate and random.random() < error_rate:
+            with lock:
+                counts["errors"] += 1
+            return jsonify({"code": 20500, "message": "Internal Server Error", "status": 503}), 503
+        wait = limiter.try_acquire(sender)
+        if wait:
+            with lock:
+                counts["rate_limited"] += 1
+            response = jsonify({"code": 20429, "message": "Too Many Requests", "status": 429})
+            response.headers["Retry-After"] = str(max(1, round(wait)))
+            return response, 429
+        sid = "SM" + uuid.uuid4().hex
+        with lock:
+            counts["accepted"] += 1
+            messages.setdefault((sender, recipient), []).append(request.form.get("Body", ""))
+        return jsonify({"sid": sid, "account_sid": account_sid, "from": sender, "to": recipient,
+                        "body": request.form.get("Body", ""), "status": "queued"}), 201
+
+    @app.route("/stats", methods=["GET"])
+    def stats():
+        with lock:
+            return jsonify(dict(counts, conversations=len(messages)))
+
+    app.counts = counts
+    return app
+
+
+def serve_in_thread(port=0, **options):
+    """Start a threaded fake server in the background; returns (server, base url)."""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", port, create_app(**options), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-twilio").start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    create_app().run(port=FAKE_TWILIO_PORT, threaded=True)
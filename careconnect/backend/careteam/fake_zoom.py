@@ -0,0 +1,196 @@
+# careconnect/backend/careteam/fake_zoom.py
+"""
+Local stand-in for the Zoom endpoints the care-team services use, for tests and
+benchmarks.
+
+- POST /oauth/token (account_credentials grant) -> access_token, expires_in
+- GET  /v2/users -> one active user
+- POST /v2/users/<user_id>/meetings -> a scheduled meeting
+- GET  /v2/users/<user_id>/meetings -> the user's meetings, paged by next_page_token
+- GET  /v2/meetings/<meeting_id>
+
+Every call waits FAKE_ZOOM_LATENCY seconds, and the first request on a new
+connection waits FAKE_ZOOM_HANDSHAKE more, standing in for the TLS handshake
+plain local HTTP doesn't have. Meeting creation is limited to FAKE_ZOOM_RATE
+requests per second (429 with Retry-After above that), like Zoom's per-account
+limits. /stats counts requests, connections and tokens issued.
+
+    python careteam/fake_zoom.py            # http://127.0.0.1:5056
+    CARECONNECT_FAKE_ZOOM=1 python careteam/zoom_app.py
+"""
+
+import itertools
+import os
+import threading
+import time
+import uuid
+
+from flask import Flask, jsonify, request
+
+from rate_limit import RateLimiter
+
+FAKE_ZOOM_PORT = int(os.environ.get("FAKE_ZOOM_PORT", "5056"))
+FAKE_ZOOM_LATENCY = float(os.environ.get("FAKE_ZOOM_LATENCY", "0.1"))
+FAKE_ZOOM_HANDSHAKE = float(os.environ.get("FAKE_ZOOM_HANDSHAKE", "0.1"))
+FAKE_ZOOM_RATE = float(os.environ.get("FAKE_ZOOM_RATE", "10"))
+FAKE_ZOOM_TOKEN_TTL = int(os.environ.get("FAKE_ZOOM_TOKEN_TTL", "3600"))
+
+USER_ID = "fake-host-user"
+
+
+def create_app(latency=FAKE_ZOOM_LATENCY, rate=FAKE_ZOOM_RATE, token_ttl=FAKE_ZOOM_TOKEN_TTL):
+    app = Flask(__name__)
+    limiter = RateLimiter(rate, rate)
+    lock = threading.Lock()
+    counts = {"requests": 0, "connections": 0, "tokens": 0, "meetings": 0, "rate_limited": 0, "unauthorized": 0}
+    tokens = {}
+    meetings = {}
+    meeting_ids = itertools.count(81_000_000_000)
+
+    def count(name):
+        with lock:
+            counts[name] += 1
+
+    @app.before_request
+    def simulate_latency():
+        count("requests")
+        time.sleep(latency)
+
+    def authorized():
+        header = request.headers.get("Authorization", "")
+        expires_at = tokens.get(header.removeprefix("Bearer "))
+        if expires_at is None or expires_at < time.time():
+            count("unauthorized")
+            return False
+        return True
+
+    @app.route("/oauth/token", methods=["POST"])
+    def issue_token():
+        if request.form.get("grant_type") != "account_credentials":
+            return jsonify({"reason": "Unsupported grant type", "error": "unsupported_grant_type"}), 400
+        token = uuid.uuid4().hex
+        tokens[token] = time.time() + token_ttl
+        count("tokens")
+        return jsonify({"access_token": token, "token_type": "bearer", "expires_in": token_ttl,
+                        "scope": "meeting:write:admin user:read:admin"})
+
+    @app.route("/v2/users", methods=["GET"])
+    def list_users():
+        if not authorized():
+            return jsonify({"code": 124, "message": "Invalid access token."}), 401
+        return jsonify({"page_size": 1, "total_records": 1,
+                        "users": [{"id": USER_ID, "email": "host@example.com", "status": "active"}]})
+
+    @app.route("/v2/users/<user_id>/meetings", methods=["POST"])
+    def create_meeting(user_id):
+        if not authorized():
+            return jsonify({"code": 124, "message": "Invalid access token."}), 401
+        wait = limiter.try_acquire("meetings")
+        if wait:
+            count("rate_limited")
+            response = jsonify({"code": 429, "message": "You have reached the maximum per-second rate limit for this API."})
+            response.headers["Retry-After"] = "1"
+            return response, 429
+        data = request.get_json(silent=True) or {}
+        meeting_id = next(meeting_ids)
+        meeting = {
+            "id": meeting_id,
+            "uuid": uuid.uuid4().hex,
+            "host_id": user_id,
+            "topic": data.get("topic", "Zoom Meeting"),
+            "type": data.get("type", 2),
+            "start_time": data.get("start_time"),
+            "duration": data.get("duration", 60),
+            "timezone": data.get("timezone"),
+            "agenda": data.get("agenda", ""),
+            "join_url": f"https://zoom.us/j/{meeting_id}",
+            "start_url": f"https://zoom.us/s/{meeting_id}",
+            "settings": data.get("settings", {}),
+        }
+        with lock:
+            meetings[meeting_id] = meeting
+        count("meetings")
+        return jsonify(meeting), 201
+
+    @app.route("/v2/users/<user_id>/meetings", methods=["GET"])
+    def list_meetings(user_id):
+        if not authorized():
+            return jsonify({"code": 124, "message": "Invalid access token."}), 401
+        page_size = request.args.get("page_size", 30, type=int)
+        offset = int(request.args.get("next_page_token") or 0)
+        with lock:
+            own = [meeting for meeting in meetings.values() if meeting["host_id"] == user_id]
+        page = own[offset:offset + page_size]
+        return jsonify({"page_size": page_size, "total_records": len(own), "meetings": page,
+                        "next_page_token": str(offset + page_size) if offset + page_size < len(own) else ""})
+
+    @app.route("/v2/meetings/<int:meeting_id>", methods=["GET"])
+    def get_meeting(meeting_id):
+        if not authorized():
+            return jsonify({"code": 124, "message": "Invalid access token."}), 401
+        meeting = meetings.get(meeting_id)
+        if meeting is None:
+            return jsonify({"code": 3001, "message": "Meeting does not exist."}), 404
+        return jsonify(meeting)
+
+    @app.route("/stats", methods=["GET"])
+    def stats():
+        with lock:
+            return jsonify(dict(counts))
+
+    app.counts = counts
+    return app
+
+
+def serve_in_thread(port=0, handshake=FAKE_ZOOM_HANDSHAKE, **options):
+    """
+    Start the fake in the background; returns (server, base url).
+
+    Werkzeug's dev server closes every connection, so requests are relayed to
+    the Flask app from an HTTP/1.1 server that keeps connections open, as Zoom does.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    app = create_app(**options)
+    client = app.test_client()
+    lock = threading.Lock()
+
+    class KeepAliveHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with lock:
+                app.counts["connections"] += 1
+            time.sleep(handshake)
+
+        def relay(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            response = client.open(self.path, method=self.command, headers=list(self.headers.items()), data=body)
+            data = response.get_data()
+            self.send_response(response.status_code)
+            for key, value in response.headers.items():
+                if key.lower() not in ("connection", "content-length"):
+                    self.send_header(key, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_DELETE = do_PATCH = relay
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), KeepAliveHandler)
+    server.daemon_threads = True
+    server.app = app
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-zoom").start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    server, url = serve_in_thread(FAKE_ZOOM_PORT)
+    print(f"Fake Zoom on {url}")
+    threading.Event().wait()
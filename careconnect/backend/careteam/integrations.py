@@ -0,0 +1,259 @@
+# careconnect/backend/careteam/integrations.py
+"""
+HTTP clients for the care-team integrations (Zoom, T-Mobile SMS).
+
+All of them share one requests.Session with a keep-alive connection pool, so
+repeated calls reuse a warm TLS connection instead of handshaking each time.
+ZoomClient caches its OAuth token until shortly before `expires_in` (one
+refresh at a time, however many threads find it expired) and remembers the
+host user id, so creating a meeting is a single API call once warm.
+
+    from integrations import zoom, tmobile
+    meeting = zoom.create_meeting(topic="Follow-up", start_time="2025-01-06T09:00:00")
+"""
+
+import base64
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = int(os.environ.get("INTEGRATIONS_POOL_MAXSIZE", "32"))
+HTTP_TIMEOUT = float(os.environ.get("INTEGRATIONS_HTTP_TIMEOUT", "15"))
+# Refresh the token this long before Zoom says it expires
+TOKEN_EXPIRY_MARGIN = 60.0
+
+# Server-to-Server OAuth app credentials; there are no built-in ones
+ZOOM_CLIENT_ID = os.environ.get("ZOOM_CLIENT_ID")
+ZOOM_CLIENT_SECRET = os.environ.get("ZOOM_CLIENT_SECRET")
+ZOOM_ACCOUNT_ID = os.environ.get("ZOOM_ACCOUNT_ID")
+# Set CARECONNECT_FAKE_ZOOM=1 to talk to the local fake (fake_zoom.py) instead of Zoom
+FAKE_ZOOM = os.environ.get("CARECONNECT_FAKE_ZOOM") == "1"
+if FAKE_ZOOM:
+    # The fake accepts any account
+    ZOOM_CLIENT_ID = ZOOM_CLIENT_ID or "fake"
+    ZOOM_CLIENT_SECRET = ZOOM_CLIENT_SECRET or "fake"
+    ZOOM_ACCOUNT_ID = ZOOM_ACCOUNT_ID or "fake"
+FAKE_ZOOM_URL = os.environ.get("FAKE_ZOOM_URL", "http://127.0.0.1:5056")
+ZOOM_OAUTH_URL = os.environ.get("ZOOM_OAUTH_URL", f"{FAKE_ZOOM_URL}/oauth/token" if FAKE_ZOOM else "https://zoom.us/oauth/token")
+ZOOM_API_URL = os.environ.get("ZOOM_API_URL", f"{FAKE_ZOOM_URL}/v2" if FAKE_ZOOM else "https://api.zoom.us/v2")
+# Host for new meetings; looked up (first active user) and remembered when unset
+ZOOM_USER_ID = os.environ.get("ZOOM_USER_ID")
+
+TMOBILE_SMS_URL = os.environ.get("TMOBILE_SMS_URL", "https://api.devedge.t-mobile.com/sms/v1/messages")
+TMOBILE_ACCESS_TOKEN = os.environ.get("TMOBILE_ACCESS_TOKEN")
+
+
+class IntegrationError(Exception):
+    """
+    A failed integration call.
+
+    Args:
+        status (int): HTTP status from the provider; None for configuration and network errors
+        retry_after (float): seconds the provider asked us to wait
+    """
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def pooled_session(pool_maxsize=POOL_MAXSIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session():
+    """The process-wide pooled session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = pooled_session()
+    return _session
+
+
+def _raise_for_status(response, what):
+    """Raise IntegrationError unless the response is a 2xx."""
+    if 200 <= response.status_code < 300:
+        return
+    retry_after = response.headers.get("Retry-After")
+    raise IntegrationError(
+        f"{what} failed: {response.status_code} {response.text[:200]}",
+        status=response.status_code,
+        retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+    )
+
+
+class ZoomClient:
+    """
+    Zoom Server-to-Server OAuth client.
+
+    Args:
+        session: requests.Session to use; defaults to the shared pooled session
+        user_id (str): meeting host; looked up on first use when None
+    """
+
+    def __init__(self, client_id=ZOOM_CLIENT_ID, client_secret=ZOOM_CLIENT_SECRET, account_id=ZOOM_ACCOUNT_ID,
+                 oauth_url=ZOOM_OAUTH_URL, api_url=ZOOM_API_URL, session=None, user_id=ZOOM_USER_ID):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.account_id = account_id
+        self.oauth_url = oauth_url
+        self.api_url = api_url.rstrip("/")
+        self.session = session or shared_session()
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self._user_id = user_id
+        self._user_lock = threading.Lock()
+        self.token_refreshes = 0
+        self.api_calls = 0
+
+    def access_token(self, force_refresh=False):
+        """Cached OAuth token; one thread refreshes it while the others wait for the result."""
+        token = self._token
+        if token is not None and not force_refresh and time.time() < self._token_expires_at:
+            return token
+        with self._token_lock:
+            # Another thread may have refreshed it while we waited for the lock
+            fresh = self._token is not None and time.time() < self._token_expires_at
+            if fresh and (not force_refresh or self._token != token):
+                return self._token
+            if not (self.client_id and self.client_secret and self.account_id):
+                raise IntegrationError("ZOOM_CLIENT_ID, ZOOM_CLIENT_SECRET and ZOOM_ACCOUNT_ID must be set "
+                                       "(or CARECONNECT_FAKE_ZOOM=1 for the local fake)")
+            auth_header = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            response = self.session.post(
+                self.oauth_url,
+                headers={"Authorization": f"Basic {auth_header}",
+                         "Content-Type": "application/x-www-form-urlencoded"},
+                data={"grant_type": "account_credentials", "account_id": self.account_id},
+                timeout=HTTP_TIMEOUT,
+            )
+            _raise_for_status(response, "Zoom token request")
+            data = response.json()
+            self.token_refreshes += 1
+            self._token = data["access_token"]
+            expires_in = float(data.get("expires_in", 3600))
+            self._token_expires_at = time.time() + expires_in - min(TOKEN_EXPIRY_MARGIN, expires_in / 2)
+            return self._token
+
+    def request(self, method, path, **kwargs):
+        """Authenticated API call; refreshes the token once if Zoom rejects it."""
+        for attempt in range(2):
+            token = self.access_token(force_refresh=attempt > 0)
+            self.api_calls += 1
+            response = self.session.request(
+                method, f"{self.api_url}{path}",
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+                timeout=HTTP_TIMEOUT, **kwargs,
+            )
+            if response.status_code != 401:
+                break
+        _raise_for_status(response, f"Zoom {method} {path}")
+        return response.json() if response.content else {}
+
+    def user_id(self):
+        """The meeting host: the first active user, looked up once."""
+        if self._user_id is None:
+            with self._user_lock:
+                if self._user_id is None:
+                    users = self.request("GET", "/users", params={"status": "active", "page_size": 1}).get("users", [])
+                    if not users:
+                        raise IntegrationError("No active Zoom users found")
+                    self._user_id = users[0]["id"]
+        return self._user_id
+
+    def create_meeting(self, topic="CareConnect Video Consultation", start_time=None, duration=30,
+                       timezone="America/Chicago", settings=None, agenda=None, user_id=None):
+        """
+        Create a scheduled meeting for `user_id` (default: the host from user_id()).
+
+        Returns:
+            dict: the Zoom meeting (id, join_url, start_url, ...)
+        """
+        meeting_data = {
+            "topic": topic,
+            "type": 2,  # Scheduled Meeting
+            "duration": duration,
+            "timezone": timezone,
+            "settings": settings or {
+                "host_video": True,
+                "participant_video": True,
+                "join_before_host": True,
+                "waiting_room": False,
+            },
+        }
+        if start_time:
+            meeting_data["start_time"] = start_time
+        if agenda:
+            meeting_data["agenda"] = agenda
+        return self.request("POST", f"/users/{user_id or self.user_id()}/meetings", json=meeting_data)
+
+    def get_meeting(self, meeting_id):
+        """The meeting as Zoom has it now, including a fresh start_url."""
+        return self.request("GET", f"/meetings/{meeting_id}")
+
+    def find_meeting(self, agenda_marker, user_id=None):
+        """
+        The host's scheduled meeting whose agenda contains `agenda_marker`, or None.
+        Used to check whether a create that failed ambiguously went through.
+        """
+        params = {"type": "scheduled", "page_size": 300}
+        while True:
+            page = self.request("GET", f"/users/{user_id or self.user_id()}/meetings", params=params)
+            for meeting in page.get("meetings", []):
+                if agenda_marker in (meeting.get("agenda") or ""):
+                    return meeting
+            if not page.get("next_page_token"):
+                return None
+            params["next_page_token"] = page["next_page_token"]
+
+    def stats(self):
+        return {"token_refreshes": self.token_refreshes, "api_calls": self.api_calls,
+                "token_valid_for": max(0.0, round(self._token_expires_at - time.time(), 1)) if self._token else 0.0}
+
+
+class TMobileSmsClient:
+    """T-Mobile DevEdge SMS; the access token comes from TMOBILE_ACCESS_TOKEN."""
+
+    def __init__(self, access_token=TMOBILE_ACCESS_TOKEN, url=TMOBILE_SMS_URL, session=None):
+        self.access_token = access_token
+        self.url = url
+        self.session = session or shared_session()
+
+    def send_sms(self, to_number, message):
+        """
+        Returns:
+            tuple: (HTTP status, response JSON) of an accepted message
+
+        Raises:
+            IntegrationError: no access token, or T-Mobile did not accept the message
+        """
+        if not self.access_token:
+            raise IntegrationError("TMOBILE_ACCESS_TOKEN is not set")
+        response = self.session.post(
+            self.url,
+            headers={"Authorization": f"Bearer {self.access_token}", "Content-Type": "application/json"},
+            json={"to": to_number, "message": message},
+            timeout=HTTP_TIMEOUT,
+        )
+        # Raising is what tells AlertNotifier the alert was not sent
+        _raise_for_status(response, "T-Mobile SMS")
+        return response.status_code, response.json() if response.content else {}
+
+
+zoom = ZoomClient()
+tmobile = TMobileSmsClient()
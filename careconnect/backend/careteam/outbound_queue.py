@@ -0,0 +1,369 @@
+# careconnect/backend/careteam/outbound_queue.py
+"""
+Durable outbound SMS queue.
+
+POST /api/send-message used to call Twilio inside the request, so the page
+waited on Twilio and a burst of messages ran into Twilio's rate limits with no
+retry. Now the request only inserts a row into a local SQLite queue and returns
+202 with the message id; a pool of worker threads delivers queued messages:
+
+- each sender number has a token bucket (rate_limit.RateLimiter), and workers
+  skip over senders that are out of tokens instead of sleeping on them
+- failures that may succeed later (HTTP 429/5xx, network errors) are retried
+  with exponential backoff and jitter, up to MAX_ATTEMPTS; other errors fail
+  the message
+- an idempotency key maps a retried request to the message it already queued
+- enqueue_many() queues a whole broadcast in one transaction, and workers can
+  claim and record messages in batches (BATCH_SIZE)
+
+Messages survive restarts. A claimed message is leased for SEND_LEASE_SECONDS:
+one still "sending" after that (its process crashed mid-send) is queued again by
+whichever process sees it next, so delivery is at-least-once (Twilio has no
+idempotent create). The lease must be longer than a batch of sends takes, or
+a live process's messages are sent twice.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from rate_limit import RateLimiter
+
+OUTBOUND_DB = os.environ.get("OUTBOUND_DB", "outbound_messages.db")
+OUTBOUND_WORKERS = int(os.environ.get("OUTBOUND_WORKERS", "4"))
+# Twilio allows about one message per second per long-code number by default
+SENDER_RATE = float(os.environ.get("OUTBOUND_SENDER_RATE", "1"))
+SENDER_BURST = float(os.environ.get("OUTBOUND_SENDER_BURST", "5"))
+MAX_ATTEMPTS = int(os.environ.get("OUTBOUND_MAX_ATTEMPTS", "6"))
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 300.0
+# Messages a worker claims at a time. More than one takes rate-limit tokens well
+# before the later sends happen, which bunches requests up and draws 429s
+BATCH_SIZE = int(os.environ.get("OUTBOUND_BATCH_SIZE", "1"))
+SEND_LEASE_SECONDS = float(os.environ.get("OUTBOUND_SEND_LEASE", "300"))
+
+QUEUED, SENDING, SENT, FAILED = "queued", "sending", "sent", "failed"
+
+
+class SendError(Exception):
+    """
+    Raised by a send function.
+
+    Args:
+        status (int): HTTP status from the provider, if any
+        retry_after (float): seconds the provider asked us to wait
+    """
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def is_retryable(error):
+    status = getattr(error, "status", None)
+    if status is None:
+        # Connection errors, timeouts and the like
+        return True
+    return status == 429 or status >= 500
+
+
+class OutboundQueue:
+    """
+    Args:
+        send: send(from_number, to_number, body) -> provider message id; raises on failure
+        path (str): SQLite file; ":memory:" for tests
+        workers (int): delivery threads
+        limiter (RateLimiter): per-sender limits; defaults to SENDER_RATE/SENDER_BURST
+        lease_seconds (float): how long a claimed message may stay "sending" before it is queued again
+    """
+
+    def __init__(self, send, path=OUTBOUND_DB, workers=OUTBOUND_WORKERS, limiter=None,
+                 max_attempts=MAX_ATTEMPTS, batch_size=BATCH_SIZE, lease_seconds=SEND_LEASE_SECONDS):
+        self.send = send
+        self.workers = workers
+        self.limiter = limiter or RateLimiter(SENDER_RATE, SENDER_BURST)
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE,"
+            " sender TEXT NOT NULL, recipient TEXT NOT NULL, body TEXT NOT NULL,"
+            " state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL,"
+            " provider_id TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_due ON messages (state, next_attempt_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._next_reclaim = 0.0
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.reclaimed = 0
+        self.db_errors = 0
+
+    def start(self):
+        """Start the workers (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, daemon=True, name=f"outbound-{n}")
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, sender, recipient, body, idempotency_key=None):
+        """
+        Queue one message.
+
+        Returns:
+            tuple: (message id, True if queued now / False if the idempotency key was already used)
+        """
+        ids = self.enqueue_many([(sender, recipient, body, idempotency_key)])
+        return ids[0]
+
+    def enqueue_many(self, messages):
+        """
+        Queue (sender, recipient, body, idempotency_key) tuples in one transaction.
+
+        Returns:
+            list: (message id, created) per message, in order
+        """
+        now = time.time()
+        results = []
+        with self._lock:
+            for sender, recipient, body, key in messages:
+                if key is not None:
+                    row = self._conn.execute("SELECT id FROM messages WHERE idempotency_key = ?", (key,)).fetchone()
+                    if row is not None:
+                        self.deduplicated += 1
+                        results.append((row[0], False))
+                        continue
+                message_id = uuid.uuid4().hex
+                try:
+                    self._conn.execute(
+                        "INSERT INTO messages (id, idempotency_key, sender, recipient, body, state, attempts,"
+                        " next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                        (message_id, key, sender, recipient, body, QUEUED, now, now, now),
+                    )
+                except sqlite3.IntegrityError:
+                    # Another process on the same file queued this key since the SELECT above
+                    row = key and self._conn.execute(
+                        "SELECT id FROM messages WHERE idempotency_key = ?", (key,)).fetchone()
+                    if not row:
+                        self._conn.rollback()
+                        raise
+                    self.deduplicated += 1
+                    results.append((row[0], False))
+                    continue
+                results.append((message_id, True))
+            self._conn.commit()
+        with self._wakeup:
+            self._wakeup.notify(len(results))
+        return results
+
+    def status(self, message_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, state, attempts, provider_id, error, sender, recipient, created_at, updated_at,"
+                " next_attempt_at FROM messages WHERE id = ?", (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status = dict(zip(("id", "state", "attempts", "sid", "error", "from", "to", "created_at", "updated_at"), row))
+        if status["state"] == QUEUED:
+            status["next_attempt_at"] = row[9]
+        return status
+
+    def _reclaim(self, now):
+        """Queue again the messages whose lease ran out (their sender died mid-send). Caller holds _lock."""
+        reclaimed = self._conn.execute(
+            "UPDATE messages SET state = ?, updated_at = ? WHERE state = ? AND updated_at < ?",
+            (QUEUED, now, SENDING, now - self.lease_seconds),
+        ).rowcount
+        if reclaimed:
+            self.reclaimed += reclaimed
+            print(f"Requeued {reclaimed} messages left sending for over {self.lease_seconds:.0f}s")
+        self._next_reclaim = now + max(1.0, self.lease_seconds / 10)
+
+    def _claim(self):
+        """
+        Mark up to batch_size due messages as sending, skipping senders without tokens.
+
+        Returns:
+            tuple: (list of rows, seconds until something may be ready when the list is empty)
+        """
+        now = time.time()
+        claimed = []
+        blocked = {}
+        with self._lock, self._rollback_on_error():
+            if now >= self._next_reclaim:
+                self._reclaim(now)
+            while len(claimed) < self.batch_size:
+                placeholders = ",".join("?" * len(blocked))
+                exclude = f" AND sender NOT IN ({placeholders})" if blocked else ""
+                rows = self._conn.execute(
+                    "SELECT id, sender, recipient, body, attempts FROM messages"
+                    f" WHERE state = ? AND next_attempt_at <= ?{exclude}"
+                    " ORDER BY next_attempt_at LIMIT ?",
+                    (QUEUED, now, *blocked, self.batch_size - len(claimed)),
+                ).fetchall()
+                if not rows:
+                    break
+                # Every row gets claimed, blocks its sender or was taken by someone else
+                for row in rows:
+                    sender = row[1]
+                    if sender in blocked:
+                        continue
+                    wait = self.limiter.try_acquire(sender)
+                    if wait:
+                        blocked[sender] = wait
+                        continue
+                    # The state check keeps another process on the same file from sending it too
+                    updated = self._conn.execute(
+                        "UPDATE messages SET state = ?, attempts = attempts + 1, updated_at = ?"
+                        " WHERE id = ? AND state = ?",
+                        (SENDING, now, row[0], QUEUED),
+                    ).rowcount
+                    if updated:
+                        claimed.append(row)
+            self._conn.commit()
+            if claimed:
+                return claimed, 0.0
+            next_due = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM messages WHERE state = ?", (QUEUED,)
+            ).fetchone()[0]
+        waits = list(blocked.values())
+        if next_due is not None and next_due > now:
+            waits.append(next_due - now)
+        return [], min(waits) if waits else 1.0
+
+    @contextmanager
+    def _rollback_on_error(self):
+        """Undo a half-done transaction, so a failed claim doesn't leave rows marked sending."""
+        try:
+            yield
+        except sqlite3.Error:
+            self._conn.rollback()
+            raise
+
+    def _record(self, results):
+        """Store the outcome of _deliver() for each message of a batch."""
+        now = time.time()
+        with self._lock, self._rollback_on_error():
+            self._conn.executemany(
+                "UPDATE messages SET state = ?, provider_id = ?, error = ?, next_attempt_at = ?,"
+                " updated_at = ? WHERE id = ?",
+                [(state, provider_id, error, next_attempt_at, now, message_id)
+                 for state, provider_id, error, next_attempt_at, message_id in results],
+            )
+            self._conn.commit()
+            for result in results:
+                if result[0] == SENT:
+                    self.sent += 1
+                elif result[0] == QUEUED:
+                    self.retried += 1
+                else:
+                    self.failed += 1
+
+    def _backoff(self, attempts):
+        delay = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _deliver(self, row):
+        """Send one claimed message; returns its (state, provider id, error, next attempt, id) update."""
+        message_id, sender, recipient, body, attempts = row
+        attempts += 1
+        try:
+            provider_id = self.send(sender, recipient, body)
+            return (SENT, provider_id, None, time.time(), message_id)
+        except Exception as e:
+            retry_after = getattr(e, "retry_after", None)
+            if getattr(e, "status", None) == 429:
+                self.limiter.bucket(sender).penalize(retry_after or 1.0)
+            if is_retryable(e) and attempts < self.max_attempts:
+                delay = max(self._backoff(attempts), retry_after or 0.0)
+                return (QUEUED, None, str(e), time.time() + delay, message_id)
+            print(f"Error sending message {message_id} after {attempts} attempts: {e}")
+            return (FAILED, None, str(e), time.time(), message_id)
+
+    def _work(self):
+        # Outcomes of a sent batch not stored yet: kept and retried, or the messages would be sent again
+        results = []
+        errors = 0
+        while not self._stopping:
+            try:
+                if results:
+                    self._record(results)
+                    results = []
+                batch, wait = self._claim()
+            except sqlite3.Error as e:
+                # "database is locked" and the like, e.g. another process holding the file
+                errors += 1
+                self.db_errors += 1
+                wait = self._backoff(min(errors, 6))
+                print(f"Error in outbound worker, retrying in {wait:.1f}s: {e}")
+                with self._wakeup:
+                    self._wakeup.wait(timeout=wait)
+                continue
+            errors = 0
+            if not batch:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=min(wait, 1.0))
+                continue
+            results = [self._deliver(row) for row in batch]
+        if results:
+            try:
+                self._record(results)
+            except sqlite3.Error as e:
+                print(f"Error recording {len(results)} sent messages at shutdown: {e}")
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM messages GROUP BY state").fetchall()
+        return {state: 0 for state in (QUEUED, SENDING, SENT, FAILED)} | dict(rows)
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or sending (benchmarks, shutdown). Returns True if idle."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            counts = self.counts()
+            if counts[QUEUED] == 0 and counts[SENDING] == 0:
+                return True
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.05)
+
+    def stats(self):
+        return {
+            "workers": len(self._threads),
+            "messages": self.counts(),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated,
+            "reclaimed": self.reclaimed,
+            "db_errors": self.db_errors,
+        }
@@ -0,0 +1,89 @@
+# careconnect/backend/careteam/rate_limit.py
+"""
+Token-bucket rate limiting, one bucket per key (e.g. per Twilio sender number).
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens per second;
+each send takes one. try_acquire() never blocks: it returns 0 when a token was
+taken, otherwise the seconds until one will be available, so a caller can go
+do other work instead of sleeping on a busy sender.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1.0):
+        """
+        Take `tokens` if available.
+
+        Returns:
+            float: 0.0 if taken, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1.0):
+        """Block until `tokens` are taken."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """Push the bucket into debt after the remote side said we went too fast (HTTP 429)."""
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class RateLimiter:
+    """
+    Buckets created on first use for each key.
+
+    Args:
+        rate (float): tokens per second per key
+        burst (float): bucket size per key
+        overrides (dict): key -> (rate, burst) for keys with their own limit
+    """
+
+    def __init__(self, rate, burst=None, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    rate, burst = self.overrides.get(key, (self.rate, self.burst))
+                    bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def try_acquire(self, key, tokens=1.0):
+        return self.bucket(key).try_acquire(tokens)
+
+    def acquire(self, key, tokens=1.0):
+        self.bucket(key).acquire(tokens)
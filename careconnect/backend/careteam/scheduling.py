@@ -0,0 +1,331 @@
+# careconnect/backend/careteam/scheduling.py
+"""
+Bulk scheduling of video consultations as Zoom meetings.
+
+A clinic posts a day's appointments at once:
+
+    POST /api/appointments/bulk
+    {"appointments": [{"appointment_id": "clinic-7/2025-01-06/0900", "patient": "Tom Johnson",
+                       "start_time": "2025-01-06T09:00:00", "duration": 30}, ...]}
+
+Meetings are created concurrently by a small thread pool, paced by a token
+bucket under Zoom's per-second limit for meeting creation (429s are retried
+after Retry-After), and each result is streamed back as an NDJSON line as soon
+as it is ready, ending with a summary line. Creating a meeting is not
+idempotent, so it is only retried blindly when Zoom cannot have acted on it (a
+429, or a connection that failed before the request was sent); after a 5xx or
+a dropped connection the host's meetings are first searched for the
+appointment's agenda marker. Created meetings are stored in
+SQLite under the appointment's key, so posting the same appointments again -
+or GET /api/appointments/<appointment_id> - answers from the store without
+calling Zoom. Only what a patient may see is stored and returned: the host's
+start_url (which starts the meeting as the host, without signing in) is
+fetched from Zoom by Scheduler.start_url() when the host needs it.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from urllib3.exceptions import NewConnectionError
+
+from integrations import IntegrationError, zoom
+from rate_limit import TokenBucket
+
+APPOINTMENTS_DB = os.environ.get("APPOINTMENTS_DB", "appointments.db")
+SCHEDULING_CONCURRENCY = int(os.environ.get("SCHEDULING_CONCURRENCY", "8"))
+# Meeting creation is a "Medium" Zoom API: 20 requests/s on Pro accounts
+ZOOM_MEETINGS_RATE = float(os.environ.get("ZOOM_MEETINGS_RATE", "20"))
+MAX_APPOINTMENTS = 1000
+MAX_ATTEMPTS = 5
+
+DEFAULT_TOPIC = "CareConnect Video Consultation"
+DEFAULT_TIMEZONE = "America/Chicago"
+
+
+def appointment_key(appointment):
+    """The client's appointment_id, or a hash of what identifies the slot."""
+    if appointment.get("appointment_id"):
+        return str(appointment["appointment_id"])
+    fields = [appointment.get(field) for field in ("host", "patient", "start_time", "topic")]
+    return "appt-" + hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()[:32]
+
+
+def validate_appointment(appointment):
+    """
+    Returns:
+        dict: keyword arguments for ZoomClient.create_meeting
+
+    Raises:
+        ValueError: with a message for the caller
+    """
+    if not isinstance(appointment, dict):
+        raise ValueError("appointment must be a JSON object")
+    start_time = appointment.get("start_time")
+    if not start_time:
+        raise ValueError("start_time is required")
+    try:
+        datetime.datetime.fromisoformat(str(start_time).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"start_time is not ISO 8601: {start_time!r}")
+    duration = appointment.get("duration", 30)
+    if isinstance(duration, bool) or not isinstance(duration, int) or not 1 <= duration <= 1440:
+        raise ValueError("duration must be minutes between 1 and 1440")
+    topic = appointment.get("topic") or DEFAULT_TOPIC
+    if appointment.get("patient") and not appointment.get("topic"):
+        topic = f"{DEFAULT_TOPIC} - {appointment['patient']}"
+    return {
+        "topic": topic,
+        "start_time": str(start_time),
+        "duration": duration,
+        "timezone": appointment.get("timezone") or DEFAULT_TIMEZONE,
+        "agenda": appointment.get("agenda"),
+        "user_id": appointment.get("host"),
+    }
+
+
+def agenda_marker(key):
+    """Put in each meeting's agenda so a create that may have gone through can be found again."""
+    return f"[careconnect-appointment:{key}]"
+
+
+def sent_nothing(error):
+    """True for connection errors raised before any of the request reached Zoom."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def meeting_summary(meeting):
+    """The fields of a Zoom meeting that are stored and returned; never start_url or host_id."""
+    return {field: meeting.get(field) for field in ("id", "topic", "start_time", "duration", "timezone",
+                                                     "join_url")}
+
+
+class MeetingStore:
+    """Created meetings by appointment key (SQLite)."""
+
+    def __init__(self, path=APPOINTMENTS_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meetings ("
+            " appointment_key TEXT PRIMARY KEY, meeting TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT appointment_key, meeting FROM meetings WHERE appointment_key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                # Rows written before start_url was left out are trimmed on the way out
+                found.update((key, meeting_summary(json.loads(meeting))) for key, meeting in rows)
+        return found
+
+    def put(self, key, meeting):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meetings (appointment_key, meeting, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(meeting), time.time()),
+            )
+            self._conn.commit()
+
+
+class Scheduler:
+    """
+    Creates meetings for many appointments at once.
+
+    Args:
+        client: ZoomClient
+        store (MeetingStore): created meetings, consulted before calling Zoom
+        concurrency (int): meetings being created at the same time
+        rate (float): meeting creations per second across all threads
+    """
+
+    def __init__(self, client=zoom, store=None, concurrency=SCHEDULING_CONCURRENCY, rate=ZOOM_MEETINGS_RATE):
+        self.client = client
+        self.store = store or MeetingStore()
+        self.bucket = TokenBucket(rate, rate)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="zoom-scheduler")
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.failed = 0
+        self.retries = 0
+        self.lookups = 0
+
+    def _create(self, key, meeting_args):
+        marker = agenda_marker(key)
+        agenda = meeting_args.get("agenda")
+        meeting_args = dict(meeting_args, agenda=f"{agenda}\n\n{marker}" if agenda else marker)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.bucket.acquire()
+            try:
+                meeting = self.client.create_meeting(**meeting_args)
+                break
+            except IntegrationError as e:
+                if e.status == 429:
+                    if attempt == MAX_ATTEMPTS:
+                        raise
+                    self.retries += 1
+                    # Zoom said we went too fast: the shared bucket makes every thread wait
+                    self.bucket.penalize(e.retry_after or 1.0)
+                    continue
+                if (e.status or 0) < 500 or attempt == MAX_ATTEMPTS:
+                    raise
+            except requests.RequestException as e:
+                if attempt == MAX_ATTEMPTS or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                    raise
+                if sent_nothing(e):
+                    self.retries += 1
+                    time.sleep(min(8.0, 0.5 * 2 ** attempt))
+                    continue
+            # A 5xx or a connection lost mid-request: Zoom may have created it anyway
+            time.sleep(min(8.0, 0.5 * 2 ** attempt))
+            self.lookups += 1
+            meeting = self.client.find_meeting(marker, meeting_args.get("user_id"))
+            if meeting is not None:
+                break
+            self.retries += 1
+        meeting = meeting_summary(meeting)
+        self.store.put(key, meeting)
+        return meeting
+
+    def _submit(self, key, meeting_args):
+        # A meeting being created for the same appointment by another request is shared, not duplicated
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._executor.submit(self._create, key, meeting_args)
+                future.add_done_callback(lambda _: self._pending.pop(key, None))
+        return future
+
+    def schedule(self, appointments):
+        """
+        Create meetings for the appointments, yielding one result per appointment
+        as it completes: {"index", "appointment_id", "status": "created" | "existing" | "error",
+        "meeting" or "error"}, then a final {"summary": ...}.
+        """
+        start = time.time()
+        counts = {"created": 0, "existing": 0, "error": 0}
+        valid = {}
+        for index, appointment in enumerate(appointments):
+            try:
+                meeting_args = validate_appointment(appointment)
+            except ValueError as e:
+                counts["error"] += 1
+                key = appointment.get("appointment_id") if isinstance(appointment, dict) else None
+                yield {"index": index, "appointment_id": key, "status": "error", "error": str(e)}
+                continue
+            valid[index] = (appointment_key(appointment), meeting_args)
+
+        stored = self.store.get_many({key for key, _ in valid.values()})
+        futures = {}
+        for index, (key, meeting_args) in valid.items():
+            if key in stored:
+                counts["existing"] += 1
+                self.reused += 1
+                yield {"index": index, "appointment_id": key, "status": "existing", "meeting": stored[key]}
+            else:
+                # The same appointment twice in one request shares one future
+                futures.setdefault(self._submit(key, meeting_args), []).append(index)
+
+        for future in as_completed(futures):
+            try:
+                meeting, error = future.result(), None
+            except Exception as e:
+                meeting, error = None, str(e)
+                self.failed += 1
+            else:
+                self.created += 1
+            for index in futures[future]:
+                key = valid[index][0]
+                if error is not None:
+                    counts["error"] += 1
+                    yield {"index": index, "appointment_id": key, "status": "error", "error": error}
+                else:
+                    counts["created"] += 1
+                    yield {"index": index, "appointment_id": key, "status": "created", "meeting": meeting}
+
+        yield {"summary": dict(counts, total=len(appointments), seconds=round(time.time() - start, 2))}
+
+    def start_url(self, key):
+        """
+        The host's link to start the appointment's meeting, fetched from Zoom now
+        (it expires, and is never stored), or None if the appointment has no meeting.
+        """
+        meeting = self.store.get(key)
+        if meeting is None:
+            return None
+        return self.client.get_meeting(meeting["id"]).get("start_url")
+
+    def stats(self):
+        return {"created": self.created, "reused": self.reused, "failed": self.failed, "retries": self.retries,
+                "lookups": self.lookups, "in_flight": len(self._pending), "zoom": self.client.stats()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def scheduler():
+    """The service's Scheduler, created on first use (opens the SQLite store)."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
+
+
+def schedule_appointments(appointments):
+    """Library entry point: list of results, in completion order, plus the summary."""
+    return list(scheduler().schedule(appointments))
+
+
+scheduling_api = Blueprint('scheduling_api', __name__)
+
+
+@scheduling_api.route("/api/appointments/bulk", methods=["POST"])
+def schedule_bulk():
+    data = request.get_json(silent=True)
+    appointments = data.get("appointments") if isinstance(data, dict) else data
+    if not isinstance(appointments, list) or not appointments:
+        return jsonify({"status": "error", "message": "appointments must be a non-empty list"}), 400
+    if len(appointments) > MAX_APPOINTMENTS:
+        return jsonify({"status": "error", "message": f"At most {MAX_APPOINTMENTS} appointments per request"}), 400
+
+    lines = (json.dumps(result) + "\n" for result in scheduler().schedule(appointments))
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
+@scheduling_api.route("/api/appointments/<path:appointment_id>", methods=["GET"])
+def get_appointment(appointment_id):
+    meeting = scheduler().store.get(appointment_id)
+    if meeting is None:
+        return jsonify({"status": "error", "message": "Appointment not found"}), 404
+    return jsonify({"appointment_id": appointment_id, "meeting": meeting}), 200
+
+
+@scheduling_api.route("/api/appointments/stats", methods=["GET"])
+def scheduling_stats():
+    return jsonify(scheduler().stats()), 200
@@ -1,34 +1,135 @@
 # careconnect/backend/careteam/twilio-messaging.py
 
 from flask import Blueprint, request, jsonify
-from twilio.rest import Client 
-#import os
-#from dotenv import load_dotenv 
+import os
+import sys
+import threading
+#from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.services import ServiceRegistry
+from outbound_queue import OutboundQueue, SendError
 
 # Load environment variables
 # load_dotenv()
 
 twilio_api = Blueprint('twilio_api', __name__)
 
-# Load from environment variables
-account_sid = "ACbb20e8d1966490f5348ebe9c32337840"
-auth_token = "f42a2c0153cbaf21703842873269b144"
-#twilio_number = os.environ.get("+18445230853")
-client = Client(account_sid, auth_token)
+# Load from environment variables; there are no built-in credentials
+account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
+auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
+twilio_number = os.environ.get("TWILIO_FROM_NUMBER", "+18445230853")
+default_recipient = os.environ.get("TWILIO_DEFAULT_TO", "+18777804236")
+# Care-team numbers a client may address by "to" (comma-separated); anything else goes to default_recipient
+allowed_recipients = {default_recipient} | {
+    number.strip() for number in os.environ.get("TWILIO_ALLOWED_TO", "").split(",") if number.strip()
+}
+
+# Set CARECONNECT_FAKE_TWILIO=1 to send to the local fake (fake_twilio.py) instead of Twilio
+FAKE_TWILIO = os.environ.get("CARECONNECT_FAKE_TWILIO") == "1"
+FAKE_TWILIO_URL = os.environ.get("FAKE_TWILIO_URL", "http://127.0.0.1:5055")
+
+if FAKE_TWILIO:
+    # The fake accepts any account
+    account_sid = account_sid or "ACfake"
+    auth_token = auth_token or "fake"
+
+if FAKE_TWILIO:
+    import requests
+
+    _session = requests.Session()
+
+# The Twilio SDK takes a while to import; load it with the first message sent
+_client = None
+_client_lock = threading.Lock()
+
+
+def twilio_client():
+    """The Twilio REST client, or None when sending to the fake."""
+    global _client
+    if FAKE_TWILIO:
+        return None
+    if _client is None:
+        if not (account_sid and auth_token):
+            raise RuntimeError("TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN must be set")
+        with _client_lock:
+            if _client is None:
+                from twilio.rest import Client
+                _client = Client(account_sid, auth_token)
+    return _client
+
+
+def send_direct(from_number, to_number, body):
+    """Send one SMS now (used by the queue workers); returns the Twilio message SID."""
+    client = twilio_client()
+    if client is not None:
+        return client.messages.create(body=body, from_=from_number, to=to_number).sid
+
+    response = _session.post(
+        f"{FAKE_TWILIO_URL}/2010-04-01/Accounts/{account_sid}/Messages.json",
+        data={"From": from_number, "To": to_number, "Body": body},
+        auth=(account_sid, auth_token),
+        timeout=10,
+    )
+    if response.status_code >= 300:
+        retry_after = response.headers.get("Retry-After")
+        raise SendError(response.json().get("message", response.text), status=response.status_code,
+                        retry_after=float(retry_after) if retry_after else None)
+    return response.json()["sid"]
+
+
+# The queue opens its SQLite file (and requeues what a previous process was
+# sending) on first use, not at import
+services = ServiceRegistry()
+
+
+@services.register("outbound", close=lambda queue: queue.stop())
+def open_outbound():
+    return OutboundQueue(send_direct)
+
+
+def outbound_queue():
+    """The process-wide outbound SMS queue."""
+    return services.get("outbound")
+
+
+@twilio_api.before_app_request
+def start_outbound():
+    # Workers start with the first request rather than at import, so the debug
+    # reloader's watcher process doesn't deliver messages too
+    outbound_queue().start()
+
 
 @twilio_api.route("/api/send-message", methods=["POST"])
 def send_sms():
     try:
-        data = request.json
+        data = request.json or {}
         body = data.get("body", "Default message")
+        to = data.get("to")
+        # "to" may be a chat channel id from the care-team page rather than a phone number;
+        # only care-team numbers are sent to directly, so this can't relay to arbitrary phones
+        if to not in allowed_recipients:
+            if isinstance(to, str) and to.startswith("+"):
+                return jsonify({"status": "error", "message": "Recipient is not a care-team number"}), 403
+            to = default_recipient
+        if not FAKE_TWILIO and not (account_sid and auth_token):
+            return jsonify({"status": "error", "message": "Twilio is not configured"}), 503
+        key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
 
-        message = client.messages.create(
-            body=body,
-            from_="+18445230853",
-            to="+18777804236"# in real use: data.get("to")
-        )
-
-        return jsonify({"status": "success", "sid": message.sid}), 200
+        message_id, created = outbound_queue().enqueue(twilio_number, to, body, idempotency_key=key)
+        return jsonify({"status": "queued", "message_id": message_id, "duplicate": not created}), 202
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+
+@twilio_api.route("/api/messages/<message_id>", methods=["GET"])
+def message_status(message_id):
+    status = outbound_queue().status(message_id)
+    if status is None:
+        return jsonify({"status": "error", "message": "Message not found"}), 404
+    return jsonify(status), 200
+
+
+@twilio_api.route("/api/messages/stats", methods=["GET"])
+def message_stats():
+    return jsonify(outbound_queue().stats()), 200
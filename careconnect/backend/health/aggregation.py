@@ -0,0 +1,288 @@
+# careconnect/backend/health/aggregation.py
+"""
+Windowed statistics, chart downsampling and incremental rollups for vitals.
+
+- window_stats() computes count/min/max/mean/percentiles per fixed time window
+  over a sorted (timestamps, values) pair with NumPy reduceat, no Python loop
+  per sample or per window.
+- lttb() reduces a series to N chart points with Largest-Triangle-Three-Buckets,
+  which keeps peaks and dips that plain decimation would drop.
+- Rollup keeps count/sum/min/max per hour or day for one series and is updated
+  as samples are stored, so long-range charts read a few hundred precomputed
+  rows instead of millions of raw samples.
+
+history() and aggregate() pick raw samples or rollups depending on the span.
+"""
+
+import os
+
+import numpy as np
+
+WINDOWS = {"1m": 60, "1h": 3600, "1d": 86400}
+ROLLUP_RESOLUTIONS = (3600, 86400)
+# Hourly rows kept per series (~40 days); daily rows are kept for ~3 years
+ROLLUP_RETENTION = {3600: 24 * 40, 86400: 366 * 3}
+
+# Spans longer than this are charted from hourly rollups instead of raw samples
+RAW_CHART_SPAN = float(os.environ.get("VITALS_RAW_CHART_SPAN", str(2 * 86400)))
+# Percentiles need raw samples; skip them for windows over more samples than this
+MAX_PERCENTILE_SAMPLES = int(os.environ.get("VITALS_MAX_PERCENTILE_SAMPLES", "500000"))
+DEFAULT_PERCENTILES = (50, 95)
+
+
+def window_stats(timestamps, values, window_seconds, percentiles=DEFAULT_PERCENTILES):
+    """
+    Statistics per window for samples sorted by time.
+
+    Returns:
+        dict of equal-length arrays: start, count, min, max, mean and p<q> for each percentile
+    """
+    if len(timestamps) == 0:
+        empty = {"start": np.empty(0), "count": np.empty(0, dtype=np.int64),
+                 "min": np.empty(0), "max": np.empty(0), "mean": np.empty(0)}
+        empty.update({f"p{q}": np.empty(0) for q in percentiles})
+        return empty
+
+    buckets = np.floor(timestamps / window_seconds).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    values64 = values.astype(np.float64)
+    result = {
+        "start": buckets[starts] * window_seconds,
+        "count": counts,
+        "min": np.minimum.reduceat(values64, starts),
+        "max": np.maximum.reduceat(values64, starts),
+        "mean": np.add.reduceat(values64, starts) / counts,
+    }
+    if percentiles:
+        # Sort within each window (windows are already contiguous), then index by rank
+        ordered = values64[np.lexsort((values64, buckets))]
+        for q in percentiles:
+            rank = (counts - 1) * (q / 100.0)
+            lo = np.floor(rank).astype(np.int64)
+            hi = np.ceil(rank).astype(np.int64)
+            frac = rank - lo
+            result[f"p{q}"] = ordered[starts + lo] * (1 - frac) + ordered[starts + hi] * frac
+    return result
+
+
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets downsampling to `points` samples.
+
+    Keeps the first and last samples and, from each bucket in between, the one
+    forming the largest triangle with the previously kept sample and the mean of
+    the next bucket.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return x, y
+    x64 = x.astype(np.float64)
+    y64 = y.astype(np.float64)
+    edges = (np.arange(points - 1) * ((n - 2) / (points - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    keep = np.empty(points, dtype=np.int64)
+    keep[0] = 0
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        if i + 2 < len(edges):
+            avg_x = x64[end:next_end].mean()
+            avg_y = y64[end:next_end].mean()
+        else:
+            avg_x, avg_y = x64[n - 1], y64[n - 1]
+        area = np.abs((x64[a] - avg_x) * (y64[start:end] - y64[a])
+                      - (x64[a] - x64[start:end]) * (avg_y - y64[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return x[keep], y[keep]
+
+
+class Rollup:
+    """
+    count/sum/min/max per fixed bucket for one series, maintained on ingest.
+
+    Rows live in growable NumPy arrays; past `retention` rows the oldest are
+    dropped.
+    """
+
+    def __init__(self, resolution, retention=None):
+        self.resolution = resolution
+        self.retention = retention or ROLLUP_RETENTION.get(resolution, 1000)
+        self._size = 0
+        capacity = 8
+        self.bucket = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.sum = np.zeros(capacity, dtype=np.float64)
+        self.min = np.zeros(capacity, dtype=np.float32)
+        self.max = np.zeros(capacity, dtype=np.float32)
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, extra):
+        needed = self._size + extra
+        if needed > self.retention:
+            # Drop the oldest rows (at least half the retention, so this stays amortized)
+            drop = max(needed - self.retention, self.retention // 2)
+            drop = min(drop, self._size)
+            for name in ("bucket", "count", "sum", "min", "max"):
+                column = getattr(self, name)
+                column[:self._size - drop] = column[drop:self._size]
+            self._size -= drop
+            needed = self._size + extra
+        if needed > len(self.bucket):
+            capacity = max(needed, len(self.bucket) * 2)
+            for name in ("bucket", "count", "sum", "min", "max"):
+                column = getattr(self, name)
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                setattr(self, name, grown)
+
+    def add(self, timestamp, value):
+        """One sample (the per-reading path)."""
+        bucket = int(timestamp // self.resolution)
+        last = self._size - 1
+        if last >= 0 and self.bucket[last] == bucket:
+            self.count[last] += 1
+            self.sum[last] += value
+            if value < self.min[last]:
+                self.min[last] = value
+            if value > self.max[last]:
+                self.max[last] = value
+            return
+        self._grow(1)
+        i = self._size
+        self.bucket[i], self.count[i], self.sum[i], self.min[i], self.max[i] = bucket, 1, value, value, value
+        self._size += 1
+
+    def extend(self, timestamps, values):
+        """Samples sorted by time, newer than everything already added."""
+        if len(timestamps) == 0:
+            return
+        stats = window_stats(timestamps, values, self.resolution, percentiles=())
+        buckets = (stats["start"] // self.resolution).astype(np.int64)
+        sums = stats["mean"] * stats["count"]
+        first = 0
+        last = self._size - 1
+        if last >= 0 and self.bucket[last] == buckets[0]:
+            self.count[last] += stats["count"][0]
+            self.sum[last] += sums[0]
+            self.min[last] = min(self.min[last], stats["min"][0])
+            self.max[last] = max(self.max[last], stats["max"][0])
+            first = 1
+        extra = len(buckets) - first
+        if extra <= 0:
+            return
+        self._grow(extra)
+        rows = slice(self._size, self._size + extra)
+        self.bucket[rows] = buckets[first:]
+        self.count[rows] = stats["count"][first:]
+        self.sum[rows] = sums[first:]
+        self.min[rows] = stats["min"][first:]
+        self.max[rows] = stats["max"][first:]
+        self._size += extra
+
+    def query(self, start=None, end=None):
+        """Rows whose bucket overlaps [start, end], as a window_stats-style dict (no percentiles)."""
+        buckets = self.bucket[:self._size]
+        lo = 0 if start is None else np.searchsorted(buckets, int(start // self.resolution), side="left")
+        hi = self._size if end is None else np.searchsorted(buckets, int(end // self.resolution), side="right")
+        count = self.count[lo:hi]
+        return {
+            "start": buckets[lo:hi] * self.resolution,
+            "count": count.copy(),
+            "min": self.min[lo:hi].astype(np.float64),
+            "max": self.max[lo:hi].astype(np.float64),
+            "mean": self.sum[lo:hi] / np.maximum(count, 1),
+        }
+
+
+def history(store, patient_id, metric, start, end, points=500):
+    """
+    Chart series for [start, end]: raw samples for short spans, hourly rollup
+    means for long ones, reduced to at most `points` with LTTB.
+
+    Returns:
+        tuple: (timestamps, values, source)
+    """
+    series = store.series(patient_id, metric, create=False)
+    if series is None:
+        return np.empty(0), np.empty(0), "raw"
+    if end - start > RAW_CHART_SPAN and 3600 in series.rollups:
+        rows = series.rollup_query(3600, start, end)
+        # Plot each hour at its midpoint
+        timestamps, values, source = rows["start"] + 1800.0, rows["mean"], "rollup_1h"
+    else:
+        timestamps, values = series.range(start, end)
+        source = "raw"
+    timestamps, values = lttb(timestamps, values, points)
+    return timestamps, values, source
+
+
+def clip_edge_buckets(series, stats, window_seconds, start=None, end=None):
+    """
+    Recompute the first and last rollup rows from raw samples so they only count
+    [start, end], like the percentiles do. A row is clipped only while raw
+    storage still holds every sample of its bucket; otherwise it stays whole.
+    """
+    edges = sorted({0, len(stats["start"]) - 1}) if len(stats["start"]) else []
+    empty = []
+    for i in edges:
+        bucket_start = float(stats["start"][i])
+        bucket_end = bucket_start + window_seconds
+        if (start is None or start <= bucket_start) and (end is None or end >= bucket_end):
+            continue
+        timestamps, values = series.range(bucket_start, bucket_end)
+        in_bucket = timestamps < bucket_end
+        if int(in_bucket.sum()) != int(stats["count"][i]):
+            # Part of the bucket has aged out of raw storage
+            continue
+        keep = in_bucket
+        if start is not None:
+            keep &= timestamps >= start
+        if end is not None:
+            keep &= timestamps <= end
+        clipped = values[keep].astype(np.float64)
+        if len(clipped) == 0:
+            empty.append(i)
+            continue
+        stats["count"][i] = len(clipped)
+        stats["min"][i] = clipped.min()
+        stats["max"][i] = clipped.max()
+        stats["mean"][i] = clipped.mean()
+    if empty:
+        stats = {name: np.delete(column, empty) for name, column in stats.items()}
+    return stats
+
+
+def aggregate(store, patient_id, metric, window, start=None, end=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Per-window statistics. Hourly and daily windows come from the rollups,
+    with the edge rows clipped to [start, end] (see clip_edge_buckets());
+    percentiles are added from raw samples when the range holds at most
+    MAX_PERCENTILE_SAMPLES of them.
+
+    Returns:
+        tuple: (dict of arrays, source)
+    """
+    window_seconds = WINDOWS[window]
+    series = store.series(patient_id, metric, create=False)
+    if series is None:
+        return window_stats(np.empty(0), np.empty(0), window_seconds, percentiles), "raw"
+
+    if window_seconds in series.rollups:
+        stats = clip_edge_buckets(series, series.rollup_query(window_seconds, start, end), window_seconds, start, end)
+        source = f"rollup_{window}"
+        if percentiles and series.count_between(start, end) <= MAX_PERCENTILE_SAMPLES:
+            raw = window_stats(*series.range(start, end), window_seconds, percentiles)
+            # Rollup buckets can include samples that aged out of raw storage; align on start
+            index = {bucket_start: i for i, bucket_start in enumerate(raw["start"].tolist())}
+            for q in percentiles:
+                stats[f"p{q}"] = np.array([raw[f"p{q}"][index[s]] if s in index else np.nan
+                                           for s in stats["start"].tolist()])
+        return stats, source
+
+    return window_stats(*series.range(start, end), window_seconds, percentiles), "raw"
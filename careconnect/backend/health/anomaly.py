@@ -0,0 +1,228 @@
+# careconnect/backend/health/anomaly.py
+"""
+Online anomaly detection on incoming vitals, with SMS alerts to the care team.
+
+AnomalyDetector.observe() runs for every stored sample. Each (patient, metric)
+keeps an exponentially weighted mean and variance (three floats), updated in
+O(1); a sample is flagged when it breaks a clinical threshold or sits more than
+Z_THRESHOLD standard deviations from the patient's own recent baseline.
+
+Alerts are deduplicated per (patient, metric, kind) for DEDUP_SECONDS and rate
+limited per patient, then handed to AlertNotifier, which sends them from a
+background thread through one of the careteam SMS senders so a slow SMS API
+never holds up ingestion.
+"""
+
+import collections
+import math
+import os
+import queue
+import sys
+import threading
+import time
+
+# (low, high) limits per metric; None means no limit on that side
+THRESHOLDS = {
+    "heart_rate": (40, 130),
+    "systolic": (90, 180),
+    "diastolic": (None, 120),
+    "temperature": (95.0, 101.5),
+    "spo2": (90, None),
+    "respiration_rate": (8, 30),
+}
+
+EWMA_ALPHA = float(os.environ.get("ANOMALY_EWMA_ALPHA", "0.02"))
+Z_THRESHOLD = float(os.environ.get("ANOMALY_Z_THRESHOLD", "4.0"))
+# Samples needed before the z-score is trusted
+WARMUP_SAMPLES = 60
+# Floor on the standard deviation, so a very steady signal doesn't alert on ordinary noise
+MIN_STDDEV = {"heart_rate": 3.0, "systolic": 4.0, "diastolic": 3.0, "temperature": 0.3, "spo2": 1.0,
+              "respiration_rate": 2.0}
+
+DEDUP_SECONDS = float(os.environ.get("ALERT_DEDUP_SECONDS", "900"))
+ALERTS_PER_PATIENT_PER_HOUR = int(os.environ.get("ALERTS_PER_PATIENT_PER_HOUR", "6"))
+
+Alert = collections.namedtuple("Alert", ["patient_id", "metric", "kind", "value", "timestamp", "detail"])
+
+
+class _Baseline:
+    """EWMA mean/variance for one patient metric."""
+
+    __slots__ = ("mean", "var", "n")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+
+
+class AnomalyDetector:
+    """
+    Args:
+        on_alert: callback(Alert) for alerts that pass dedup and rate limiting
+        thresholds (dict): metric -> (low, high)
+    """
+
+    def __init__(self, on_alert=None, thresholds=THRESHOLDS, alpha=EWMA_ALPHA, z_threshold=Z_THRESHOLD,
+                 dedup_seconds=DEDUP_SECONDS, per_patient_per_hour=ALERTS_PER_PATIENT_PER_HOUR):
+        self.on_alert = on_alert
+        self.thresholds = thresholds
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.dedup_seconds = dedup_seconds
+        self.per_patient_per_hour = per_patient_per_hour
+        self._baselines = {}
+        self._last_alert = {}
+        self._patient_alerts = {}
+        self._lock = threading.Lock()
+        self.recent = collections.deque(maxlen=200)
+        self.samples = 0
+        self.flagged = 0
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self.alerts = 0
+
+    def observe(self, patient_id, metric, timestamp, value):
+        """Update the baseline with one sample and raise an alert if it is anomalous."""
+        self.samples += 1
+        key = (patient_id, metric)
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            baseline = self._baselines[key] = _Baseline()
+
+        kind = None
+        detail = None
+        low, high = self.thresholds.get(metric, (None, None))
+        if low is not None and value < low:
+            kind, detail = "below_threshold", f"below {low}"
+        elif high is not None and value > high:
+            kind, detail = "above_threshold", f"above {high}"
+        elif baseline.n >= WARMUP_SAMPLES:
+            stddev = max(math.sqrt(baseline.var), MIN_STDDEV.get(metric, 0.0))
+            z = (value - baseline.mean) / stddev
+            if abs(z) > self.z_threshold:
+                kind, detail = "deviation", f"{z:+.1f} sd from recent mean {baseline.mean:.1f}"
+
+        # Incremental EWMA mean/variance. The first samples use weight 1/n (a plain
+        # running mean) so the baseline isn't biased towards zero during warmup.
+        # Flagged samples are included, so a lasting shift becomes the new
+        # baseline instead of alerting forever.
+        baseline.n += 1
+        alpha = max(self.alpha, 1.0 / baseline.n)
+        diff = value - baseline.mean
+        increment = alpha * diff
+        baseline.mean += increment
+        baseline.var = (1 - alpha) * (baseline.var + diff * increment)
+
+        if kind is not None:
+            self.flagged += 1
+            self._raise(Alert(patient_id, metric, kind, value, timestamp, detail))
+
+    def _raise(self, alert):
+        with self._lock:
+            key = (alert.patient_id, alert.metric, alert.kind)
+            last = self._last_alert.get(key)
+            if last is not None and alert.timestamp - last < self.dedup_seconds:
+                self.deduplicated += 1
+                return
+            sent = self._patient_alerts.setdefault(alert.patient_id, collections.deque())
+            while sent and alert.timestamp - sent[0] >= 3600:
+                sent.popleft()
+            if len(sent) >= self.per_patient_per_hour:
+                self.rate_limited += 1
+                return
+            self._last_alert[key] = alert.timestamp
+            sent.append(alert.timestamp)
+            self.alerts += 1
+            self.recent.append(alert)
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    def stats(self):
+        return {
+            "series": len(self._baselines),
+            "samples": self.samples,
+            "flagged": self.flagged,
+            "alerts": self.alerts,
+            "deduplicated": self.deduplicated,
+            "rate_limited": self.rate_limited,
+        }
+
+
+def format_alert(alert):
+    when = time.strftime("%H:%M:%S", time.localtime(alert.timestamp))
+    label = alert.metric.replace("_", " ")
+    return f"CareConnect alert: patient {alert.patient_id} {label} {alert.value:g} at {when} ({alert.detail})."
+
+
+def careteam_sender(provider):
+    """
+    send(to_number, message) through one of the careteam senders:
+    "twilio" (twilio_messaging.outbound_queue()), "tmobile" (api.send_sms_alert) or "log".
+    """
+    if provider == "log":
+        return lambda to_number, message: print(f"[alert -> {to_number}] {message}")
+
+    careteam_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "careteam")
+    if careteam_dir not in sys.path:
+        sys.path.append(careteam_dir)
+    if provider == "twilio":
+        # Through the careteam outbound queue, which retries and rate limits per sender
+        from twilio_messaging import outbound_queue, twilio_number
+        outbound = outbound_queue()
+        outbound.start()
+        return lambda to_number, message: outbound.enqueue(twilio_number, to_number, message)
+    if provider == "tmobile":
+        from api import send_sms_alert
+        return send_sms_alert
+    raise ValueError(f"Unknown SMS provider: {provider}")
+
+
+class AlertNotifier:
+    """
+    Sends alerts as SMS from a background thread.
+
+    Args:
+        recipients (list): phone numbers of the care team
+        provider (str): "twilio", "tmobile" or "log"
+        send: optional send(to_number, message), overrides provider (tests, benchmarks)
+    """
+
+    def __init__(self, recipients, provider="log", send=None, max_queue=1000):
+        self.recipients = recipients
+        self.provider = provider
+        self._send = send
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True, name="alert-notifier")
+        self._thread.start()
+
+    def __call__(self, alert):
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            alert = self._queue.get()
+            if self._send is None:
+                try:
+                    self._send = careteam_sender(self.provider)
+                except Exception as e:
+                    print(f"Error loading SMS sender '{self.provider}': {e}")
+                    self._send = careteam_sender("log")
+            message = format_alert(alert)
+            for to_number in self.recipients:
+                try:
+                    self._send(to_number, message)
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Error sending alert SMS to {to_number}: {e}")
+
+    def stats(self):
+        return {"provider": self.provider, "queued": self._queue.qsize(), "sent": self.sent,
+                "failed": self.failed, "dropped": self.dropped}
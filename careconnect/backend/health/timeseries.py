@@ -0,0 +1,414 @@
+# careconnect/backend/health/timeseries.py
+"""
+Append-only time-series store for device vitals.
+
+Every (patient, metric) pair has a Series: a fixed-size NumPy ring buffer of
+timestamps (float64 seconds) and values (float32) holding the most recent
+samples, so the latest reading is one array index. Older samples are appended
+to two flat files per series (<root>/<patient>/<metric>.ts / .val) before the
+ring overwrites them, and range queries read those through np.memmap, so
+history costs disk rather than RAM.
+
+Each series also maintains hourly and daily rollups (see aggregation.py) as
+samples arrive, so long-range charts never scan raw history. Rollups are not
+persisted: a reopened series rebuilds them from its files on its first rollup
+query, so opening the store costs a directory listing, not a replay of history.
+
+Timestamps within a series must not go backwards; late readings are dropped and
+counted.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from aggregation import ROLLUP_RESOLUTIONS, Rollup
+
+METRICS = ("heart_rate", "systolic", "diastolic", "temperature", "spo2", "respiration_rate")
+
+RING_CAPACITY = int(os.environ.get("VITALS_RING_CAPACITY", "600"))
+
+# Also a directory name under the store's root: no "." or ".." and no leading dot
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-][\w.-]{0,127}$")
+
+
+def parse_reading(reading):
+    """
+    Split one device reading into (patient_id, timestamp, {metric: value}).
+
+    blood_pressure may be sent as "120/80" and is stored as systolic/diastolic.
+
+    Raises:
+        ValueError: missing patient_id, unknown or non-numeric values
+    """
+    if not isinstance(reading, dict):
+        raise ValueError("reading must be a JSON object")
+    patient_id = str(reading.get("patient_id") or "")
+    if not _SAFE_ID.match(patient_id):
+        raise ValueError("patient_id is required (letters, digits, '.', '_' or '-', not starting with '.')")
+    timestamp = reading.get("timestamp")
+    try:
+        timestamp = time.time() if timestamp is None else float(timestamp)
+    except (TypeError, ValueError):
+        raise ValueError("timestamp must be a number (epoch seconds)")
+    if not math.isfinite(timestamp):
+        raise ValueError("timestamp must be finite")
+
+    values = {}
+    blood_pressure = reading.get("blood_pressure")
+    if blood_pressure is not None:
+        try:
+            systolic, diastolic = str(blood_pressure).split("/")
+            values["systolic"], values["diastolic"] = float(systolic), float(diastolic)
+        except (TypeError, ValueError):
+            raise ValueError(f"blood_pressure must look like 120/80, got {blood_pressure!r}")
+    for metric in METRICS:
+        if reading.get(metric) is not None:
+            try:
+                values[metric] = float(reading[metric])
+            except (TypeError, ValueError):
+                raise ValueError(f"{metric} must be a number")
+    for metric, value in values.items():
+        if not math.isfinite(value):
+            raise ValueError(f"{metric} must be finite")
+    if not values:
+        raise ValueError(f"reading has no vitals (expected any of {', '.join(METRICS)} or blood_pressure)")
+    return patient_id, timestamp, values
+
+
+class Series:
+    """
+    Ring buffer of (timestamp, value) samples for one patient metric.
+
+    Samples are numbered 0..count-1. The ring holds [ring_start, count) (at most
+    capacity of them); with a path, [0, flushed) is on disk and flushed never
+    falls more than capacity behind count, so nothing is lost.
+
+    Args:
+        capacity (int): samples kept in memory
+        path (str): file prefix for flushed samples; None keeps only the ring
+        rollup_resolutions (tuple): bucket sizes in seconds for incremental rollups
+    """
+
+    def __init__(self, capacity=RING_CAPACITY, path=None, rollup_resolutions=ROLLUP_RESOLUTIONS):
+        self.capacity = capacity
+        self.path = path
+        self.rollups = {resolution: Rollup(resolution) for resolution in rollup_resolutions}
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        self.flushed = 0
+        self.ring_start = 0
+        self.last_timestamp = -np.inf
+        self.dropped = 0
+        # False while the rollups do not cover [0, count) yet (a reopened series)
+        self.rolled_up = True
+        self._lock = threading.Lock()
+        if path and os.path.exists(path + ".ts"):
+            # Resume numbering after what is already on disk
+            self.count = self.flushed = self.ring_start = os.path.getsize(path + ".ts") // 8
+            if self.count:
+                self.last_timestamp = float(np.memmap(path + ".ts", dtype=np.float64, mode="r")[-1])
+                self.rolled_up = False
+
+    def append(self, timestamp, value):
+        """Append one sample; the common 1 Hz case, kept free of temporary arrays."""
+        with self._lock:
+            if timestamp < self.last_timestamp:
+                self.dropped += 1
+                return 0
+            if self.path and self.count + 1 - self.flushed > self.capacity:
+                self._flush()
+            index = self.count % self.capacity
+            self.timestamps[index] = timestamp
+            self.values[index] = value
+            self.count += 1
+            if self.count - self.ring_start > self.capacity:
+                self.ring_start = self.count - self.capacity
+            self.last_timestamp = timestamp
+            if self.rolled_up:
+                for rollup in self.rollups.values():
+                    rollup.add(timestamp, value)
+            return 1
+
+    def extend(self, timestamps, values):
+        """
+        Append samples (sorted by time).
+
+        Returns:
+            tuple: (timestamps, values) actually stored, without the late ones that were dropped
+        """
+        with self._lock:
+            keep = timestamps >= self.last_timestamp
+            if not keep.all():
+                # Late readings would break the sorted order range queries rely on
+                self.dropped += int((~keep).sum())
+                timestamps, values = timestamps[keep], values[keep]
+            step = max(1, self.capacity // 2)
+            for start in range(0, len(timestamps), step):
+                self._extend_chunk(timestamps[start:start + step], values[start:start + step])
+            if len(timestamps):
+                self.last_timestamp = float(timestamps[-1])
+                for rollup in (self.rollups.values() if self.rolled_up else ()):
+                    rollup.extend(timestamps, values)
+            return timestamps, values
+
+    def _extend_chunk(self, timestamps, values):
+        # Flush before the ring would overwrite samples that are not on disk yet
+        if self.path and self.count + len(timestamps) - self.flushed > self.capacity:
+            self._flush()
+        positions = np.arange(self.count, self.count + len(timestamps)) % self.capacity
+        self.timestamps[positions] = timestamps
+        self.values[positions] = values
+        self.count += len(timestamps)
+        self.ring_start = max(self.ring_start, self.count - self.capacity)
+
+    def _flush(self):
+        if self.count <= self.flushed or not self.path:
+            return
+        positions = np.arange(self.flushed, self.count) % self.capacity
+        with open(self.path + ".ts", "ab") as f:
+            self.timestamps[positions].tofile(f)
+        with open(self.path + ".val", "ab") as f:
+            self.values[positions].tofile(f)
+        self.flushed = self.count
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def latest(self):
+        """(timestamp, value) of the newest sample, or None."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            if self.count > self.ring_start:
+                index = (self.count - 1) % self.capacity
+                return float(self.timestamps[index]), float(self.values[index])
+        # Only on disk (just reopened): read the last flushed sample
+        return float(np.memmap(self.path + ".ts", dtype=np.float64, mode="r")[-1]), \
+            float(np.memmap(self.path + ".val", dtype=np.float32, mode="r")[-1])
+
+    def _roll_up(self):
+        """Build the rollups from every stored sample: disk [0, flushed), then ring [flushed, count)."""
+        if self.flushed:
+            disk_ts = np.memmap(self.path + ".ts", dtype=np.float64, mode="r")[:self.flushed]
+            disk_val = np.memmap(self.path + ".val", dtype=np.float32, mode="r")[:self.flushed]
+            for start in range(0, self.flushed, 1_000_000):
+                for rollup in self.rollups.values():
+                    rollup.extend(disk_ts[start:start + 1_000_000], disk_val[start:start + 1_000_000])
+        positions = np.arange(self.flushed, self.count) % self.capacity
+        for rollup in self.rollups.values():
+            rollup.extend(self.timestamps[positions], self.values[positions])
+        self.rolled_up = True
+
+    def rollup_query(self, resolution, start=None, end=None):
+        with self._lock:
+            if not self.rolled_up:
+                self._roll_up()
+            return self.rollups[resolution].query(start, end)
+
+    def count_between(self, start=None, end=None):
+        """Number of stored samples with start <= timestamp <= end, without reading them."""
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        with self._lock:
+            total = 0
+            if self.path and self.ring_start > 0:
+                disk_ts = np.memmap(self.path + ".ts", dtype=np.float64, mode="r")[:self.ring_start]
+                total += np.searchsorted(disk_ts, end, side="right") - np.searchsorted(disk_ts, start, side="left")
+            ring_ts = self.timestamps[np.arange(self.ring_start, self.count) % self.capacity]
+            total += np.searchsorted(ring_ts, end, side="right") - np.searchsorted(ring_ts, start, side="left")
+            return int(total)
+
+    def range(self, start=None, end=None):
+        """
+        Samples with start <= timestamp <= end, oldest first.
+
+        Returns:
+            tuple: (timestamps float64 array, values float32 array)
+        """
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        parts_ts, parts_val = [], []
+        with self._lock:
+            # Samples older than the ring come from disk
+            if self.path and self.ring_start > 0:
+                disk_ts = np.memmap(self.path + ".ts", dtype=np.float64, mode="r")[:self.ring_start]
+                disk_val = np.memmap(self.path + ".val", dtype=np.float32, mode="r")[:self.ring_start]
+                lo = np.searchsorted(disk_ts, start, side="left")
+                hi = np.searchsorted(disk_ts, end, side="right")
+                parts_ts.append(np.array(disk_ts[lo:hi]))
+                parts_val.append(np.array(disk_val[lo:hi]))
+            positions = np.arange(self.ring_start, self.count) % self.capacity
+            ring_ts = self.timestamps[positions]
+            lo = np.searchsorted(ring_ts, start, side="left")
+            hi = np.searchsorted(ring_ts, end, side="right")
+            parts_ts.append(ring_ts[lo:hi])
+            parts_val.append(self.values[positions][lo:hi])
+        return np.concatenate(parts_ts), np.concatenate(parts_val)
+
+
+class VitalsStore:
+    """
+    Series per patient per metric.
+
+    Args:
+        root (str): directory for flushed history; None keeps everything in memory
+            (only the last `capacity` samples per series)
+        capacity (int): ring size per series
+    """
+
+    def __init__(self, root=None, capacity=RING_CAPACITY):
+        self.root = root
+        self.capacity = capacity
+        self._series = {}
+        self._lock = threading.Lock()
+        self.readings = 0
+        self.samples = 0
+        self.rejected = 0
+        self._listeners = []
+        self._sample_listeners = []
+        if root and os.path.isdir(root):
+            # Reopen the series flushed by a previous run
+            for patient_id in os.listdir(root):
+                if not _SAFE_ID.match(patient_id) or not os.path.isdir(os.path.join(root, patient_id)):
+                    continue
+                for name in os.listdir(os.path.join(root, patient_id)):
+                    metric, ext = os.path.splitext(name)
+                    if ext == ".ts" and metric in METRICS:
+                        self.series(patient_id, metric)
+
+    def add_listener(self, callback):
+        """callback(patient_id) runs after new readings for that patient are stored."""
+        self._listeners.append(callback)
+
+    def add_sample_listener(self, callback):
+        """callback(patient_id, metric, timestamp, value) runs for every stored sample, oldest first."""
+        self._sample_listeners.append(callback)
+
+    def _notify(self, patient_ids):
+        for callback in self._listeners:
+            for patient_id in patient_ids:
+                callback(patient_id)
+
+    def series(self, patient_id, metric, create=True):
+        key = (patient_id, metric)
+        series = self._series.get(key)
+        if series is None and create:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    path = None
+                    if self.root:
+                        directory = os.path.join(self.root, patient_id)
+                        root = os.path.realpath(self.root)
+                        if os.path.dirname(os.path.realpath(directory)) != root:
+                            raise ValueError(f"patient_id {patient_id!r} is not a directory under the store")
+                        os.makedirs(directory, exist_ok=True)
+                        path = os.path.join(directory, metric)
+                    series = self._series[key] = Series(self.capacity, path)
+        return series
+
+    def ingest(self, reading):
+        """Store one device reading; raises ValueError for a malformed one."""
+        try:
+            patient_id, timestamp, values = parse_reading(reading)
+        except ValueError:
+            self.rejected += 1
+            raise
+        for metric, value in values.items():
+            stored = self.series(patient_id, metric).append(timestamp, value)
+            self.samples += stored
+            if stored:
+                for callback in self._sample_listeners:
+                    callback(patient_id, metric, timestamp, value)
+        self.readings += 1
+        self._notify((patient_id,))
+
+    def ingest_many(self, readings):
+        """
+        Store a batch of readings, appending each series once.
+
+        Returns:
+            dict: accepted/rejected counts and the first few errors
+        """
+        columns = {}
+        errors = []
+        accepted = rejected = 0
+        for index, reading in enumerate(readings):
+            try:
+                patient_id, timestamp, values = parse_reading(reading)
+            except ValueError as e:
+                rejected += 1
+                if len(errors) < 20:
+                    errors.append({"index": index, "error": str(e)})
+                continue
+            accepted += 1
+            for metric, value in values.items():
+                column = columns.setdefault((patient_id, metric), ([], []))
+                column[0].append(timestamp)
+                column[1].append(value)
+
+        stored = 0
+        for (patient_id, metric), (timestamps, values) in columns.items():
+            if len(timestamps) == 1:
+                appended = self.series(patient_id, metric).append(timestamps[0], values[0])
+                stored += appended
+                if appended:
+                    for callback in self._sample_listeners:
+                        callback(patient_id, metric, timestamps[0], values[0])
+                continue
+            timestamps = np.asarray(timestamps, dtype=np.float64)
+            values = np.asarray(values, dtype=np.float32)
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, values = timestamps[order], values[order]
+            # Listeners only see what was stored: a late duplicate must not be scored again
+            timestamps, values = self.series(patient_id, metric).extend(timestamps, values)
+            stored += len(timestamps)
+            if self._sample_listeners:
+                for timestamp, value in zip(timestamps.tolist(), values.tolist()):
+                    for callback in self._sample_listeners:
+                        callback(patient_id, metric, timestamp, value)
+        self.readings += accepted
+        self.samples += stored
+        self.rejected += rejected
+        self._notify({patient_id for patient_id, _ in columns})
+        return {"accepted": accepted, "rejected": rejected, "errors": errors}
+
+    def latest(self, patient_id):
+        """{metric: (timestamp, value)} of the newest sample per metric."""
+        result = {}
+        for metric in METRICS:
+            series = self.series(patient_id, metric, create=False)
+            sample = series.latest() if series else None
+            if sample is not None:
+                result[metric] = sample
+        return result
+
+    def range(self, patient_id, metric, start=None, end=None):
+        series = self.series(patient_id, metric, create=False)
+        if series is None:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float32)
+        return series.range(start, end)
+
+    def flush(self):
+        for series in list(self._series.values()):
+            series.flush()
+
+    def stats(self):
+        series = list(self._series.values())
+        return {
+            "patients": len({patient_id for patient_id, _ in self._series}),
+            "series": len(series),
+            "readings": self.readings,
+            "samples": self.samples,
+            "rejected": self.rejected,
+            "dropped_out_of_order": sum(s.dropped for s in series),
+            "memory_bytes": sum(s.timestamps.nbytes + s.values.nbytes for s in series),
+            "rollup_rows": sum(len(rollup) for s in series for rollup in s.rollups.values()),
+        }
@@ -1,23 +1,271 @@
 # backend/api/vitals.py
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
+import atexit
+import json
+import os
 import random
+import sys
+import threading
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from shared.services import ServiceRegistry
+from aggregation import WINDOWS, aggregate, history
+from anomaly import AlertNotifier, AnomalyDetector
+from timeseries import METRICS, VitalsStore
+
 app = Flask(__name__)
 CORS(app)
 
-@app.route("/api/vitals", methods=["GET"])
-def get_vitals():
-    vitals = {
+# Device readings, kept per patient per metric; history beyond the in-memory ring
+# is flushed to VITALS_DATA_DIR
+VITALS_DATA_DIR = os.environ.get("VITALS_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vitals_data"))
+VITALS_FLUSH_SECONDS = float(os.environ.get("VITALS_FLUSH_SECONDS", "30"))
+DEFAULT_PATIENT_ID = os.environ.get("VITALS_DEFAULT_PATIENT", "demo")
+# Until devices are connected, feed the default patient a simulated reading every second
+VITALS_SIMULATE = os.environ.get("VITALS_SIMULATE", "1") == "1"
+MAX_RANGE_POINTS = 10000
+# Anomaly alerts go by SMS to these numbers (comma separated) via "twilio", "tmobile" or "log"
+ALERT_SMS_PROVIDER = os.environ.get("ALERT_SMS_PROVIDER", "log")
+ALERT_SMS_RECIPIENTS = [n.strip() for n in os.environ.get("ALERT_SMS_RECIPIENTS", "").split(",") if n.strip()]
+
+# The store (which lists and opens every flushed series) and the alert thread
+# are created on first use, so importing the app reads no files and starts no threads
+services = ServiceRegistry()
+# callback(patient_id) for every stored reading, added to the store when it opens
+# (vitals_stream's broker)
+store_listeners = []
+
+
+@services.register("notifier")
+def open_notifier():
+    """Sends anomaly alerts by SMS from its own thread"""
+    return AlertNotifier(ALERT_SMS_RECIPIENTS, provider=ALERT_SMS_PROVIDER)
+
+
+@services.register("detector")
+def open_detector():
+    """Scores each stored sample against the patient's recent baseline"""
+    return AnomalyDetector(on_alert=services.get("notifier"))
+
+
+@services.register("store", close=lambda store: store.flush())
+def open_store():
+    """VitalsStore over VITALS_DATA_DIR, scoring every sample for anomalies"""
+    store = VitalsStore(VITALS_DATA_DIR)
+    store.add_sample_listener(services.get("detector").observe)
+    for callback in store_listeners:
+        store.add_listener(callback)
+    return store
+
+
+def vitals_store():
+    return services.get("store")
+
+
+atexit.register(services.close)
+
+
+def simulated_reading(patient_id):
+    return {
+        "patient_id": patient_id,
+        "timestamp": time.time(),
         "heart_rate": random.randint(65, 100),
         "blood_pressure": f"{random.randint(100, 120)}/{random.randint(60, 80)}",
         "temperature": round(random.uniform(97.0, 99.5), 1),
         "spo2": random.randint(95, 100),
         "respiration_rate": random.randint(12, 20),
-        "timestamp": int(time.time())
     }
-    return jsonify(vitals)
+
+
+def background_maintenance():
+    last_flush = time.time()
+    while True:
+        time.sleep(1)
+        if VITALS_SIMULATE:
+            vitals_store().ingest(simulated_reading(DEFAULT_PATIENT_ID))
+        if time.time() - last_flush >= VITALS_FLUSH_SECONDS:
+            vitals_store().flush()
+            last_flush = time.time()
+
+
+_maintenance_started = threading.Event()
+_maintenance_lock = threading.Lock()
+
+
+def start_maintenance():
+    """Start the simulator/flush thread once per process."""
+    with _maintenance_lock:
+        if _maintenance_started.is_set():
+            return
+        _maintenance_started.set()
+    # Opened here, before the first request needs it
+    store = vitals_store()
+    if VITALS_SIMULATE:
+        store.ingest(simulated_reading(DEFAULT_PATIENT_ID))
+    threading.Thread(target=background_maintenance, daemon=True, name="vitals-maintenance").start()
+
+
+# Started on the first request rather than at import, so the debug reloader's
+# parent process doesn't write to the same files as the serving process
+app.before_request(start_maintenance)
+
+
+def format_number(value):
+    return int(value) if float(value).is_integer() else round(value, 1)
+
+
+def vitals_snapshot(patient_id):
+    """Latest value per metric in the /api/vitals response shape, or None if there are no readings."""
+    latest = vitals_store().latest(patient_id)
+    if not latest:
+        return None
+    vitals = {metric: format_number(value) for metric, (_, value) in latest.items()
+              if metric not in ("systolic", "diastolic")}
+    if "systolic" in latest and "diastolic" in latest:
+        vitals["blood_pressure"] = f"{format_number(latest['systolic'][1])}/{format_number(latest['diastolic'][1])}"
+    vitals["timestamp"] = int(max(timestamp for timestamp, _ in latest.values()))
+    return vitals
+
+
+@app.route("/api/vitals", methods=["GET"])
+def get_vitals():
+    """Latest reading per metric for ?patient_id= (the default patient if omitted)."""
+    vitals = vitals_snapshot(request.args.get("patient_id", DEFAULT_PATIENT_ID))
+    # No readings yet is an empty reading, not an error: the dashboard polls this before any arrive
+    return jsonify(vitals or {}), 200
+
+
+@app.route("/api/vitals", methods=["POST"])
+def post_vitals():
+    """
+    Store one device reading:
+    {"patient_id", "timestamp" (optional, epoch seconds), "heart_rate", "blood_pressure": "120/80", ...}
+    """
+    try:
+        vitals_store().ingest(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"status": "stored"}), 201
+
+
+@app.route("/api/vitals/bulk", methods=["POST"])
+def post_vitals_bulk():
+    """Store many readings: a JSON array, or NDJSON with one reading per line."""
+    try:
+        if request.mimetype == "application/x-ndjson":
+            readings = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        else:
+            readings = request.get_json()
+        if not isinstance(readings, list):
+            return jsonify({"error": "Expected a list of readings"}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid JSON: {e}"}), 400
+    return jsonify(vitals_store().ingest_many(readings)), 200
+
+
+@app.route("/api/vitals/range", methods=["GET"])
+def get_vitals_range():
+    """
+    Samples of one metric for charts: ?patient_id=&metric=heart_rate&start=&end=
+    (epoch seconds, both optional). At most the newest 10000 points are returned.
+    """
+    patient_id = request.args.get("patient_id", DEFAULT_PATIENT_ID)
+    metric = request.args.get("metric", "heart_rate")
+    if metric not in METRICS:
+        return jsonify({"error": f"metric must be one of {', '.join(METRICS)}"}), 400
+    start = request.args.get("start", type=float)
+    end = request.args.get("end", type=float)
+    timestamps, values = vitals_store().range(patient_id, metric, start, end)
+    truncated = len(timestamps) > MAX_RANGE_POINTS
+    return jsonify({
+        "patient_id": patient_id,
+        "metric": metric,
+        "timestamps": timestamps[-MAX_RANGE_POINTS:].tolist(),
+        "values": values[-MAX_RANGE_POINTS:].tolist(),
+        "truncated": truncated,
+    })
+
+
+def series_args():
+    """(patient_id, metric, error response) from the query string."""
+    patient_id = request.args.get("patient_id", DEFAULT_PATIENT_ID)
+    metric = request.args.get("metric", "heart_rate")
+    if metric not in METRICS:
+        return patient_id, metric, (jsonify({"error": f"metric must be one of {', '.join(METRICS)}"}), 400)
+    return patient_id, metric, None
+
+
+def nan_to_none(values):
+    return [None if value != value else value for value in values.tolist()]
+
+
+@app.route("/api/vitals/history", methods=["GET"])
+def get_vitals_history():
+    """
+    Chart-ready series: ?patient_id=&metric=&start=&end=&points=500. Spans over
+    two days come from hourly rollups; either way the result is reduced to at
+    most `points` with LTTB.
+    """
+    patient_id, metric, error = series_args()
+    if error: return error
+    end = request.args.get("end", time.time(), type=float)
+    start = request.args.get("start", end - 86400, type=float)
+    # LTTB needs at least 3 points and returns the whole series below that
+    points = max(3, min(request.args.get("points", 500, type=int), MAX_RANGE_POINTS))
+    timestamps, values, source = history(vitals_store(), patient_id, metric, start, end, points)
+    return jsonify({
+        "patient_id": patient_id,
+        "metric": metric,
+        "source": source,
+        "timestamps": timestamps.tolist(),
+        "values": values.tolist(),
+    })
+
+
+@app.route("/api/vitals/aggregate", methods=["GET"])
+def get_vitals_aggregate():
+    """
+    Per-window count/min/max/mean/p50/p95: ?patient_id=&metric=&window=1m|1h|1d&start=&end=
+    Percentiles are null where the raw samples are no longer (or too many to be) available.
+    Rollup rows at either edge count only samples in [start, end] while their raw
+    samples are kept; older edge rows cover their whole window.
+    """
+    patient_id, metric, error = series_args()
+    if error: return error
+    window = request.args.get("window", "1h")
+    if window not in WINDOWS:
+        return jsonify({"error": f"window must be one of {', '.join(WINDOWS)}"}), 400
+    end = request.args.get("end", time.time(), type=float)
+    start = request.args.get("start", end - 86400, type=float)
+    stats, source = aggregate(vitals_store(), patient_id, metric, window, start, end)
+    return jsonify({
+        "patient_id": patient_id,
+        "metric": metric,
+        "window": window,
+        "source": source,
+        **{name: nan_to_none(column) for name, column in stats.items()},
+    })
+
+
+@app.route("/api/vitals/stats", methods=["GET"])
+def get_vitals_stats():
+    return jsonify(vitals_store().stats())
+
+
+@app.route("/api/vitals/alerts", methods=["GET"])
+def get_vitals_alerts():
+    patient_id = request.args.get("patient_id")
+    detector = services.get("detector")
+    alerts = [alert._asdict() for alert in detector.recent if patient_id is None or alert.patient_id == patient_id]
+    return jsonify({
+        "alerts": alerts[::-1],
+        "detector": detector.stats(),
+        "notifier": services.get("notifier").stats(),
+    })
+
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,237 @@
+# careconnect/backend/health/vitals_stream.py
+"""
+Server-Sent Events for vitals: GET /api/vitals/stream?patient_id=... pushes a
+"vitals" event (same JSON as GET /api/vitals) whenever a new reading for that
+patient is stored, instead of the dashboard polling every 5 seconds.
+
+VitalsBroker fans each patient's updates out to that patient's subscribers on
+one asyncio loop. Every subscriber holds a single pending slot: a new update
+replaces one the client has not received yet, so a slow connection gets the
+newest reading rather than a growing backlog, and never delays the others.
+Idle connections cost one coroutine each, not a thread.
+
+This module is an ASGI app that serves the stream itself and hands every other
+path to the Flask app in vitals.py, so ingestion and streaming share one store:
+
+    uvicorn vitals_stream:app --port 5000
+
+(`python vitals.py` still serves the polling API without the stream.)
+"""
+
+import asyncio
+import json
+import os
+import threading
+from urllib.parse import parse_qs
+
+from vitals import (DEFAULT_PATIENT_ID, app as flask_app, services, start_maintenance, store_listeners,
+                    vitals_snapshot, vitals_store)
+
+HEARTBEAT_SECONDS = float(os.environ.get("VITALS_STREAM_HEARTBEAT", "15"))
+MAX_SUBSCRIBERS = int(os.environ.get("VITALS_STREAM_MAX_SUBSCRIBERS", "10000"))
+
+# Served here rather than by flask_app
+ASGI_PATHS = ("/api/vitals/stream", "/api/vitals/stream/stats")
+
+
+class Subscriber:
+    """One connection's pending update; publishing overwrites it (coalescing)."""
+
+    def __init__(self, patient_id):
+        self.patient_id = patient_id
+        self.pending = None
+        self.closed = False
+        self.ready = asyncio.Event()
+        self.coalesced = 0
+
+    def offer(self, payload):
+        if self.pending is not None:
+            self.coalesced += 1
+        self.pending = payload
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    def take(self):
+        payload, self.pending = self.pending, None
+        self.ready.clear()
+        return payload
+
+
+class VitalsBroker:
+    """
+    Per-patient fan-out of vitals snapshots.
+
+    publish() may be called from any thread (Flask ingest handlers); delivery
+    happens on the broker's event loop, once per update however many
+    subscribers are watching.
+    """
+
+    def __init__(self, snapshot=vitals_snapshot, max_subscribers=MAX_SUBSCRIBERS):
+        self.snapshot = snapshot
+        self.max_subscribers = max_subscribers
+        self.loop = None
+        self._subscribers = {}
+        self._count = 0
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+
+    def attach(self, loop):
+        self.loop = loop
+
+    def subscribe(self, patient_id):
+        if self._count >= self.max_subscribers:
+            return None
+        subscriber = Subscriber(patient_id)
+        self._subscribers.setdefault(patient_id, set()).add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        watchers = self._subscribers.get(subscriber.patient_id)
+        if watchers and subscriber in watchers:
+            watchers.discard(subscriber)
+            self._count -= 1
+            self.coalesced += subscriber.coalesced
+            if not watchers:
+                del self._subscribers[subscriber.patient_id]
+
+    def publish(self, patient_id):
+        """Thread-safe: schedule a fan-out of the patient's latest vitals."""
+        if self.loop is None or patient_id not in self._subscribers:
+            return
+        with self._lock:
+            # Several readings before the loop gets to it still mean one fan-out
+            if patient_id in self._scheduled:
+                return
+            self._scheduled.add(patient_id)
+        self.loop.call_soon_threadsafe(self._fan_out, patient_id)
+
+    def _fan_out(self, patient_id):
+        with self._lock:
+            self._scheduled.discard(patient_id)
+        watchers = self._subscribers.get(patient_id)
+        if not watchers:
+            return
+        snapshot = self.snapshot(patient_id)
+        if snapshot is None:
+            return
+        # Encoded once, shared by every subscriber
+        payload = sse_event(snapshot)
+        self.published += 1
+        for subscriber in watchers:
+            subscriber.offer(payload)
+        self.delivered += len(watchers)
+
+    def stats(self):
+        return {
+            "subscribers": self._count,
+            "patients_watched": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced + sum(s.coalesced for watchers in self._subscribers.values() for s in watchers),
+        }
+
+
+broker = VitalsBroker()
+store_listeners.append(broker.publish)
+
+
+def sse_event(payload, event="vitals"):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+async def stream_vitals(scope, receive, send):
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    patient_id = query.get("patient_id", [DEFAULT_PATIENT_ID])[0]
+
+    subscriber = broker.subscribe(patient_id)
+    if subscriber is None:
+        await send({"type": "http.response.start", "status": 503,
+                    "headers": [(b"content-type", b"application/json"), (b"retry-after", b"5")]})
+        await send({"type": "http.response.body", "body": b'{"error": "Too many subscribers"}'})
+        return
+
+    async def wait_for_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        subscriber.close()
+
+    loop = asyncio.get_running_loop()
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"access-control-allow-origin", b"*"),
+            (b"x-accel-buffering", b"no"),
+        ]})
+        # Current values first, so the page doesn't wait for the next reading
+        current = broker.snapshot(patient_id)
+        await send({"type": "http.response.body", "body": sse_event(current) if current else b": waiting\n\n",
+                    "more_body": True})
+
+        while True:
+            # One event to wait on (update, disconnect or heartbeat), no task per iteration
+            heartbeat = loop.call_later(HEARTBEAT_SECONDS, subscriber.ready.set)
+            await subscriber.ready.wait()
+            heartbeat.cancel()
+            if subscriber.closed:
+                break
+            # No pending update means the heartbeat fired: a comment line keeps
+            # proxies from closing an idle connection
+            body = subscriber.take() or b": keep-alive\n\n"
+            # send() waits for the transport to drain: a slow client only holds up its own coroutine
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        broker.unsubscribe(subscriber)
+        disconnected.cancel()
+
+
+async def send_json(send, payload, status=200):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"access-control-allow-origin", b"*")]})
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode("utf-8")})
+
+
+def _wsgi_fallback():
+    try:
+        from asgiref.wsgi import WsgiToAsgi
+    except ImportError:
+        return None
+    return WsgiToAsgi(flask_app)
+
+
+_flask_asgi = _wsgi_fallback()
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                broker.attach(asyncio.get_running_loop())
+                start_maintenance()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                services.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+    if broker.loop is None:
+        broker.attach(asyncio.get_running_loop())
+    if scope["path"] == "/api/vitals/stream":
+        await stream_vitals(scope, receive, send)
+    elif scope["path"] == "/api/vitals/stream/stats":
+        await send_json(send, broker.stats())
+    elif _flask_asgi is not None:
+        await _flask_asgi(scope, receive, send)
+    else:
+        await send_json(send, {"error": "Install asgiref to serve the REST API from this app"}, status=501)
@@ -1,124 +1,227 @@
 import os
+import sys
 import json
-import boto3
-import firebase_admin
-from firebase_admin import credentials, firestore
-from flask import Flask, request, jsonify, make_response
+import datetime
+import functools
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS
-from weasyprint import HTML # <--- NEW IMPORT
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.bedrock_gateway import get_gateway
+from shared.services import ServiceRegistry
+from simplifier import ReportSimplifier, SimplificationStore
+from translation_memory import TranslationMemory
+from pdf_cache import PdfCache, fields_key, report_fields
+from report_listing import decode_cursor, iter_reports_page, list_reports_page, parse_fields, parse_limit
+from report_cache import ReportCache
+from bulk_ingest import BulkIngestor
+from batch_processing import collect_batch_job, iterate_sync, process_batch, submit_batch_job, validate_batch
+from report_indexer import REPORT_INDEXER, ReportIndexer
 
 # --- INITIALIZATION ---
 app = Flask(__name__)
 CORS(app) 
 
-# Initialize Firebase
-try:
-    cred = credentials.Certificate('serviceAccountKey.json')
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-except Exception as e:
-    print(f"ERROR: Could not initialize Firebase. Details: {e}")
-    db = None
+# Firebase, the vector index, the SQLite caches and their SDKs are created on
+# first use (and warmed in the background unless REPORTS_WARM_START=0), so
+# importing the API is fast, makes no network calls and writes no files
+REPORTS_WARM_START = os.environ.get("REPORTS_WARM_START", "1")
+services = ServiceRegistry()
+
+# Shared, pooled AWS clients (Bedrock + Translate)
+gateway = get_gateway()
+
+# In-memory mirror of the reports collection, kept current by change events
+# (set REPORT_CACHE=0 to always read Firestore)
+report_cache = ReportCache()
+
+
+@services.register("simplifier")
+def open_simplifier():
+    """ReportSimplifier with its translation memory and simplification store (SQLite files)"""
+    return ReportSimplifier(gateway, translation_memory=TranslationMemory(gateway), store=SimplificationStore())
+
+
+@services.register("pdf_cache", close=lambda cache: cache.close())
+def open_pdf_cache():
+    """Rendered PDFs by content hash (creates the cache directory); WeasyPrint runs in worker processes"""
+    return PdfCache()
+
+
+@services.register("report_indexer", close=lambda indexer: indexer.stop())
+def open_report_indexer():
+    """
+    Report chunks embedded into the retrieval vector index as reports are created or
+    changed (REPORT_INDEXER=1, the default with VECTOR_INDEX=pinecone)
+    """
+    from shared.embeddings import Embedder
+    from shared.vector_index import open_vector_index
+
+    indexer = ReportIndexer(Embedder(gateway), open_vector_index())
+    if REPORT_INDEXER == "1":
+        report_cache.add_listener(indexer.notify)
+        indexer.start()
+    return indexer
 
-# Initialize AWS Clients
-bedrock_runtime = boto3.client(service_name='bedrock-runtime', region_name='us-east-1') 
-translate_client = boto3.client(service_name='translate', region_name='us-east-1')
+
+@services.register("firestore")
+def open_firestore():
+    """
+    The Firestore client (CARECONNECT_FAKE_FIRESTORE=1 uses an in-memory fake
+    instead), or None if Firebase could not be initialized
+    """
+    try:
+        if os.environ.get("CARECONNECT_FAKE_FIRESTORE") == "1":
+            from fake_firestore import FakeFirestore
+            db = FakeFirestore()
+        else:
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            cred = credentials.Certificate('serviceAccountKey.json')
+            firebase_admin.initialize_app(cred)
+            db = firestore.client()
+    except Exception as e:
+        print(f"ERROR: Could not initialize Firebase. Details: {e}")
+        return None
+    if os.environ.get("REPORT_CACHE", "1") == "1":
+        if REPORT_INDEXER == "1":
+            # The indexer has to be listening before the cache loads the collection
+            services.get("report_indexer")
+        report_cache.start(db)
+    return db
+
+
+def get_db():
+    return services.get("firestore")
+
+
+if REPORTS_WARM_START == "1":
+    services.warm((["report_indexer"] if REPORT_INDEXER == "1" else []) + ["firestore", "simplifier", "pdf_cache"])
 
 # --- API ENDPOINTS ---
 
 @app.route('/api/reports', methods=['GET'])
 def get_reports():
-    # This function remains the same
+    """
+    One page of reports, newest first.
+
+    Query params: limit (default 50, max 500), cursor (from the previous page),
+    fields (comma-separated, default title,date,icon_name; add "content" for the
+    full text) and format=ndjson to stream one report per line.
+
+    JSON responses carry the next page's cursor in the X-Next-Cursor header (absent
+    on the last page); NDJSON streams end with a {"next_cursor": ...} line.
+    """
+    db = get_db()
     if not db: return jsonify({"error": "Database not initialized"}), 500
     try:
-        reports_ref = db.collection('reports').order_by('date', direction=firestore.Query.DESCENDING)
-        reports = []
-        for doc in reports_ref.stream():
-            report_data = doc.to_dict()
-            report_data['id'] = doc.id
-            if 'date' in report_data and hasattr(report_data['date'], 'strftime'):
-                 report_data['date'] = report_data['date'].strftime('%B %d, %Y')
-            reports.append(report_data)
-        return jsonify(reports), 200
+        limit = parse_limit(request.args.get('limit'))
+        fields = parse_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        if cursor: decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # Served from the in-memory mirror once its first snapshot has loaded
+        if report_cache.ready:
+            iter_page, list_page = report_cache.iter_page, report_cache.list_page
+        else:
+            iter_page, list_page = functools.partial(iter_reports_page, db), functools.partial(list_reports_page, db)
+
+        if request.args.get('format') == 'ndjson':
+            def lines():
+                state = {}
+                for report in iter_page(limit, cursor, fields, state):
+                    yield json.dumps(report) + "\n"
+                yield json.dumps({"next_cursor": state["next_cursor"]}) + "\n"
+            return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+        reports, next_cursor = list_page(limit, cursor, fields)
+        response = jsonify(reports)
+        if next_cursor: response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
     except Exception as e: return jsonify({"error": f"Failed to fetch reports: {e}"}), 500
 
 @app.route('/api/reports', methods=['POST'])
 def create_report():
-    # This function remains the same
+    db = get_db()
     if not db: return jsonify({"error": "Database not initialized"}), 500
     try:
         data = request.get_json()
+        # Client timestamp instead of SERVER_TIMESTAMP: the response and the cache
+        # need the stored value, and reading it back would cost another round trip
         new_report_data = {
             "icon_name": "LineChart", "title": data.get('title'),
-            "date": firestore.SERVER_TIMESTAMP,
+            "date": datetime.datetime.now(datetime.timezone.utc),
             "content": {"diagnosis": data.get('diagnosis'), "recommendations": data.get('recommendations')}
         }
-        update_time, doc_ref = db.collection('reports').add(new_report_data)
-        created_doc = doc_ref.get().to_dict()
-        created_doc['id'] = doc_ref.id
+        # Optional, used to filter retrieval to one patient or doctor
+        new_report_data.update((field, data[field]) for field in ('patient', 'doctor') if data.get(field))
+        doc_ref = db.collection('reports').document()
+        doc_ref.set(new_report_data)
+        report_cache.put(doc_ref.id, new_report_data)
+        created_doc = dict(new_report_data, id=doc_ref.id)
         created_doc['date'] = created_doc['date'].strftime('%B %d, %Y')
+        # Render the PDF now so the first download is already a cache hit
+        services.get("pdf_cache").prerender(report_fields(created_doc, created_doc['date']))
         return jsonify(created_doc), 201
     except Exception as e: return jsonify({"error": f"Failed to create report: {e}"}), 500
 
 
+@app.route('/api/reports/bulk', methods=['POST'])
+def bulk_create_reports():
+    """
+    Imports a JSON Lines request body of reports (see bulk_ingest.py for the
+    record format) in batched writes. Streams NDJSON progress lines, ending with
+    a summary that lists rejected lines. Records with the same idempotency_key
+    map to the same document, so a failed import can simply be re-sent.
+    """
+    db = get_db()
+    if not db: return jsonify({"error": "Database not initialized"}), 500
+
+    def write_through(rows):
+        for doc_id, data in rows:
+            report_cache.put(doc_id, data)
+
+    ingestor = BulkIngestor(db, on_commit=write_through)
+    progress_every = request.args.get('progress_every', 5000, type=int)
+    lines = (json.dumps(update) + "\n" for update in ingestor.run(request.stream, progress_every))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+
 # --- NEW PDF DOWNLOAD ENDPOINT ---
 @app.route('/api/reports/<report_id>/pdf', methods=['GET'])
 def download_report_pdf(report_id):
     """
-    Generates a PDF for a specific report and sends it for download.
+    Sends the PDF for a specific report, from the content-addressed cache when
+    possible. Supports If-None-Match with the returned ETag.
     """
+    db = get_db()
     if not db: return jsonify({"error": "Database not initialized"}), 500
     try:
-        # 1. Fetch the specific report from Firestore
-        doc = db.collection('reports').document(report_id).get()
-        if not doc.exists:
-            return jsonify({"error": "Report not found"}), 404
-        report_data = doc.to_dict()
+        # 1. Look the report up in the cache, falling back to Firestore
+        report_data = report_cache.get(report_id)
+        if report_data is None:
+            doc = db.collection('reports').document(report_id).get()
+            if not doc.exists:
+                return jsonify({"error": "Report not found"}), 404
+            report_data = doc.to_dict()
         report_date = report_data.get('date')
         if hasattr(report_date, 'strftime'):
             report_date = report_date.strftime('%B %d, %Y')
 
-        # 2. Create a styled HTML template for the PDF
-        html_template = f"""
-        <html>
-            <head>
-                <style>
-                    body {{ font-family: sans-serif; color: #333; }}
-                    .header {{ text-align: center; border-bottom: 2px solid #0d9488; padding-bottom: 10px; }}
-                    .header h1 {{ color: #0d9488; margin: 0; }}
-                    .report-title {{ margin-top: 30px; }}
-                    .section {{ margin-top: 25px; }}
-                    .section h3 {{ background-color: #f0fdfa; color: #064e3b; padding: 10px; border-left: 4px solid #10b981; }}
-                    .content {{ padding: 5px 10px; white-space: pre-wrap; line-height: 1.6; }}
-                    .footer {{ position: fixed; bottom: 0; width: 100%; text-align: center; font-size: 12px; color: #999; }}
-                </style>
-            </head>
-            <body>
-                <div class="header"><h1>CareConnect Health Report</h1></div>
-                <div class="report-title">
-                    <h2>{report_data.get('title', 'N/A')}</h2>
-                    <p>Generated on: {report_date}</p>
-                </div>
-                <div class="section">
-                    <h3>Official Diagnosis</h3>
-                    <div class="content">{report_data.get('content', {}).get('diagnosis', 'Not provided.')}</div>
-                </div>
-                <div class="section">
-                    <h3>Doctor's Recommendations</h3>
-                    <div class="content">{report_data.get('content', {}).get('recommendations', 'Not provided.')}</div>
-                </div>
-                <div class="footer">This is an official patient record from CareConnect.</div>
-            </body>
-        </html>
-        """
-
-        # 3. Generate the PDF in memory using WeasyPrint
-        pdf_bytes = HTML(string=html_template).write_pdf()
-
-        # 4. Create a Flask response to send the file
+        # 2. Serve the cached PDF for this exact content, rendering it only if needed
+        fields = report_fields(report_data, report_date)
+        etag = fields_key(fields)
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        etag, pdf_bytes = services.get("pdf_cache").get(fields)
+
+        # 3. Create a Flask response to send the file
         response = make_response(pdf_bytes)
         response.headers['Content-Type'] = 'application/pdf'
         response.headers['Content-Disposition'] = f'attachment; filename="Report-{report_id}.pdf"'
+        response.set_etag(etag)
         return response
     except Exception as e:
         print(f"Error generating PDF: {e}")
@@ -127,26 +230,83 @@ def download_report_pdf(report_id):
 
 @app.route('/api/process-text', methods=['POST'])
 def process_text():
-    # This AI processing logic remains the same
-    # ... (code for this function is unchanged) ...
+    # Static instructions go in a cacheable system block; repeat texts come from the memo
     try:
         data = request.get_json()
         text_to_process = data.get('text')
         target_language_code = data.get('language', 'en')
-        prompt = f"Human: You are a medical assistant. Explain the following text to a patient in simple, clear language. <text>{text_to_process}</text> Assistant:"
-        body = json.dumps({"anthropic_version": "bedrock-2023-05-31", "max_tokens": 1000, "messages": [{"role": "user", "content": prompt}]})
-        response = bedrock_runtime.invoke_model(body=body, modelId='anthropic.claude-3-sonnet-20240229-v1:0', accept='application/json', contentType='application/json')
-        response_body = json.loads(response.get('body').read())
-        simplified_text = response_body['content'][0]['text']
-        translated_text = simplified_text
-        if target_language_code != 'en':
-            translation_response = translate_client.translate_text(Text=simplified_text, SourceLanguageCode='en', TargetLanguageCode=target_language_code)
-            translated_text = translation_response.get('TranslatedText')
-        return jsonify({"simplifiedText": simplified_text, "translatedText": translated_text})
+        if not text_to_process: return jsonify({"error": "Text is required"}), 400
+        return jsonify(services.get("simplifier").process_sync(text_to_process, target_language_code))
     except Exception as e:
         print(f"Error processing text: {e}")
         return jsonify({"error": "AI processing failed"}), 500
 
+
+@app.route('/api/process-text/batch', methods=['POST'])
+def process_text_batch():
+    """
+    Simplifies N reports into M languages. Results stream back as NDJSON lines in
+    completion order; with "mode": "batch_job" the simplification is submitted as
+    a Bedrock batch inference job instead.
+    """
+    try:
+        data = request.get_json(silent=True)
+        reports, languages, error = validate_batch(data)
+        if error: return jsonify({"error": error}), 400
+
+        simplifier = services.get("simplifier")
+        if data.get('mode') == 'batch_job':
+            return jsonify(submit_batch_job(gateway, simplifier, reports)), 202
+
+        lines = (json.dumps(result) + "\n" for result in iterate_sync(gateway, process_batch(simplifier, reports, languages)))
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    except Exception as e:
+        print(f"Error processing batch: {e}")
+        return jsonify({"error": "Batch processing failed"}), 500
+
+
+@app.route('/api/process-text/batch-jobs', methods=['GET'])
+def batch_job_status():
+    """
+    Checks a batch inference job (?job_arn=...) and, once it has completed, loads
+    its simplifications so later /api/process-text calls are served from memory.
+    """
+    job_arn = request.args.get('job_arn')
+    if not job_arn: return jsonify({"error": "job_arn is required"}), 400
+    try:
+        return jsonify(collect_batch_job(gateway, services.get("simplifier"), job_arn)), 200
+    except Exception as e:
+        print(f"Error collecting batch job: {e}")
+        return jsonify({"error": "Failed to read batch job"}), 500
+
+
+@app.route('/api/reports/cache-stats', methods=['GET'])
+def report_cache_stats():
+    return jsonify(report_cache.stats()), 200
+
+
+@app.route('/api/reports/index-stats', methods=['GET'])
+def report_index_stats():
+    # Building the indexer would load the embedder and open the vector index just to report on it
+    if REPORT_INDEXER != "1":
+        return jsonify({"status": "disabled"}), 200
+    return jsonify(services.get("report_indexer").stats()), 200
+
+
+@app.route('/api/reports/services', methods=['GET'])
+def report_services():
+    return jsonify(services.stats()), 200
+
+
+@app.route('/api/reports/pdf-cache/stats', methods=['GET'])
+def pdf_cache_stats():
+    return jsonify(services.get("pdf_cache").stats()), 200
+
+
+@app.route('/api/process-text/stats', methods=['GET'])
+def process_text_stats():
+    return jsonify(services.get("simplifier").stats()), 200
+
 # Run the Flask App
 if __name__ == '__main__':
     app.run(port=5002, debug=True)
\ No newline at end of file
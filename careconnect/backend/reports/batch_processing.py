@@ -0,0 +1,223 @@
+# careconnect/backend/reports/batch_processing.py
+"""
+Batch simplification + translation of many reports into many languages.
+
+process_batch() takes N reports x M languages, simplifies each distinct text once,
+fans the translations out with bounded concurrency and yields every
+(report, language) result as soon as it is ready, so the HTTP layer can stream
+them back as NDJSON.
+
+For large overnight backfills, submit_batch_job() hands the simplification step
+to a Bedrock batch inference job instead (input/output in S3, priced below
+on-demand), and collect_batch_job() writes its output to the simplifier's
+durable store (and the memo) so the later translate step never calls the model
+again, even after a restart.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import time
+import uuid
+
+from simplifier import text_key
+
+TRANSLATE_CONCURRENCY = int(os.environ.get("BATCH_TRANSLATE_CONCURRENCY", "8"))
+MAX_BATCH_REPORTS = int(os.environ.get("BATCH_MAX_REPORTS", "500"))
+MAX_BATCH_LANGUAGES = int(os.environ.get("BATCH_MAX_LANGUAGES", "20"))
+# Language codes like "es" or "zh-TW"
+MAX_LANGUAGE_CODE_LENGTH = 10
+
+# Bedrock batch inference job settings
+BATCH_S3_BUCKET = os.environ.get("BATCH_S3_BUCKET")
+BATCH_ROLE_ARN = os.environ.get("BATCH_ROLE_ARN")
+
+_DONE = object()
+
+
+async def process_batch(simplifier, reports, languages, translate_concurrency=TRANSLATE_CONCURRENCY):
+    """
+    Simplify and translate reports, yielding results in completion order.
+
+    Args:
+        simplifier (ReportSimplifier): shared simplifier (its memo dedupes across calls)
+        reports (list): dicts with "id" and "text"
+        languages (list): target language codes, "en" means simplification only
+
+    Yields:
+        dict: {"id", "language", "simplifiedText", "translatedText"} or {"id", "language", "error"}
+    """
+    # Identical texts (e.g. the same standard report for several patients) are simplified once
+    groups = {}
+    for report in reports:
+        groups.setdefault(text_key(report["text"]), (report["text"], []))[1].append(report["id"])
+
+    results = asyncio.Queue()
+    translate_slots = asyncio.Semaphore(translate_concurrency)
+
+    async def translate_one(text, report_ids, language):
+        async with translate_slots:
+            try:
+                # The simplification is already memoized, so this only translates
+                result = await simplifier.process(text, language)
+                payload = {"simplifiedText": result["simplifiedText"], "translatedText": result["translatedText"]}
+            except Exception as e:
+                payload = {"error": f"Translation failed: {e}"}
+        for report_id in report_ids:
+            await results.put({"id": report_id, "language": language, **payload})
+
+    async def handle_text(text, report_ids):
+        try:
+            await simplifier.simplify(text)
+        except Exception as e:
+            for report_id in report_ids:
+                for language in languages:
+                    await results.put({"id": report_id, "language": language, "error": f"Simplification failed: {e}"})
+            return
+        await asyncio.gather(*(translate_one(text, report_ids, language) for language in languages))
+
+    tasks = [asyncio.ensure_future(handle_text(text, ids)) for text, ids in groups.values()]
+    try:
+        for _ in range(len(reports) * len(languages)):
+            yield await results.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def iterate_sync(gateway, async_iterable):
+    """
+    Consume an async iterator on the gateway loop from synchronous code (a Flask
+    streaming response), yielding its items as they arrive.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in async_iterable:
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+        finally:
+            items.put(_DONE)
+
+    future = gateway.submit(pump())
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Client went away: stop the batch instead of finishing work nobody reads
+        future.cancel()
+
+
+def validate_batch(data):
+    """
+    Args:
+        data: the parsed request body, anything JSON can hold (None if it was not JSON)
+
+    Returns:
+        tuple: (reports, languages, error message or None)
+    """
+    if not isinstance(data, dict):
+        return None, None, "Expected a JSON object with reports and languages"
+    reports = data.get('reports')
+    languages = data.get('languages')
+    if languages is None:
+        languages = ['en']
+    if not isinstance(reports, list) or not reports:
+        return None, None, "reports must be a non-empty list"
+    if len(reports) > MAX_BATCH_REPORTS:
+        return None, None, f"At most {MAX_BATCH_REPORTS} reports per batch"
+    for index, report in enumerate(reports):
+        if not isinstance(report, dict) or not report.get('text') or not isinstance(report['text'], str):
+            return None, None, f"reports[{index}] needs a text"
+    # A string would be iterated one letter at a time: "es" is not ["e", "s"]
+    if not isinstance(languages, list) or not languages:
+        return None, None, "languages must be a non-empty list of language codes"
+    if len(languages) > MAX_BATCH_LANGUAGES:
+        return None, None, f"At most {MAX_BATCH_LANGUAGES} languages per batch"
+    for index, language in enumerate(languages):
+        if not isinstance(language, str) or not 0 < len(language) <= MAX_LANGUAGE_CODE_LENGTH:
+            return None, None, f"languages[{index}] must be a language code such as \"es\""
+    normalized = [{"id": report.get('id', index), "text": report['text']} for index, report in enumerate(reports)]
+    return normalized, list(dict.fromkeys(languages)), None
+
+
+def submit_batch_job(gateway, simplifier, reports):
+    """
+    Start a Bedrock batch inference job that simplifies every distinct text.
+
+    Bedrock requires a minimum number of records per job (100 at the time of
+    writing); use the streaming batch endpoint for smaller batches.
+
+    Returns:
+        dict: job ARN and the S3 locations used
+    """
+    if not BATCH_S3_BUCKET or not BATCH_ROLE_ARN:
+        raise RuntimeError("BATCH_S3_BUCKET and BATCH_ROLE_ARN must be set for batch jobs")
+
+    job_name = f"careconnect-simplify-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    # Record ids are the simplifier's keys, so collect_batch_job() can store the outputs under them
+    records = {simplifier.simplification_key(report["text"]): report["text"] for report in reports}
+    body = "\n".join(
+        json.dumps({"recordId": key, "modelInput": simplifier.build_request(text)})
+        for key, text in records.items()
+    )
+    input_key = f"batch-input/{job_name}.jsonl"
+    gateway.call_sync("s3", "put_object", Bucket=BATCH_S3_BUCKET, Key=input_key, Body=body.encode("utf-8"))
+
+    output_uri = f"s3://{BATCH_S3_BUCKET}/batch-output/{job_name}/"
+    response = gateway.call_sync(
+        "bedrock", "create_model_invocation_job",
+        jobName=job_name,
+        roleArn=BATCH_ROLE_ARN,
+        modelId=simplifier.model_id,
+        inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{BATCH_S3_BUCKET}/{input_key}"}},
+        outputDataConfig={"s3OutputDataConfig": {"s3Uri": output_uri}},
+    )
+    return {"jobArn": response["jobArn"], "records": len(records), "outputUri": output_uri}
+
+
+def collect_batch_job(gateway, simplifier, job_arn):
+    """
+    Load a finished job's output into the simplifier's store and memo.
+
+    Without a store only the memo is seeded, and entries beyond its size are
+    evicted before they are used, so attach one for real backfills.
+
+    Returns:
+        dict: job status and how many simplifications were loaded
+    """
+    job = gateway.call_sync("bedrock", "get_model_invocation_job", jobIdentifier=job_arn)
+    status = job["status"]
+    if status != "Completed":
+        return {"jobArn": job_arn, "status": status, "loaded": 0}
+
+    output_uri = job["outputDataConfig"]["s3OutputDataConfig"]["s3Uri"]
+    bucket, _, prefix = output_uri[len("s3://"):].partition("/")
+    listing = gateway.call_sync("s3", "list_objects_v2", Bucket=bucket, Prefix=prefix)
+    loaded = 0
+    for obj in listing.get("Contents", []):
+        if not obj["Key"].endswith(".jsonl.out"):
+            continue
+        body = gateway.call_sync("s3", "get_object", Bucket=bucket, Key=obj["Key"],
+                                 read_response=lambda response: response["Body"].read().decode("utf-8"))
+        outputs = {}
+        for line in body.splitlines():
+            record = json.loads(line)
+            output = record.get("modelOutput")
+            if output and output.get("content"):
+                outputs[record["recordId"]] = output["content"][0]["text"]
+        if simplifier.store is not None:
+            # One transaction per output file; the memo only keeps the most recent of them
+            simplifier.store.put_many(outputs, simplifier.model_id)
+        for key, simplified in outputs.items():
+            simplifier.simplified.put(key, simplified)
+        loaded += len(outputs)
+    return {"jobArn": job_arn, "status": status, "loaded": loaded}
@@ -0,0 +1,223 @@
+# careconnect/backend/reports/bulk_ingest.py
+"""
+Bulk import of historical reports from JSON Lines.
+
+Each line is one report:
+
+    {"idempotency_key": "clinic-42/rec-1001", "title": "...", "date": "2021-03-04T10:00:00Z",
+     "diagnosis": "...", "recommendations": "...", "icon_name": "LineChart",
+     "patient": "...", "doctor": "..."}
+
+patient and doctor are optional. date is required: an imported report without
+one would otherwise be stamped with the import time and sort as the newest.
+
+Lines are validated as they stream in, grouped into Firestore WriteBatches of
+up to 500 writes and committed by a bounded pool of threads, so only a few
+batches are ever held in memory. The document id is derived from the record's
+idempotency key (or, failing that, its content), and writes are set()s, so
+re-running an interrupted import resumes it without creating duplicates.
+
+Used by POST /api/reports/bulk and as a CLI:
+
+    python reports/bulk_ingest.py reports.jsonl [--concurrency 8] [--batch-size 500]
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH_WRITES = 500
+INGEST_CONCURRENCY = int(os.environ.get("BULK_INGEST_CONCURRENCY", "8"))
+# Rejected lines kept for the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def document_id(record):
+    """Deterministic Firestore id for a record, so a retried import overwrites instead of duplicating."""
+    key = record.get('idempotency_key')
+    if not key:
+        key = json.dumps([record.get(field) for field in ('title', 'date', 'diagnosis', 'recommendations')])
+    return "import-" + hashlib.sha256(str(key).encode("utf-8")).hexdigest()[:32]
+
+
+def parse_date(value):
+    date = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return date if date.tzinfo else date.replace(tzinfo=datetime.timezone.utc)
+
+
+def validate_record(record):
+    """
+    Returns:
+        tuple: (document id, Firestore data) for a valid record
+
+    Raises:
+        ValueError: with a message for the caller
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    if not record.get('title'):
+        raise ValueError("title is required")
+    for field in ('diagnosis', 'recommendations', 'patient', 'doctor'):
+        if record.get(field) is not None and not isinstance(record[field], str):
+            raise ValueError(f"{field} must be a string")
+    if not record.get('date'):
+        raise ValueError("date is required (ISO 8601)")
+    try:
+        date = parse_date(record['date'])
+    except ValueError:
+        raise ValueError(f"date is not ISO 8601: {record.get('date')!r}")
+    data = {
+        "icon_name": record.get('icon_name') or "LineChart",
+        "title": record['title'],
+        "date": date,
+        "content": {"diagnosis": record.get('diagnosis'), "recommendations": record.get('recommendations')},
+    }
+    data.update((field, record[field]) for field in ('patient', 'doctor') if record.get(field))
+    return document_id(record), data
+
+
+class BulkIngestor:
+    """
+    Validate and commit a stream of JSONL reports.
+
+    Args:
+        db: Firestore client (or FakeFirestore)
+        batch_size (int): writes per WriteBatch, at most 500
+        concurrency (int): batches committed in parallel
+        on_commit: optional callback(list of (id, data)) after each successful batch
+    """
+
+    def __init__(self, db, batch_size=MAX_BATCH_WRITES, concurrency=INGEST_CONCURRENCY,
+                 collection_name='reports', on_commit=None):
+        self.db = db
+        self.batch_size = min(batch_size, MAX_BATCH_WRITES)
+        self.concurrency = concurrency
+        self.collection = db.collection(collection_name)
+        self.on_commit = on_commit
+        self._lock = threading.Lock()
+        # Caps queued + running batches, so a fast reader can't buffer the whole file
+        self._slots = threading.BoundedSemaphore(concurrency * 2)
+        self.lines = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.committed = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+        self._started = None
+
+    def _reject(self, line_number, message):
+        with self._lock:
+            self.rejected += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"line": line_number, "error": message})
+
+    def _commit(self, rows):
+        try:
+            batch = self.db.batch()
+            for doc_id, data in rows:
+                batch.set(self.collection.document(doc_id), data)
+            batch.commit()
+            with self._lock:
+                self.committed += len(rows)
+                self.batches += 1
+            if self.on_commit:
+                self.on_commit(rows)
+        except Exception as e:
+            with self._lock:
+                self.failed += len(rows)
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({"batch_of": len(rows), "error": f"Commit failed: {e}"})
+        finally:
+            self._slots.release()
+
+    def _submit(self, executor, rows):
+        self._slots.acquire()
+        executor.submit(self._commit, rows)
+
+    def progress(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        with self._lock:
+            return {
+                "lines": self.lines,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "committed": self.committed,
+                "failed": self.failed,
+                "batches": self.batches,
+                "elapsed_s": round(elapsed, 2),
+                "per_minute": round(self.committed / elapsed * 60) if elapsed else 0,
+            }
+
+    def run(self, lines, progress_every=None):
+        """
+        Ingest an iterable of JSONL lines (str or bytes).
+
+        Yields a progress dict every progress_every input lines (if set) and
+        always a final summary with the collected errors.
+        """
+        self._started = time.perf_counter()
+        next_report = progress_every
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk-ingest") as executor:
+            for line in lines:
+                self.lines += 1
+                try:
+                    if isinstance(line, bytes):
+                        line = line.decode("utf-8")
+                    if not line.strip():
+                        continue
+                    rows.append(validate_record(json.loads(line)))
+                    self.accepted += 1
+                except UnicodeDecodeError as e:
+                    self._reject(self.lines, f"line is not valid UTF-8: {e.reason} at byte {e.start}")
+                except ValueError as e:
+                    self._reject(self.lines, str(e))
+                if len(rows) == self.batch_size:
+                    self._submit(executor, rows)
+                    rows = []
+                if next_report and self.lines >= next_report:
+                    next_report += progress_every
+                    yield self.progress()
+            if rows:
+                self._submit(executor, rows)
+        summary = self.progress()
+        summary["errors"] = self.errors
+        yield summary
+
+
+def _client(use_fake):
+    if use_fake:
+        from fake_firestore import FakeFirestore
+        return FakeFirestore()
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    firebase_admin.initialize_app(credentials.Certificate('serviceAccountKey.json'))
+    return firestore.client()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import reports from a JSONL file ('-' for stdin).")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_WRITES)
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    parser.add_argument("--progress-every", type=int, default=10000)
+    parser.add_argument("--fake", action="store_true", help="write to the in-memory fake (dry run)")
+    args = parser.parse_args(argv)
+
+    ingestor = BulkIngestor(_client(args.fake), args.batch_size, args.concurrency)
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    with source:
+        for update in ingestor.run(source, args.progress_every):
+            print(json.dumps(update), file=sys.stderr if "errors" not in update else sys.stdout)
+    return 1 if ingestor.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# careconnect/backend/reports/fake_firestore.py
+"""
+In-memory stand-in for the slice of the Firestore client the reports API uses.
+
+Supports collection().document()/add(), document get/set/update/delete,
+WriteBatch, and queries with order_by/select/start_after/limit/stream. An
+optional per-RPC latency stands in for the network round trip. Ordered queries
+are served from sorted indexes kept up to date on every write, the way
+Firestore's own indexes behave, so page queries cost O(log n + page size) and
+benchmarks measure the API rather than the fake.
+
+Set CARECONNECT_FAKE_FIRESTORE=1 and the reports API uses this instead of
+firebase_admin:
+
+    CARECONNECT_FAKE_FIRESTORE=1 python reports/api.py
+"""
+
+import bisect
+import copy
+import datetime
+import threading
+import time
+import uuid
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+DOCUMENT_ID = "__name__"
+
+
+class _ServerTimestamp:
+    def __repr__(self):
+        return "SERVER_TIMESTAMP"
+
+
+SERVER_TIMESTAMP = _ServerTimestamp()
+
+
+def _is_server_timestamp(value):
+    # Also accept the real client's sentinel, so API code can pass firestore.SERVER_TIMESTAMP
+    return value is SERVER_TIMESTAMP or type(value).__name__ == "Sentinel"
+
+
+def _resolve(data, now):
+    return {key: (now if _is_server_timestamp(value) else value) for key, value in data.items()}
+
+
+def _sort_value(value):
+    # Firestore orders null before any other value
+    return (0, 0) if value is None else (1, value)
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data, fields=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self._fields = fields
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def get(self, field):
+        return self._data.get(field) if self._data else None
+
+    def to_dict(self):
+        if self._data is None:
+            return None
+        if self._fields is None:
+            return copy.deepcopy(self._data)
+        return {key: copy.deepcopy(self._data[key]) for key in self._fields if key in self._data}
+
+
+class DocumentReference:
+    def __init__(self, collection, document_id):
+        self._collection = collection
+        self.id = document_id
+
+    def get(self):
+        self._collection._round_trip()
+        return DocumentSnapshot(self, self._collection._read(self.id))
+
+    def set(self, data, merge=False):
+        self._collection._round_trip()
+        self._collection._write(self.id, data, merge=merge)
+
+    def update(self, data):
+        self._collection._round_trip()
+        if self._collection._read(self.id) is None:
+            raise KeyError(f"No document to update: {self.id}")
+        self._collection._write(self.id, data, merge=True)
+
+    def delete(self):
+        self._collection._round_trip()
+        self._collection._delete(self.id)
+
+
+class Query:
+    def __init__(self, collection, orders=(), fields=None, cursor=None, max_results=None):
+        self._collection = collection
+        self._orders = tuple(orders)
+        self._fields = fields
+        self._cursor = cursor
+        self._limit = max_results
+
+    def _copy(self, **changes):
+        state = {"orders": self._orders, "fields": self._fields, "cursor": self._cursor, "max_results": self._limit}
+        state.update(changes)
+        return Query(self._collection, **state)
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, values):
+        """values: a DocumentSnapshot or a dict of the ordered fields ("__name__" for the id)."""
+        if isinstance(values, DocumentSnapshot):
+            data = values._data or {}
+            values = {field: (values.id if field == DOCUMENT_ID else data.get(field)) for field, _ in self._orders}
+        return self._copy(cursor=values)
+
+    def limit(self, count):
+        return self._copy(max_results=count)
+
+    def stream(self):
+        self._collection._round_trip()
+        for document_id in self._collection._query_ids(self._orders, self._cursor, self._limit):
+            data = self._collection._read(document_id)
+            if data is not None:
+                yield DocumentSnapshot(DocumentReference(self._collection, document_id), data, self._fields)
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, name, latency=0.0):
+        super().__init__(self)
+        self.id = name
+        self.latency = latency
+        self._docs = {}
+        self._indexes = {}
+        self._lock = threading.RLock()
+
+    def document(self, document_id=None):
+        return DocumentReference(self, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, data, document_id=None):
+        reference = self.document(document_id)
+        reference.set(data)
+        return datetime.datetime.now(datetime.timezone.utc), reference
+
+    # --- storage ---
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _read(self, document_id):
+        with self._lock:
+            return self._docs.get(document_id)
+
+    def _index_key(self, fields, document_id, data):
+        return tuple(_sort_value(document_id if field == DOCUMENT_ID else data.get(field)) for field in fields) \
+            + ((1, document_id),)
+
+    def _write(self, document_id, data, merge=False):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            old = self._docs.get(document_id)
+            new = dict(old) if (merge and old) else {}
+            new.update(_resolve(copy.deepcopy(data), now))
+            for fields, keys in self._indexes.items():
+                if old is not None:
+                    keys.pop(bisect.bisect_left(keys, self._index_key(fields, document_id, old)))
+                bisect.insort(keys, self._index_key(fields, document_id, new))
+            self._docs[document_id] = new
+
+    def _delete(self, document_id):
+        with self._lock:
+            old = self._docs.pop(document_id, None)
+            if old is None:
+                return
+            for fields, keys in self._indexes.items():
+                keys.pop(bisect.bisect_left(keys, self._index_key(fields, document_id, old)))
+
+    def _index(self, fields):
+        """Sorted (ascending) keys for an ordering, built on first use and maintained on writes."""
+        keys = self._indexes.get(fields)
+        if keys is None:
+            keys = sorted(self._index_key(fields, doc_id, data) for doc_id, data in self._docs.items())
+            self._indexes[fields] = keys
+        return keys
+
+    def _query_ids(self, orders, cursor, max_results):
+        fields = tuple(field for field, _ in orders)
+        directions = {direction for _, direction in orders}
+        if len(directions) > 1:
+            raise NotImplementedError("fake_firestore only supports one sort direction per query")
+        descending = DESCENDING in directions
+
+        with self._lock:
+            keys = self._index(fields)
+            if cursor is None:
+                start = len(keys) - 1 if descending else 0
+            else:
+                # Cursor values for the ordered fields, then the id tie-breaker if it was given
+                probe = tuple(_sort_value(cursor.get(field)) for field in fields)
+                if DOCUMENT_ID in cursor and DOCUMENT_ID not in fields:
+                    probe += ((1, cursor[DOCUMENT_ID]),)
+                if descending:
+                    start = bisect.bisect_left(keys, probe) - 1
+                else:
+                    start = bisect.bisect_left(keys, probe + ((2,),))
+            step = -1 if descending else 1
+            ids = []
+            index = start
+            while 0 <= index < len(keys) and (max_results is None or len(ids) < max_results):
+                ids.append(keys[index][-1][1])
+                index += step
+        return ids
+
+
+class WriteBatch:
+    """Buffers set/update/delete and applies them in one round trip on commit()."""
+
+    MAX_WRITES = 500
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, data, merge=False):
+        self._add(lambda: reference._collection._write(reference.id, data, merge=merge))
+
+    def update(self, reference, data):
+        self._add(lambda: reference._collection._write(reference.id, data, merge=True))
+
+    def delete(self, reference):
+        self._add(lambda: reference._collection._delete(reference.id))
+
+    def _add(self, write):
+        if len(self._writes) >= self.MAX_WRITES:
+            raise ValueError(f"A batch can contain at most {self.MAX_WRITES} writes")
+        self._writes.append(write)
+
+    def commit(self):
+        if self.latency:
+            time.sleep(self.latency)
+        for write in self._writes:
+            write()
+        self._writes = []
+
+
+class FakeFirestore:
+    """
+    Drop-in for firestore.client() in tests and benchmarks.
+
+    Args:
+        latency (float): seconds slept per RPC (get, set, stream, batch commit)
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = CollectionReference(name, self.latency)
+            return self._collections[name]
+
+    def batch(self):
+        return WriteBatch(self.latency)
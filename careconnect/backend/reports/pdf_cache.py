@@ -0,0 +1,269 @@
+# careconnect/backend/reports/pdf_cache.py
+"""
+Content-addressed cache for report PDFs.
+
+A PDF is keyed by a hash of the fields that appear in it (plus a template
+version), so an unchanged report is rendered once and every later download is
+a single blob read; the key doubles as the HTTP ETag. WeasyPrint is CPU-bound,
+so rendering runs in a process pool: create_report queues a pre-render, and a
+download that arrives while that render is still running waits for it instead
+of starting a second one.
+
+Blobs go through a small get/put/exists store interface; LocalDiskBlobStore is
+the default and an S3/GCS store only needs the same three methods (and its own
+lifecycle rule for expiry). LocalDiskBlobStore keeps the directory under
+PDF_CACHE_MAX_BYTES by deleting the least recently read PDFs: a read touches
+the file's mtime, and a write that takes the total over the cap removes the
+oldest files until it is back under 90% of it.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "careconnect-pdf-cache"))
+PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", "2"))
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Bump when the template changes so old PDFs are not served for new layouts
+TEMPLATE_VERSION = "1"
+
+
+def report_fields(report_data, report_date):
+    """The parts of a report that end up in its PDF."""
+    content = report_data.get('content') or {}
+    return {
+        "title": report_data.get('title', 'N/A'),
+        "date": report_date,
+        "diagnosis": content.get('diagnosis', 'Not provided.'),
+        "recommendations": content.get('recommendations', 'Not provided.'),
+    }
+
+
+def fields_key(fields):
+    payload = json.dumps([TEMPLATE_VERSION, fields], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_report_html(fields):
+    """Styled HTML for a report PDF."""
+    return f"""
+        <html>
+            <head>
+                <style>
+                    body {{ font-family: sans-serif; color: #333; }}
+                    .header {{ text-align: center; border-bottom: 2px solid #0d9488; padding-bottom: 10px; }}
+                    .header h1 {{ color: #0d9488; margin: 0; }}
+                    .report-title {{ margin-top: 30px; }}
+                    .section {{ margin-top: 25px; }}
+                    .section h3 {{ background-color: #f0fdfa; color: #064e3b; padding: 10px; border-left: 4px solid #10b981; }}
+                    .content {{ padding: 5px 10px; white-space: pre-wrap; line-height: 1.6; }}
+                    .footer {{ position: fixed; bottom: 0; width: 100%; text-align: center; font-size: 12px; color: #999; }}
+                </style>
+            </head>
+            <body>
+                <div class="header"><h1>CareConnect Health Report</h1></div>
+                <div class="report-title">
+                    <h2>{fields['title']}</h2>
+                    <p>Generated on: {fields['date']}</p>
+                </div>
+                <div class="section">
+                    <h3>Official Diagnosis</h3>
+                    <div class="content">{fields['diagnosis']}</div>
+                </div>
+                <div class="section">
+                    <h3>Doctor's Recommendations</h3>
+                    <div class="content">{fields['recommendations']}</div>
+                </div>
+                <div class="footer">This is an official patient record from CareConnect.</div>
+            </body>
+        </html>
+        """
+
+
+def render_pdf(fields):
+    """Render a report PDF. Runs in a worker process, so WeasyPrint is imported there."""
+    from weasyprint import HTML
+    return HTML(string=render_report_html(fields)).write_pdf()
+
+
+def _mp_context():
+    """
+    Start render workers from a fork server rather than forking this process,
+    whose gateway, listener and request threads may hold locks at fork time.
+    Only this module is preloaded, so the server never imports the app itself.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class LocalDiskBlobStore:
+    """
+    Stores blobs as files under root, written atomically.
+
+    Args:
+        root (str): cache directory (created if missing)
+        max_bytes (int): size of the PDFs kept; the least recently read are deleted past it
+    """
+
+    def __init__(self, root=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # Approximate (other processes may share the directory); pruning recounts
+        self.total_bytes = sum(size for _, _, size in self._files())
+        self.evicted = 0
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.pdf")
+
+    def _files(self):
+        """(mtime, path, size) of every cached PDF."""
+        files = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # Reading makes it the most recently used
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, key, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                self._prune()
+
+    def _prune(self):
+        """Delete the least recently used PDFs until under 90% of max_bytes. Caller holds _lock."""
+        files = sorted(self._files())
+        total = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self.evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.total_bytes = total
+
+    def stats(self):
+        return {"bytes": self.total_bytes, "max_bytes": self.max_bytes, "evicted": self.evicted}
+
+
+class PdfCache:
+    """
+    Rendered PDFs by content hash, with background pre-rendering.
+
+    Args:
+        store: blob store with get(key) -> bytes or None, exists(key) and put(key, bytes)
+        max_workers (int): render processes
+        renderer: picklable function fields -> PDF bytes
+    """
+
+    def __init__(self, store=None, max_workers=PDF_RENDER_WORKERS, renderer=render_pdf):
+        self.store = store if store is not None else LocalDiskBlobStore()
+        self.max_workers = max_workers
+        self.renderer = renderer
+        self._executor = None
+        self._pending = {}
+        # Reentrant: a done callback can run inline inside _render
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.prerendered = 0
+
+    def _pool(self):
+        # Created on first use so importing the API doesn't start processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+        return self._executor
+
+    def _render(self, key, fields):
+        """Start (or join) the render for key; returns its future."""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pool().submit(self.renderer, fields)
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._finish(key, done))
+            return future
+
+    def _finish(self, key, future):
+        try:
+            if future.exception() is None:
+                self.store.put(key, future.result())
+        except Exception as e:
+            print(f"Error caching PDF {key}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def prerender(self, fields):
+        """Queue a render for a new or changed report without waiting for it."""
+        key = fields_key(fields)
+        if not self.store.exists(key):
+            with self._lock:
+                self.prerendered += 1
+            self._render(key, fields)
+        return key
+
+    def get(self, fields):
+        """
+        Returns:
+            tuple: (key usable as an ETag, PDF bytes)
+        """
+        key = fields_key(fields)
+        pdf_bytes = self.store.get(key)
+        with self._lock:
+            if pdf_bytes is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if pdf_bytes is not None:
+            return key, pdf_bytes
+        return key, self._render(key, fields).result()
+
+    def stats(self):
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses, "prerendered": self.prerendered,
+                     "rendering": len(self._pending)}
+        if hasattr(self.store, "stats"):
+            stats["store"] = self.store.stats()
+        return stats
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,201 @@
+# careconnect/backend/reports/report_cache.py
+"""
+In-process mirror of the reports collection.
+
+ReportCache is filled and kept current by a Firestore on_snapshot listener
+(initial snapshot, then one callback per change), or by a poller that re-reads
+the collection every few seconds on clients without listeners, such as
+fake_firestore. Report reads and list pages are then served from memory;
+create_report writes through so a new report is visible before its change
+event arrives.
+
+Listeners added with add_listener() hear about every change the mirror
+applies, which is how the report indexer follows new and edited reports.
+
+Until the first snapshot has loaded, ready is False and callers fall back to
+Firestore. stats() reports the size and how long ago the mirror last heard
+from Firestore.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from report_listing import DEFAULT_PAGE_SIZE, LIST_FIELDS, decode_cursor, encode_cursor
+
+REPORT_CACHE_POLL_SECONDS = float(os.environ.get("REPORT_CACHE_POLL_SECONDS", "2"))
+
+
+def _order_key(report_id, data):
+    # Same order as the Firestore listing: date (nulls first), then document id
+    date = data.get('date')
+    return ((0, 0) if date is None else (1, date)), report_id
+
+
+def serialize(report_id, data, fields=None):
+    report_data = dict(data) if fields is None else {key: data[key] for key in fields if key in data}
+    report_data['id'] = report_id
+    if hasattr(report_data.get('date'), 'strftime'):
+        report_data['date'] = report_data['date'].strftime('%B %d, %Y')
+    return report_data
+
+
+class ReportCache:
+    """
+    Args:
+        collection_name (str): Firestore collection to mirror
+        poll_seconds (float): resync interval when the client has no on_snapshot
+    """
+
+    def __init__(self, collection_name='reports', poll_seconds=REPORT_CACHE_POLL_SECONDS):
+        self.collection_name = collection_name
+        self.poll_seconds = poll_seconds
+        self._docs = {}
+        self._order = []
+        self._lock = threading.Lock()
+        self._watch = None
+        self._listeners = []
+        self._stop = threading.Event()
+        self.ready = False
+        self.mode = None
+        self.last_event_at = None
+        self.last_read_time = None
+        self.events = 0
+        self.hits = 0
+        self.misses = 0
+
+    def add_listener(self, callback):
+        """
+        callback(report_id, data) runs for every report the mirror stores or
+        replaces, with data None when the report was removed. It is called with
+        the mirror locked, so it should only hand the change off.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, report_id, data):
+        for callback in self._listeners:
+            try:
+                callback(report_id, data)
+            except Exception as e:
+                print(f"Error in report cache listener: {e}")
+
+    # --- filling ---
+
+    def start(self, db):
+        """Attach to db: a change listener if the client has one, otherwise a poller thread."""
+        collection = db.collection(self.collection_name)
+        if hasattr(collection, "on_snapshot"):
+            self.mode = "on_snapshot"
+            self._watch = collection.on_snapshot(self._on_snapshot)
+        else:
+            self.mode = "poller"
+            threading.Thread(target=self._poll, args=(collection,), daemon=True, name="report-cache-poller").start()
+        return self
+
+    def _on_snapshot(self, docs, changes, read_time):
+        with self._lock:
+            for change in changes:
+                snapshot = change.document
+                if change.type.name == "REMOVED":
+                    self._remove(snapshot.id)
+                else:
+                    self._set(snapshot.id, snapshot.to_dict())
+            self._mark_synced(read_time)
+
+    def _poll(self, collection):
+        while not self._stop.is_set():
+            try:
+                self.sync(collection.stream())
+            except Exception as e:
+                print(f"Error polling report cache: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def sync(self, snapshots):
+        """Replace the mirror with a full read of the collection."""
+        current = {snapshot.id: snapshot.to_dict() for snapshot in snapshots}
+        with self._lock:
+            for report_id in [report_id for report_id in self._docs if report_id not in current]:
+                self._remove(report_id)
+            for report_id, data in current.items():
+                if self._docs.get(report_id) != data:
+                    self._set(report_id, data)
+            self._mark_synced(None)
+
+    def _mark_synced(self, read_time):
+        self.events += 1
+        self.last_event_at = time.time()
+        self.last_read_time = read_time
+        self.ready = True
+
+    def _set(self, report_id, data):
+        old = self._docs.get(report_id)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, _order_key(report_id, old))]
+        bisect.insort(self._order, _order_key(report_id, data))
+        self._docs[report_id] = data
+        self._notify(report_id, data)
+
+    def _remove(self, report_id):
+        old = self._docs.pop(report_id, None)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, _order_key(report_id, old))]
+            self._notify(report_id, None)
+
+    def put(self, report_id, data):
+        """Write-through after a successful Firestore write."""
+        with self._lock:
+            self._set(report_id, dict(data))
+
+    # --- reads ---
+
+    def get(self, report_id):
+        """The report's fields, or None if unknown (or the cache is not loaded yet)."""
+        with self._lock:
+            data = self._docs.get(report_id) if self.ready else None
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(data)
+
+    def iter_page(self, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=LIST_FIELDS, state=None):
+        """Same contract as report_listing.iter_reports_page, served from memory."""
+        with self._lock:
+            if cursor:
+                date, report_id = decode_cursor(cursor)
+                end = bisect.bisect_left(self._order, _order_key(report_id, {'date': date}))
+            else:
+                end = len(self._order)
+            start = max(0, end - limit)
+            rows = [(report_id, self._docs[report_id]) for _, report_id in reversed(self._order[start:end])]
+        self.hits += 1
+        if state is not None:
+            last_id, last_data = rows[-1] if rows else (None, None)
+            state["next_cursor"] = encode_cursor(last_data.get('date'), last_id) if start > 0 and rows else None
+        for report_id, data in rows:
+            yield serialize(report_id, data, fields)
+
+    def list_page(self, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=LIST_FIELDS):
+        state = {}
+        reports = list(self.iter_page(limit, cursor, fields, state))
+        return reports, state["next_cursor"]
+
+    def stats(self):
+        with self._lock:
+            size = len(self._docs)
+        return {
+            "mode": self.mode,
+            "ready": self.ready,
+            "size": size,
+            "events": self.events,
+            "hits": self.hits,
+            "misses": self.misses,
+            "seconds_since_last_event": round(time.time() - self.last_event_at, 3) if self.last_event_at else None,
+            "last_read_time": self.last_read_time.isoformat() if self.last_read_time else None,
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.unsubscribe()
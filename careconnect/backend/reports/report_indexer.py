@@ -0,0 +1,331 @@
+# careconnect/backend/reports/report_indexer.py
+"""
+Keeps the vector index used for retrieval in step with the reports collection.
+
+Each report's diagnosis and recommendations are split into overlapping chunks
+of about REPORT_CHUNK_CHARS characters. A chunk is stored as "<report_id>#<n>"
+with its text and report metadata (title, date, patient, doctor when present)
+plus a hash of its text and the embedding model, so re-indexing a report only
+embeds the chunks whose text changed; chunks whose text is unchanged but whose
+metadata is not (the report's chunk count, patient or doctor) have their
+metadata updated in place. Work is done a batch of reports at a time: one
+fetch of the stored hashes, concurrent embedding requests for the changed
+chunks, bulk upserts of up to a few hundred vectors per request and one delete
+for chunks a shorter edit left behind.
+
+Two ways in:
+
+    incremental   ReportIndexer.notify(report_id, data) from the report cache's
+                  change listener; changes are coalesced for REPORT_INDEX_FLUSH_SECONDS
+                  and indexed by a background thread
+    backfill      python reports/report_indexer.py [--batch-size 200] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.vector_index import VECTOR_INDEX
+
+# On by default only with Pinecone: an in-memory index lives and dies with this process
+REPORT_INDEXER = os.environ.get("REPORT_INDEXER", "1" if VECTOR_INDEX == "pinecone" else "0")
+REPORT_CHUNK_CHARS = int(os.environ.get("REPORT_CHUNK_CHARS", "1500"))
+REPORT_CHUNK_OVERLAP = 200
+REPORT_INDEX_BATCH = int(os.environ.get("REPORT_INDEX_BATCH", "200"))
+REPORT_INDEX_FLUSH_SECONDS = float(os.environ.get("REPORT_INDEX_FLUSH_SECONDS", "1.0"))
+BACKFILL_WORKERS = int(os.environ.get("REPORT_INDEX_WORKERS", "4"))
+# Pinecone fetches up to 1000 ids per request
+FETCH_BATCH = 1000
+MAX_ATTEMPTS = 5
+
+CHUNK_FIELDS = ("diagnosis", "recommendations")
+FILTER_FIELDS = ("patient", "doctor")
+
+
+def split_text(text, size=REPORT_CHUNK_CHARS, overlap=REPORT_CHUNK_OVERLAP):
+    """Pieces of at most `size` characters, cut at whitespace, each repeating the last `overlap` of the one before."""
+    text = re.sub(r"\s+", " ", text or "").strip()
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            cut = text.rfind(" ", start + size // 2, end)
+            end = cut if cut > 0 else end
+        pieces.append(text[start:end].strip())
+        if end == len(text):
+            break
+        next_start = text.find(" ", max(start + 1, end - overlap), end)
+        start = next_start + 1 if next_start > 0 else end
+    return pieces
+
+
+def chunk_id(report_id, n):
+    return f"{report_id}#{n}"
+
+
+def content_hash(model_id, text):
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def report_chunks(report_id, data, model_id):
+    """
+    Returns:
+        list: (chunk id, text, metadata) for the report, in order
+    """
+    date = data.get('date')
+    date_text = date.strftime('%B %d, %Y') if hasattr(date, 'strftime') else date
+    title = data.get('title') or "Report"
+    heading = f"{title} ({date_text})" if date_text else title
+    content = data.get('content') or {}
+    texts = [(field, f"{heading}, {field}: {piece}")
+             for field in CHUNK_FIELDS for piece in split_text(content.get(field))]
+
+    base = {"report_id": report_id, "title": title, "chunks": len(texts)}
+    if date_text:
+        base["date"] = date_text
+    if hasattr(date, 'timestamp'):
+        base["timestamp"] = date.timestamp()
+    base.update((field, data[field]) for field in FILTER_FIELDS if data.get(field))
+    return [(chunk_id(report_id, n), text, dict(base, field=field, text=text, content_hash=content_hash(model_id, text)))
+            for n, (field, text) in enumerate(texts)]
+
+
+class ReportIndexer:
+    """
+    Args:
+        embedder: shared.embeddings.Embedder
+        index: vector index (shared.vector_index)
+        batch_size (int): reports per indexing batch
+        flush_seconds (float): how long incremental changes are coalesced
+    """
+
+    def __init__(self, embedder, index, batch_size=REPORT_INDEX_BATCH, flush_seconds=REPORT_INDEX_FLUSH_SECONDS):
+        self.embedder = embedder
+        self.index = index
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = {}
+        self._first_pending_at = None
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+        self._counts_lock = threading.Lock()
+        self.counts = {"reports": 0, "chunks": 0, "embedded": 0, "skipped": 0, "relabelled": 0, "deleted": 0,
+                       "batches": 0, "errors": 0}
+        self.last_indexed_at = None
+
+    # --- indexing ---
+
+    def index_reports(self, reports):
+        """
+        Bring the index up to date for a batch of (report_id, data) pairs;
+        data None removes the report's chunks.
+
+        Returns:
+            dict: counts for the batch
+        """
+        planned = {report_id: report_chunks(report_id, data, self.embedder.model_id) if data else []
+                   for report_id, data in reports}
+        # Chunk 0 carries the previous chunk count, even if the report has no chunks now
+        ids = {chunk_id(report_id, 0) for report_id in planned}
+        ids.update(chunk[0] for chunks in planned.values() for chunk in chunks)
+        ids = list(ids)
+        stored = {}
+        for start in range(0, len(ids), FETCH_BATCH):
+            stored.update(self.index.fetch(ids[start:start + FETCH_BATCH]))
+
+        changed, relabelled, stale = [], [], []
+        for report_id, chunks in planned.items():
+            for item_id, text, metadata in chunks:
+                old = stored.get(item_id) or {}
+                if old.get("content_hash") != metadata["content_hash"]:
+                    changed.append((item_id, text, metadata))
+                elif old != metadata:
+                    relabelled.append((item_id, metadata))
+            previous = (stored.get(chunk_id(report_id, 0)) or {}).get("chunks") or 0
+            stale.extend(chunk_id(report_id, n) for n in range(len(chunks), previous))
+
+        if changed:
+            vectors = self.embedder.embed_many_sync([text for _, text, _ in changed])
+            self.index.upsert((item_id, vectors[n], metadata) for n, (item_id, _, metadata) in enumerate(changed))
+        if relabelled:
+            self.index.update_metadata(relabelled)
+        if stale:
+            self.index.delete(stale)
+
+        total = sum(map(len, planned.values()))
+        result = {"reports": len(planned), "chunks": total, "embedded": len(changed),
+                  "skipped": total - len(changed), "relabelled": len(relabelled), "deleted": len(stale),
+                  "batches": 1}
+        with self._counts_lock:
+            for key, value in result.items():
+                self.counts[key] += value
+            self.last_indexed_at = time.time()
+        return result
+
+    def _index_with_retry(self, reports):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return self.index_reports(reports)
+            except Exception as e:
+                with self._counts_lock:
+                    self.counts["errors"] += 1
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                print(f"Error indexing {len(reports)} reports (attempt {attempt}): {e}")
+                time.sleep(min(30.0, 2 ** attempt))
+
+    def backfill(self, snapshots, workers=BACKFILL_WORKERS, progress_every=None):
+        """
+        Index every report in an iterable of document snapshots, `workers`
+        batches at a time.
+
+        Yields a progress dict every progress_every reports (if set) and a final summary.
+        """
+        started = time.perf_counter()
+        with self._counts_lock:
+            before = dict(self.counts)
+        slots = threading.BoundedSemaphore(workers * 2)
+        failed = []
+
+        def run(batch):
+            try:
+                self._index_with_retry(batch)
+            except Exception as e:
+                failed.append({"batch_of": len(batch), "error": str(e)})
+            finally:
+                slots.release()
+
+        def progress():
+            elapsed = time.perf_counter() - started
+            with self._counts_lock:
+                done = {key: self.counts[key] - before[key] for key in self.counts}
+            return dict(done, elapsed_s=round(elapsed, 2),
+                        per_minute=round(done["reports"] / elapsed * 60) if elapsed else 0)
+
+        seen = 0
+        next_report = progress_every
+        batch = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-backfill") as executor:
+            for snapshot in snapshots:
+                batch.append((snapshot.id, snapshot.to_dict()))
+                seen += 1
+                if len(batch) == self.batch_size:
+                    slots.acquire()
+                    executor.submit(run, batch)
+                    batch = []
+                if next_report and seen >= next_report:
+                    next_report += progress_every
+                    yield progress()
+            if batch:
+                slots.acquire()
+                executor.submit(run, batch)
+        summary = progress()
+        summary["failed"] = failed
+        yield summary
+
+    # --- incremental ---
+
+    def notify(self, report_id, data):
+        """A report was created, changed (data) or removed (None); index it shortly."""
+        with self._cond:
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            # Later changes to the same report replace earlier ones
+            self._pending[report_id] = dict(data) if data is not None else None
+            self._cond.notify()
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="report-indexer")
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop:
+                    if self._pending:
+                        due = self._first_pending_at + self.flush_seconds - time.monotonic()
+                        if due <= 0 or len(self._pending) >= self.batch_size:
+                            break
+                        self._cond.wait(due)
+                    else:
+                        self._cond.wait()
+                if self._stop and not self._pending:
+                    return
+                batch = list(self._pending.items())[:self.batch_size]
+                for report_id, _ in batch:
+                    del self._pending[report_id]
+                self._first_pending_at = time.monotonic() if self._pending else None
+                self._busy = True
+            try:
+                self._index_with_retry(batch)
+            except Exception as e:
+                print(f"Giving up on indexing {len(batch)} reports: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Block until every notified change has been indexed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        with self._counts_lock:
+            counts = dict(self.counts)
+            last = self.last_indexed_at
+        return dict(counts, pending=pending, running=self._thread is not None,
+                    seconds_since_last_batch=round(time.time() - last, 3) if last else None,
+                    embedder=self.embedder.stats(), index=self.index.stats())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embed every report into the retrieval vector index.")
+    parser.add_argument("--batch-size", type=int, default=REPORT_INDEX_BATCH)
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--progress-every", type=int, default=5000)
+    parser.add_argument("--fake", action="store_true", help="read from the in-memory Firestore fake (dry run)")
+    args = parser.parse_args(argv)
+
+    from bulk_ingest import _client
+    from shared.bedrock_gateway import get_gateway
+    from shared.embeddings import Embedder
+    from shared.vector_index import open_vector_index
+
+    indexer = ReportIndexer(Embedder(get_gateway()), open_vector_index(), batch_size=args.batch_size)
+    snapshots = _client(args.fake).collection('reports').stream()
+    for update in indexer.backfill(snapshots, args.workers, args.progress_every):
+        print(json.dumps(update), file=sys.stderr if "failed" not in update else sys.stdout)
+    return 1 if update["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
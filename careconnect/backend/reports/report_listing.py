@@ -0,0 +1,114 @@
+# careconnect/backend/reports/report_listing.py
+"""
+Cursor-paginated listing of the reports collection for GET /api/reports.
+
+Pages are ordered by (date, document id) descending; the id tie-breaker keeps
+the order total, so reports saved in the same instant are neither skipped nor
+repeated across pages. The cursor is an opaque token holding the last row's
+date and id, and each page is a start_after + limit query, so its cost depends
+on the page size rather than on the size of the collection. select() keeps the
+full diagnosis/recommendation text off the wire for list views.
+"""
+
+import base64
+import datetime
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# What the list view shows; "content" (diagnosis + recommendations) is opt-in
+LIST_FIELDS = ("title", "date", "icon_name")
+ALLOWED_FIELDS = LIST_FIELDS + ("content",)
+
+DOCUMENT_ID = "__name__"
+
+
+def encode_cursor(date, document_id):
+    payload = json.dumps({"d": date.isoformat() if date is not None else None, "i": document_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Returns (date, document id); raises ValueError for a malformed token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        date = datetime.datetime.fromisoformat(payload["d"]) if payload["d"] else None
+        return date, payload["i"]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def parse_fields(raw):
+    """Comma-separated field list from the query string; defaults to the list-view fields."""
+    if not raw:
+        return list(LIST_FIELDS)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in ALLOWED_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # date is needed for the cursor whether or not the caller asked for it
+    return fields if "date" in fields else fields + ["date"]
+
+
+def parse_limit(raw):
+    if raw is None:
+        return DEFAULT_PAGE_SIZE
+    limit = int(raw)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def serialize_report(snapshot):
+    report_data = snapshot.to_dict()
+    report_data['id'] = snapshot.id
+    if hasattr(report_data.get('date'), 'strftime'):
+        report_data['date'] = report_data['date'].strftime('%B %d, %Y')
+    return report_data
+
+
+def iter_reports_page(db, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=LIST_FIELDS, state=None):
+    """
+    Yield one page of serialized reports, newest first.
+
+    Args:
+        db: Firestore client (or FakeFirestore)
+        cursor (str): token from the previous page, None for the first page
+        state (dict): if given, "next_cursor" is set once the page is exhausted
+            (None when this was the last page)
+
+    The page is fetched with limit + 1 so the last page can be detected without
+    an extra query.
+    """
+    query = (db.collection('reports')
+             .order_by('date', direction="DESCENDING")
+             .order_by(DOCUMENT_ID, direction="DESCENDING")
+             .select(list(fields)))
+    if cursor:
+        date, document_id = decode_cursor(cursor)
+        query = query.start_after({"date": date, DOCUMENT_ID: document_id})
+
+    count = 0
+    last = None
+    next_cursor = None
+    for snapshot in query.limit(limit + 1).stream():
+        if count == limit:
+            next_cursor = encode_cursor(last.get('date'), last.id)
+            break
+        count += 1
+        last = snapshot
+        yield serialize_report(snapshot)
+    if state is not None:
+        state["next_cursor"] = next_cursor
+
+
+def list_reports_page(db, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=LIST_FIELDS):
+    """
+    Returns:
+        tuple: (list of reports, next cursor or None)
+    """
+    state = {}
+    reports = list(iter_reports_page(db, limit, cursor, fields, state))
+    return reports, state["next_cursor"]
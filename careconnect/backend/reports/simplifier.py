@@ -0,0 +1,285 @@
+# careconnect/backend/reports/simplifier.py
+"""
+Patient-friendly simplification (Claude) and translation (Amazon Translate) of
+report text for /api/process-text.
+
+The fixed medical-assistant instruction is sent as a system block, marked with
+cache_control when the model supports Bedrock prompt caching and the block is
+long enough to be cached (Bedrock ignores checkpoints below a per-model minimum
+of 1024-2048 tokens). With the defaults neither holds: Claude 3 Sonnet has no
+prompt caching and the instruction is one sentence, so no prompt caching
+happens and the savings come from the memos below. Set SIMPLIFY_MODEL_ID to a
+supported model and SIMPLIFY_SYSTEM_PROMPT to a longer fixed prompt (e.g. with
+worked examples) to use it.
+
+Results are memoized in process, keyed on a hash of the model, system prompt
+and text (simplification) and of text + target language (final result), so
+reopening a report is a dict lookup. With a SimplificationStore attached,
+simplifications are also kept in SQLite under the same hash for
+SIMPLIFICATION_MAX_AGE_DAYS: they survive restarts and the memo's LRU limit,
+and that is where a Bedrock batch job's output is loaded (batch_processing.py).
+Changing SIMPLIFY_MODEL_ID or SIMPLIFY_SYSTEM_PROMPT changes the key, so stored
+simplifications from the old model or prompt are never served.
+With a TranslationMemory attached, translation goes through its sentence-level
+cache, so wording shared across reports is translated once.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SIMPLIFY_MODEL_ID = os.environ.get("SIMPLIFY_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
+MEMO_SIZE = int(os.environ.get("PROCESS_TEXT_MEMO_SIZE", "4096"))
+SIMPLIFICATION_DB = os.environ.get("SIMPLIFICATION_DB", "simplifications.db")
+SIMPLIFICATION_MAX_AGE_DAYS = float(os.environ.get("SIMPLIFICATION_MAX_AGE_DAYS", "90"))
+
+# Model families with Bedrock prompt caching and the fewest tokens a cached prefix
+# needs; matched as substrings so "us." inference profiles work too
+PROMPT_CACHING_MODELS = {
+    "anthropic.claude-3-5-haiku": 2048,
+    "anthropic.claude-3-7-sonnet": 1024,
+    "anthropic.claude-sonnet-4": 1024,
+    "anthropic.claude-opus-4": 1024,
+    "amazon.nova": 1000,
+}
+
+# The instruction the endpoint has always used
+SYSTEM_PROMPT = os.environ.get(
+    "SIMPLIFY_SYSTEM_PROMPT",
+    "You are a medical assistant. Explain the following text to a patient in simple, clear language."
+)
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English prose
+    return len(text) // 4
+
+
+def supports_prompt_caching(model_id, prompt=SYSTEM_PROMPT):
+    """True if cache_control on the prompt would actually create a cache checkpoint."""
+    minimum = next((tokens for family, tokens in PROMPT_CACHING_MODELS.items() if family in model_id), None)
+    return minimum is not None and estimate_tokens(prompt) >= minimum
+
+
+def text_key(text, language=None):
+    """Stable cache key for a report text, optionally scoped to a target language."""
+    digest = hashlib.sha256(text.encode("utf-8"))
+    if language is not None:
+        digest.update(b"\0" + language.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def simplification_key(text, model_id, prompt=SYSTEM_PROMPT):
+    """Key of a simplification: the same text simplified by another model or prompt is another entry."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{model_id}\0{prompt_hash}\0{text}".encode("utf-8")).hexdigest()
+
+
+class Memo:
+    """Thread-safe LRU dict with hit/miss counters."""
+
+    def __init__(self, max_entries=MEMO_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SimplificationStore:
+    """
+    Durable simplifications keyed by simplification_key(text, model_id).
+
+    Args:
+        path (str): SQLite file; ":memory:" for a per-process store
+        max_age (float): seconds an entry is served for; older ones are misses and get pruned
+    """
+
+    def __init__(self, path=SIMPLIFICATION_DB, max_age=SIMPLIFICATION_MAX_AGE_DAYS * 86400):
+        self.max_age = max_age
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS simplifications ("
+            " hash TEXT PRIMARY KEY, model_id TEXT, simplified TEXT NOT NULL, created_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS simplifications_created ON simplifications (created_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT simplified FROM simplifications WHERE hash = ? AND created_at >= ?",
+                (key, time.time() - self.max_age),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put_many(self, simplifications, model_id=None):
+        """Store {simplification key: simplified text}."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO simplifications (hash, model_id, simplified, created_at) VALUES (?, ?, ?, ?)",
+                [(key, model_id, simplified, now) for key, simplified in simplifications.items()],
+            )
+            if now >= self._next_prune:
+                # Expired entries, including ones keyed for a model or prompt no longer in use
+                self._conn.execute("DELETE FROM simplifications WHERE created_at < ?", (now - self.max_age,))
+                self._next_prune = now + 3600
+            self._conn.commit()
+
+    def put(self, key, simplified, model_id=None):
+        self.put_many({key: simplified}, model_id)
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM simplifications").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+class ReportSimplifier:
+    """
+    Simplify and translate report text through the shared gateway.
+
+    Args:
+        gateway: shared BedrockGateway
+        model_id (str): Bedrock model used for simplification
+        translation_memory (TranslationMemory): optional segment cache for translations
+        store (SimplificationStore): optional durable store behind the simplification memo
+    """
+
+    def __init__(self, gateway, model_id=SIMPLIFY_MODEL_ID, memo_size=MEMO_SIZE, translation_memory=None,
+                 store=None):
+        self.gateway = gateway
+        self.model_id = model_id
+        self.translation_memory = translation_memory
+        self.store = store
+        self.simplified = Memo(memo_size)
+        self.results = Memo(memo_size)
+
+    def simplification_key(self, text):
+        """Memo and store key of text's simplification by this model and the system prompt."""
+        return simplification_key(text, self.model_id)
+
+    def build_request(self, text):
+        system = {"type": "text", "text": SYSTEM_PROMPT}
+        if supports_prompt_caching(self.model_id):
+            system["cache_control"] = {"type": "ephemeral"}
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 1000,
+            "system": [system],
+            "messages": [{"role": "user", "content": f"<text>{text}</text>"}],
+        }
+
+    async def simplify(self, text):
+        """
+        Returns:
+            tuple: (simplified text, metrics dict for this call)
+        """
+        key = self.simplification_key(text)
+        cached = self.simplified.get(key)
+        if cached is not None:
+            return cached, {"simplify_memo_hit": True}
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                self.simplified.put(key, stored)
+                return stored, {"simplify_memo_hit": True, "simplify_store_hit": True}
+
+        start = time.perf_counter()
+        response_body = await self.gateway.invoke_model_json(
+            self.model_id, self.build_request(text),
+            accept='application/json', contentType='application/json'
+        )
+        usage = response_body.get('usage', {})
+        metrics = {
+            "simplify_memo_hit": False,
+            "model_latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "input_tokens": usage.get('input_tokens'),
+            "output_tokens": usage.get('output_tokens'),
+            "cache_read_input_tokens": usage.get('cache_read_input_tokens', 0),
+            "cache_creation_input_tokens": usage.get('cache_creation_input_tokens', 0),
+        }
+        simplified_text = response_body['content'][0]['text']
+        self.simplified.put(key, simplified_text)
+        if self.store is not None:
+            self.store.put(key, simplified_text, self.model_id)
+        return simplified_text, metrics
+
+    async def translate(self, simplified_text, target_language_code):
+        """
+        Returns:
+            tuple: (translated text, metrics dict for this call)
+        """
+        if target_language_code == 'en':
+            return simplified_text, {}
+        if self.translation_memory is not None:
+            return await self.translation_memory.translate(simplified_text, 'en', target_language_code)
+        return await self.gateway.translate_text(simplified_text, 'en', target_language_code), {}
+
+    async def process(self, text, target_language_code='en'):
+        """
+        Simplify text and translate it to target_language_code.
+
+        Returns:
+            dict: simplifiedText, translatedText and per-call metrics
+        """
+        start = time.perf_counter()
+        key = text_key(text, target_language_code)
+        cached = self.results.get(key)
+        if cached is not None:
+            simplified_text, translated_text = cached
+            metrics = {"memo_hit": True}
+        else:
+            simplified_text, metrics = await self.simplify(text)
+            translated_text, translate_metrics = await self.translate(simplified_text, target_language_code)
+            metrics.update(translate_metrics)
+            self.results.put(key, (simplified_text, translated_text))
+            metrics["memo_hit"] = False
+        metrics["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return {"simplifiedText": simplified_text, "translatedText": translated_text, "metrics": metrics}
+
+    def process_sync(self, text, target_language_code='en'):
+        return self.gateway.run(self.process(text, target_language_code))
+
+    def stats(self):
+        return {
+            "model_id": self.model_id,
+            "prompt_caching": supports_prompt_caching(self.model_id),
+            "simplified_memo": self.simplified.stats(),
+            "simplification_store": self.store.stats() if self.store else None,
+            "result_memo": self.results.stats(),
+            "translation_memory": self.translation_memory.stats() if self.translation_memory else None,
+        }
@@ -0,0 +1,176 @@
+# careconnect/backend/reports/translation_memory.py
+"""
+Sentence-level translation memory in front of Amazon Translate.
+
+Simplified reports repeat a lot of wording across patients ("Take medication
+twice daily", standard diagnosis phrasings). TranslationMemory splits a text
+into sentence segments, looks each one up in a SQLite table keyed by
+(segment hash, source, target), sends only the misses to Translate - joined by
+newlines, one request per ~9 KB - and reassembles the document with the
+original whitespace. Fully repeated content never reaches Translate.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+TRANSLATION_MEMORY_DB = os.environ.get("TRANSLATION_MEMORY_DB", "translation_memory.db")
+
+# TranslateText accepts up to 10,000 bytes per request; leave room for the joining newlines
+MAX_REQUEST_BYTES = 9000
+
+# Sentence ends followed by whitespace, or line breaks. Common abbreviations don't end a sentence.
+_SEPARATOR = re.compile(
+    r"((?<!\bDr\.)(?<!\bMr\.)(?<!\bMs\.)(?<!\bMrs\.)(?<!\bvs\.)(?<!\be\.g\.)(?<!\bi\.e\.)(?<=[.!?])[ \t]+|\s*\n\s*)"
+)
+_HAS_LETTER = re.compile(r"[^\W\d_]")
+
+
+def split_segments(text):
+    """
+    Split text into alternating [segment, separator, segment, ...] parts, so
+    "".join(parts) == text.
+    """
+    return _SEPARATOR.split(text)
+
+
+def segment_key(segment):
+    return hashlib.sha256(segment.encode("utf-8")).hexdigest()
+
+
+def _chunks(segments, max_bytes=MAX_REQUEST_BYTES):
+    """Group segments into newline-joined requests under max_bytes each."""
+    chunk, size = [], 0
+    for segment in segments:
+        length = len(segment.encode("utf-8")) + 1
+        if chunk and size + length > max_bytes:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(segment)
+        size += length
+    if chunk:
+        yield chunk
+
+
+class TranslationMemory:
+    """
+    Persistent segment cache plus batched Translate calls for the misses.
+
+    Args:
+        gateway: shared BedrockGateway (used for translate_text)
+        path (str): SQLite file; ":memory:" for a per-process cache
+    """
+
+    def __init__(self, gateway, path=TRANSLATION_MEMORY_DB):
+        self.gateway = gateway
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " hash TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL,"
+            " translation TEXT NOT NULL, created_at REAL,"
+            " PRIMARY KEY (hash, source, target))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.translate_calls = 0
+        self.characters_sent = 0
+
+    def lookup(self, segments, source_language, target_language):
+        """Returns {segment: translation} for the segments already in memory."""
+        keys = {segment_key(segment): segment for segment in segments}
+        found = {}
+        with self._lock:
+            items = list(keys)
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(items), 500):
+                batch = items[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, translation FROM segments WHERE source = ? AND target = ? "
+                    f"AND hash IN ({','.join('?' * len(batch))})",
+                    (source_language, target_language, *batch),
+                ).fetchall()
+                found.update((keys[key], translation) for key, translation in rows)
+        return found
+
+    def store(self, translations, source_language, target_language):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments (hash, source, target, translation, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(segment_key(segment), source_language, target_language, translation, now)
+                 for segment, translation in translations.items()],
+            )
+            self._conn.commit()
+
+    async def _translate_chunk(self, segments, source_language, target_language):
+        self.translate_calls += 1
+        self.characters_sent += sum(len(segment) for segment in segments)
+        translated = await self.gateway.translate_text("\n".join(segments), source_language, target_language)
+        lines = translated.split("\n")
+        if len(lines) == len(segments):
+            return dict(zip(segments, lines))
+
+        # Translate merged or split a line; fall back to one request per segment
+        self.translate_calls += len(segments)
+        self.characters_sent += sum(len(segment) for segment in segments)
+        results = await asyncio.gather(*(
+            self.gateway.translate_text(segment, source_language, target_language) for segment in segments
+        ))
+        return dict(zip(segments, results))
+
+    async def translate(self, text, source_language, target_language):
+        """
+        Translate text, reusing stored segment translations.
+
+        Returns:
+            tuple: (translated text, {"tm_hits", "tm_misses"} for this call)
+        """
+        parts = split_segments(text)
+        # Even indexes are segments, odd ones the separators between them
+        segments = {part.strip() for part in parts[::2] if _HAS_LETTER.search(part)}
+
+        known = self.lookup(segments, source_language, target_language)
+        missing = [segment for segment in segments if segment not in known]
+        self.hits += len(known)
+        self.misses += len(missing)
+
+        if missing:
+            chunk_results = await asyncio.gather(*(
+                self._translate_chunk(chunk, source_language, target_language) for chunk in _chunks(missing)
+            ))
+            fresh = {}
+            for result in chunk_results:
+                fresh.update(result)
+            self.store(fresh, source_language, target_language)
+            known.update(fresh)
+
+        output = []
+        for index, part in enumerate(parts):
+            segment = part.strip()
+            if index % 2 == 0 and segment in known:
+                # Keep the segment's own leading/trailing whitespace
+                lead = part[:len(part) - len(part.lstrip())]
+                trail = part[len(part.rstrip()):]
+                output.append(lead + known[segment] + trail)
+            else:
+                output.append(part)
+        return "".join(output), {"tm_hits": len(segments) - len(missing), "tm_misses": len(missing)}
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "translate_calls": self.translate_calls,
+            "characters_sent": self.characters_sent,
+        }
@@ -0,0 +1,550 @@
+# careconnect/backend/server.py
+"""
+All backend services behind one ASGI entry point.
+
+    cd careconnect/backend
+    python server.py [--port 5000] [--workers 1] [--services chat,reports,...]
+    # or: uvicorn server:app --port 5000
+
+Needs every service's requirements plus uvicorn (health/requirements.txt).
+
+Instead of a Flask dev server per service, every service is loaded into one
+process and mounted twice:
+
+    /<service>/...   under its own prefix, e.g. /reports/api/reports
+    /...             at its original paths, which is what the frontend calls on
+                     port 5000; a path served by more than one service goes to
+                     the first in SERVICES (the clashes are logged at startup)
+
+Services share one copy of everything below the service directories: one
+Bedrock gateway with its pooled clients, one Zoom/T-Mobile session, one
+Firebase client, and one Twilio outbound queue that the vitals alerts also use.
+
+Flask apps run on a thread pool (SERVER_THREADS), with request and response
+bodies streamed between the pool and the event loop, so NDJSON and SSE
+responses and bulk uploads are not buffered. A request that has not started
+its response after SERVER_REQUEST_TIMEOUT seconds gets a 504. On SIGTERM or
+Ctrl-C uvicorn stops accepting connections and waits up to
+SERVER_GRACEFUL_SHUTDOWN seconds for requests in flight, then each service's
+shutdown hooks run (flushing vitals, stopping the outbound queue and the
+report indexer).
+
+Vitals readings, the SSE broker, the SMS outbound queue and in-memory chat
+sessions live in the process. With --workers above 1 the server refuses to
+mount vitals or careteam; serve those from a separate single-worker process:
+
+    python server.py --services vitals,careteam --port 5001
+    python server.py --services chat,reports,twilio-reply,chat-basic --workers 4
+
+SERVER_SERVICES picks which services a deployment mounts.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "5000"))
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", "1"))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", "64"))
+SERVER_REQUEST_TIMEOUT = float(os.environ.get("SERVER_REQUEST_TIMEOUT", "60"))
+SERVER_GRACEFUL_SHUTDOWN = float(os.environ.get("SERVER_GRACEFUL_SHUTDOWN", "30"))
+SERVER_SERVICES = os.environ.get("SERVER_SERVICES")
+
+Service = namedtuple("Service", ["name", "directory", "module", "attribute", "asgi", "shutdown"])
+
+# Order matters for paths more than one service serves: the first one gets the bare path
+SERVICES = [
+    Service("chat", "bedrock-chat", "app.py", "app", False, ()),
+    Service("reports", "reports", "api.py", "app", False, ("services.close", "report_cache.close")),
+    Service("careteam", "careteam", "app.py", "app", False, ("twilio_messaging.services.close",)),
+    Service("vitals", "health", "vitals_stream.py", "app", True, ("services.close",)),
+    Service("twilio-reply", "careteam", "twilio-reply.py", "app", False, ()),
+    Service("chat-basic", "bedrock-chat", "api.py", "app", False, ()),
+]
+
+# Services whose state must live in one process: the vitals memmap files and SSE
+# subscribers, and the careteam outbound SMS queue (each worker would requeue the
+# others' messages in flight)
+SINGLE_PROCESS_SERVICES = ("vitals", "careteam")
+
+
+def _json_response(status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    return status, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body
+
+
+async def send_response(send, status, payload):
+    status, headers, body = _json_response(status, payload)
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+class _RequestBody:
+    """wsgi.input for a worker thread, pulling ASGI body messages from the event loop as it reads."""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b""
+        self._done = False
+
+    def _fill(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message["type"] == "http.disconnect":
+            self._done = True
+            return
+        self._buffer += message.get("body", b"")
+        self._done = not message.get("more_body", False)
+
+    def read(self, size=-1):
+        while not self._done and (size is None or size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        while b"\n" not in self._buffer and not self._done and (size is None or size < 0 or len(self._buffer) < size):
+            self._fill()
+        end = self._buffer.find(b"\n") + 1 or len(self._buffer)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        data, self._buffer = self._buffer[:end], self._buffer[end:]
+        return data
+
+    def readlines(self, hint=-1):
+        return list(self)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+class WsgiApp:
+    """
+    ASGI adapter for a WSGI (Flask) app that runs each request on a shared thread pool.
+
+    Args:
+        wsgi_app: the WSGI callable
+        executor (ThreadPoolExecutor): threads requests run on
+        timeout (float): seconds a request may take to start its response
+    """
+
+    def __init__(self, wsgi_app, executor, timeout=SERVER_REQUEST_TIMEOUT):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+        self.timeout = timeout
+        self.timeouts = 0
+
+    def environ(self, scope, body):
+        # Server strips the mount prefix from "path" and moves it to "root_path"
+        script_name = scope.get("root_path", "")
+        path = scope["path"]
+        server = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": script_name,
+            "PATH_INFO": unquote(path, errors="surrogateescape").encode("utf-8", "surrogateescape").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1] or 80),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        if scope.get("client"):
+            environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = scope["client"][0], str(scope["client"][1])
+        for name, value in scope.get("headers", []):
+            name = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[name] = value
+                continue
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        if "CONTENT_LENGTH" not in environ:
+            # Chunked upload: let the app read until the body ends
+            environ["wsgi.input_terminated"] = True
+        return environ
+
+    def _run(self, environ, loop, send, started, state):
+        """Worker thread: call the app and relay its response to the event loop."""
+
+        def emit(message):
+            if state["timed_out"]:
+                raise RequestTimeout()
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            state["status"] = int(status.split(" ", 1)[0])
+            state["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+            return lambda data: send_chunk(data)
+
+        def send_chunk(data):
+            if not data:
+                return
+            if not state["started"]:
+                begin()
+            emit({"type": "http.response.body", "body": bytes(data), "more_body": True})
+
+        def begin():
+            state["started"] = True
+            loop.call_soon_threadsafe(started.set)
+            emit({"type": "http.response.start", "status": state["status"], "headers": state["headers"]})
+
+        iterable = self.wsgi_app(environ, start_response)
+        try:
+            for data in iterable:
+                send_chunk(data)
+            if not state["started"]:
+                begin()
+            emit({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+    async def __call__(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        state = {"started": False, "timed_out": False, "status": 500, "headers": []}
+        environ = self.environ(scope, _RequestBody(receive, loop))
+        work = loop.run_in_executor(self.executor, self._run, environ, loop, send, started, state)
+        waiter = asyncio.ensure_future(started.wait())
+        done, _ = await asyncio.wait({work, waiter}, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if not done:
+            # The thread can't be interrupted; it finishes in the background and its output is dropped
+            state["timed_out"] = True
+            self.timeouts += 1
+            await send_response(send, 504, {"error": f"Request timed out after {self.timeout:g} s"})
+            return
+        try:
+            # Headers are out (or the app finished or failed): streaming bodies have no deadline
+            await work
+        except RequestTimeout:
+            pass
+        except Exception:
+            traceback.print_exc()
+            if not state["started"]:
+                await send_response(send, 500, {"error": "Internal server error"})
+
+
+class Mounted:
+    """
+    A loaded service. Flask routes run on the thread pool; an ASGI service
+    (vitals) keeps the paths it serves itself (its ASGI_PATHS) and hands the
+    rest of its Flask app to the pool too, rather than to its own single-thread
+    WSGI fallback.
+    """
+
+    def __init__(self, service, flask_app, wsgi, asgi_app, modules):
+        self.service = service
+        self.prefix = f"/{service.name}"
+        self.flask_app = flask_app
+        self.wsgi = wsgi
+        self.asgi_app = asgi_app
+        self.modules = modules
+        self.asgi_paths = set(getattr(modules.get(service.module[:-3]), "ASGI_PATHS", ())) if asgi_app else set()
+        self._adapter = flask_app.url_map.bind("localhost")
+
+    def app_for(self, path):
+        return self.asgi_app if path in self.asgi_paths else self.wsgi
+
+    def serves(self, path, method):
+        if path in self.asgi_paths:
+            return True
+        try:
+            self._adapter.match(path, method)
+        except Exception as e:
+            # A redirect (missing trailing slash) or a wrong method still means the route is ours
+            return type(e).__name__ in ("RequestRedirect", "MethodNotAllowed")
+        return True
+
+    def rules(self):
+        return self.asgi_paths | {rule.rule for rule in self.flask_app.url_map.iter_rules()
+                                  if rule.endpoint != "static"}
+
+    def shutdown(self):
+        for hook in self.service.shutdown:
+            name, *attributes = hook.split(".")
+            # A global of the entry module (report_cache) before a module of the service (twilio_messaging)
+            entry = self.modules[self.service.module[:-3]]
+            target = getattr(entry, name) if hasattr(entry, name) else self.modules.get(name)
+            try:
+                for attribute in attributes:
+                    target = getattr(target, attribute)
+                target()
+            except Exception as e:
+                print(f"[server] {self.service.name}: shutdown hook {hook} failed: {e}")
+
+
+def _service_module_names():
+    """Module names defined by more than one service directory ("app", "api", ...)."""
+    seen = {}
+    for directory in {service.directory for service in SERVICES}:
+        for filename in os.listdir(os.path.join(BACKEND_DIR, directory)):
+            if filename.endswith(".py"):
+                seen.setdefault(filename[:-3], set()).add(directory)
+    return {name for name, directories in seen.items() if len(directories) > 1}
+
+
+def load_service(service, executor, timeout):
+    """
+    Import one service's entry module with its directory first on sys.path, as
+    `python <module>` from that directory would, without letting its "app" or
+    "api" module shadow another service's.
+    """
+    directory = os.path.join(BACKEND_DIR, service.directory)
+    for name in _service_module_names():
+        sys.modules.pop(name, None)
+    before = set(sys.modules)
+    sys.path.insert(0, directory)
+    cwd = os.getcwd()
+    # Services open relative paths (SQLite files, serviceAccountKey.json) from their own directory
+    os.chdir(directory)
+    try:
+        name = f"careconnect_{service.name.replace('-', '_')}"
+        spec = importlib.util.spec_from_file_location(name, os.path.join(directory, service.module))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(directory)
+
+    modules = {service.module[:-3]: module}
+    for module_name in set(sys.modules) - before:
+        loaded = sys.modules.get(module_name)
+        path = getattr(loaded, "__file__", None) or ""
+        if os.path.dirname(os.path.abspath(path)) == directory:
+            modules[module_name] = loaded
+    app = getattr(module, service.attribute)
+    flask_app = getattr(module, "flask_app") if service.asgi else app
+    wsgi = WsgiApp(flask_app.wsgi_app, executor, timeout)
+    return Mounted(service, flask_app, wsgi, app if service.asgi else None, modules)
+
+
+class Server:
+    """
+    The dispatching ASGI app. Services are loaded at lifespan startup (or on the
+    first request), so each uvicorn worker loads its own copy and the
+    supervisor process loads none.
+
+    Args:
+        services (list): names from SERVICES to mount; all by default
+        threads (int): size of the thread pool Flask requests run on
+        timeout (float): seconds before a request without a response gets a 504
+    """
+
+    def __init__(self, services=None, threads=SERVER_THREADS, timeout=SERVER_REQUEST_TIMEOUT):
+        self.service_names = services
+        self.threads = threads
+        self.timeout = timeout
+        self.mounted = []
+        self.failed = {}
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._executor = None
+        self._lifespans = []
+        self.started_at = None
+        self.in_flight = 0
+        self.requests = 0
+
+    def load(self):
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="server-request")
+            wanted = self.service_names or [service.name for service in SERVICES]
+            unknown = set(wanted) - {service.name for service in SERVICES}
+            if unknown:
+                raise ValueError(f"Unknown services: {', '.join(sorted(unknown))}")
+            for service in SERVICES:
+                if service.name not in wanted:
+                    continue
+                start = time.perf_counter()
+                try:
+                    self.mounted.append(load_service(service, self._executor, self.timeout))
+                    print(f"[server] {service.name}: loaded in {time.perf_counter() - start:.2f} s")
+                except Exception as e:
+                    # A service whose dependencies are missing is left out, not fatal for the rest
+                    self.failed[service.name] = f"{type(e).__name__}: {e}"
+                    print(f"[server] {service.name}: not loaded ({self.failed[service.name]})")
+            for name in _service_module_names():
+                sys.modules.pop(name, None)
+            self._report_clashes()
+            self.started_at = time.time()
+            self._loaded = True
+
+    def _report_clashes(self):
+        owners = {}
+        for mounted in self.mounted:
+            for rule in sorted(mounted.rules()):
+                if rule in owners:
+                    print(f"[server] {rule} is served by {owners[rule]}; "
+                          f"{mounted.service.name}'s is at {mounted.prefix}{rule}")
+                else:
+                    owners[rule] = mounted.service.name
+
+    def route(self, path, method):
+        """(mounted service, prefix to strip) for a request path, or (None, None)."""
+        for mounted in self.mounted:
+            if path == mounted.prefix or path.startswith(mounted.prefix + "/"):
+                return mounted, mounted.prefix
+        for mounted in self.mounted:
+            if mounted.serves(path, method):
+                return mounted, ""
+        return None, None
+
+    def status(self):
+        return {
+            "services": {mounted.service.name: mounted.prefix for mounted in self.mounted},
+            "failed": self.failed,
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1) if self.started_at else None,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "timeouts": sum(mounted.wsgi.timeouts for mounted in self.mounted),
+            "threads": self.threads,
+        }
+
+    # --- lifespan ---
+
+    async def _start_lifespan(self, mounted):
+        """Run an ASGI service's own lifespan protocol alongside ours."""
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        task = asyncio.ensure_future(mounted.asgi_app({"type": "lifespan", "asgi": {"version": "3.0"}},
+                                                 inbox.get, outbox.put))
+        await inbox.put({"type": "lifespan.startup"})
+        reply = await outbox.get()
+        if reply["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"{mounted.service.name} failed to start: {reply.get('message')}")
+        self._lifespans.append((mounted, task, inbox, outbox))
+
+    async def startup(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.load)
+        for mounted in self.mounted:
+            if mounted.service.asgi:
+                await self._start_lifespan(mounted)
+
+    async def shutdown(self):
+        for mounted, task, inbox, outbox in self._lifespans:
+            await inbox.put({"type": "lifespan.shutdown"})
+            try:
+                await asyncio.wait_for(outbox.get(), SERVER_GRACEFUL_SHUTDOWN)
+            except asyncio.TimeoutError:
+                task.cancel()
+        loop = asyncio.get_running_loop()
+        for mounted in self.mounted:
+            await loop.run_in_executor(None, mounted.shutdown)
+        from shared.bedrock_gateway import get_gateway
+        get_gateway().close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    traceback.print_exc()
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --- requests ---
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if not self._loaded:
+            await self.startup()
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        if path == "/server/status":
+            return await send_response(send, 200, self.status())
+
+        mounted, prefix = self.route(path, scope.get("method", "GET"))
+        if mounted is None:
+            return await send_response(send, 404, {"error": f"No service serves {path}"})
+        if prefix:
+            path = path[len(prefix):] or "/"
+            scope = dict(scope, path=path, root_path=scope.get("root_path", "") + prefix)
+        app = mounted.app_for(path)
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            await app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+def _services_from(value):
+    return [name.strip() for name in value.split(",") if name.strip()] if value else None
+
+
+app = Server(_services_from(SERVER_SERVICES))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve every CareConnect backend service from one ASGI process.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--services", help=f"comma-separated, from: {', '.join(s.name for s in SERVICES)}")
+    args = parser.parse_args(argv)
+    if args.services:
+        # Workers import server:app themselves and read the selection from the environment
+        os.environ["SERVER_SERVICES"] = args.services
+        app.service_names = _services_from(args.services)
+    if args.workers > 1:
+        shared = [name for name in app.service_names or [service.name for service in SERVICES]
+                  if name in SINGLE_PROCESS_SERVICES]
+        if shared:
+            parser.error(f"{', '.join(shared)} must run in a single worker: serve them with "
+                         f"--services {','.join(shared)} --workers 1 and the rest with --workers {args.workers}")
+
+    import uvicorn
+
+    os.chdir(BACKEND_DIR)
+    uvicorn.run("server:app" if args.workers > 1 else app, host=args.host, port=args.port, workers=args.workers,
+                timeout_graceful_shutdown=SERVER_GRACEFUL_SHUTDOWN, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
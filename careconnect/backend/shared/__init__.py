@@ -0,0 +1,2 @@
+# careconnect/backend/shared/__init__.py
+"""Code shared by the CareConnect backend services (chat, reports, care team, health)."""
@@ -0,0 +1,301 @@
+# careconnect/backend/shared/bedrock_gateway.py
+"""
+Shared async gateway for Bedrock and Translate calls.
+
+Every service goes through one BedrockGateway per process (get_gateway()) instead
+of building boto3 clients per request:
+
+- clients are created once per service and reuse a connection pool sized to the
+  concurrency limit
+- in-flight calls are capped, so a burst of chats queues instead of exhausting
+  threads or hitting account throttles all at once
+- each call has a timeout, and throttling / transient errors are retried with
+  full-jitter exponential backoff; a call waiting out its backoff gives its
+  slot to another
+- a call that times out stops being waited for, but its worker thread keeps
+  its slot until botocore gives up too (connect and read timeouts are set to
+  the gateway timeout), so abandoned calls can't pile up past the cap
+
+The API is asyncio-first (await gateway.call(...)). Synchronous Flask views use
+the *_sync helpers, which run the coroutine on a background event loop.
+"""
+
+import asyncio
+import functools
+import json
+import os
+import random
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+MAX_CONCURRENCY = int(os.environ.get("BEDROCK_MAX_CONCURRENCY", "64"))
+CALL_TIMEOUT_SECONDS = float(os.environ.get("BEDROCK_CALL_TIMEOUT", "60"))
+MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "4"))
+
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "InternalServerException",
+    "LimitExceededException",
+}
+RETRYABLE_EXCEPTION_NAMES = {
+    "EndpointConnectionError",
+    "ConnectionClosedError",
+    "ReadTimeoutError",
+    "ConnectTimeoutError",
+}
+
+
+def is_retryable(error):
+    """True for throttling and transient transport errors."""
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    if code in RETRYABLE_ERROR_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_EXCEPTION_NAMES
+
+
+def _then(method, read_response):
+    def call(**kwargs):
+        return read_response(method(**kwargs))
+    return call
+
+
+def _release(semaphore, future):
+    semaphore.release()
+    # Marks an abandoned call's error as retrieved, so asyncio doesn't log it
+    if not future.cancelled():
+        future.exception()
+
+
+def _boto3_client_factory(max_pool_connections, timeout):
+    def factory(service_name, region_name):
+        # boto3 is imported with the first client, not when the gateway is created
+        import boto3
+        from botocore.config import Config
+
+        # Retries are handled by the gateway so they can back off without holding a worker
+        config = Config(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=timeout,
+            read_timeout=timeout,
+            retries={"total_max_attempts": 1, "mode": "standard"},
+        )
+        return boto3.client(service_name, region_name=region_name, config=config)
+
+    return factory
+
+
+def _fake_client_factory(service_name, region_name):
+    from shared.fake_bedrock import fake_client
+    return fake_client(service_name)
+
+
+class BedrockGateway:
+    """
+    Pooled, concurrency-limited access to AWS clients.
+
+    Args:
+        region_name (str): AWS region for every client
+        max_concurrency (int): maximum calls in flight across the process
+        timeout (float): default per-attempt timeout in seconds; also the boto3 clients'
+            connect and read timeouts, so a per-call timeout can only be shorter
+        max_attempts (int): attempts per call, including the first
+        base_delay (float): first backoff ceiling in seconds, doubled per retry
+        max_delay (float): cap on a single backoff sleep
+        client_factory (callable): (service_name, region_name) -> client;
+            defaults to boto3, or the local fakes when CARECONNECT_FAKE_BEDROCK=1
+    """
+
+    def __init__(self, region_name=AWS_REGION, max_concurrency=MAX_CONCURRENCY, timeout=CALL_TIMEOUT_SECONDS,
+                 max_attempts=MAX_ATTEMPTS, base_delay=0.25, max_delay=8.0, client_factory=None):
+        self.region_name = region_name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        if client_factory is None:
+            if os.environ.get("CARECONNECT_FAKE_BEDROCK") == "1":
+                client_factory = _fake_client_factory
+            else:
+                client_factory = _boto3_client_factory(max_concurrency, timeout)
+        self._client_factory = client_factory
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        # The executor bounds concurrency process-wide; the per-loop semaphores keep
+        # excess calls waiting as cheap coroutines instead of queued executor jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bedrock-gateway")
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    # --- clients ---
+
+    def client(self, service_name):
+        """Return the shared client for service_name, creating it on first use."""
+        client = self._clients.get(service_name)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(service_name)
+                if client is None:
+                    client = self._client_factory(service_name, self.region_name)
+                    self._clients[service_name] = client
+        return client
+
+    def set_client(self, service_name, client):
+        """Replace the client for a service, e.g. with a fake in benchmarks."""
+        with self._clients_lock:
+            self._clients[service_name] = client
+
+    # --- async API ---
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep anywhere between 0 and the exponential ceiling
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    async def call(self, service_name, operation, timeout=None, read_response=None, **kwargs):
+        """
+        Run client.<operation>(**kwargs) with the concurrency cap, timeout and retries.
+
+        read_response, if given, is applied to the response on the worker thread, so
+        reading a streaming body never blocks the event loop.
+
+        Raises the last error once attempts are exhausted or the error is not retryable.
+        """
+        method = getattr(self.client(service_name), operation)
+        if read_response is not None:
+            method = _then(method, read_response)
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        semaphore = self._semaphore()
+        for attempt in range(1, self.max_attempts + 1):
+            await semaphore.acquire()
+            future = loop.run_in_executor(self._executor, functools.partial(method, **kwargs))
+            # Released when the worker thread is done, not when wait_for gives up on it
+            future.add_done_callback(functools.partial(_release, semaphore))
+            self._count(in_flight=1, calls=1)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    self._count(failures=1)
+                    raise
+                self._count(retries=1)
+            finally:
+                self._count(in_flight=-1)
+            # Not holding a slot, so other calls go ahead while this one backs off
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def invoke_model_json(self, model_id, request_body, timeout=None, **kwargs):
+        """invoke_model with a JSON request body; returns the decoded JSON response body."""
+        return await self.call(
+            "bedrock-runtime", "invoke_model", timeout=timeout,
+            read_response=lambda response: json.loads(response["body"].read()),
+            modelId=model_id, body=json.dumps(request_body), **kwargs
+        )
+
+    async def converse(self, model_id, messages, timeout=None, **kwargs):
+        return await self.call("bedrock-runtime", "converse", timeout=timeout,
+                               modelId=model_id, messages=messages, **kwargs)
+
+    async def retrieve_and_generate(self, timeout=None, **kwargs):
+        return await self.call("bedrock-agent-runtime", "retrieve_and_generate", timeout=timeout, **kwargs)
+
+    async def retrieve(self, knowledge_base_id, text, number_of_results=5, timeout=None, **kwargs):
+        """Knowledge base vector search alone; returns the retrievalResults list."""
+        response = await self.call(
+            "bedrock-agent-runtime", "retrieve", timeout=timeout,
+            knowledgeBaseId=knowledge_base_id, retrievalQuery={"text": text},
+            retrievalConfiguration={"vectorSearchConfiguration": {"numberOfResults": number_of_results}},
+            **kwargs
+        )
+        return response.get("retrievalResults", [])
+
+    async def translate_text(self, text, source_language, target_language, timeout=None):
+        response = await self.call("translate", "translate_text", timeout=timeout, Text=text,
+                                   SourceLanguageCode=source_language, TargetLanguageCode=target_language)
+        return response.get("TranslatedText")
+
+    # --- sync bridge for Flask views ---
+
+    def _background_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="bedrock-gateway-loop", daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine on the gateway's background loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._background_loop())
+
+    def run(self, coro):
+        """Run a coroutine on the gateway's background loop and wait for its result."""
+        return self.submit(coro).result()
+
+    def call_sync(self, service_name, operation, timeout=None, read_response=None, **kwargs):
+        return self.run(self.call(service_name, operation, timeout=timeout, read_response=read_response, **kwargs))
+
+    def invoke_model_json_sync(self, model_id, request_body, timeout=None, **kwargs):
+        return self.run(self.invoke_model_json(model_id, request_body, timeout=timeout, **kwargs))
+
+    def translate_text_sync(self, text, source_language, target_language, timeout=None):
+        return self.run(self.translate_text(text, source_language, target_language, timeout=timeout))
+
+    # --- lifecycle ---
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "max_concurrency": self.max_concurrency,
+            }
+
+    def close(self):
+        """Stop the background loop and worker threads."""
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide gateway, creating it on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = BedrockGateway()
+    return _gateway
@@ -0,0 +1,100 @@
+# careconnect/backend/shared/embeddings.py
+"""
+Text embeddings with Amazon Titan through the shared gateway.
+
+Embedder returns NumPy float32 vectors, normalized to unit length so inner
+product is cosine similarity. Titan takes one text per request, so
+embed_many() issues the requests concurrently (bounded by the gateway's
+concurrency cap) rather than one after another. Recently embedded texts are
+kept in a small LRU, which covers repeated queries and unchanged chunks.
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+EMBEDDING_MODEL_ID = os.environ.get("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+# Titan v2 supports 256, 512 or 1024 dimensions
+EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", "1024"))
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "4096"))
+# Titan v2 accepts up to 8k tokens; keep well inside it
+MAX_EMBED_CHARS = 20000
+
+
+def normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class Embedder:
+    """
+    Args:
+        gateway: shared BedrockGateway
+        model_id (str): Bedrock embedding model
+        dimensions (int): requested output size (Titan v2)
+        cache_size (int): texts kept in the LRU; 0 disables it
+    """
+
+    def __init__(self, gateway, model_id=EMBEDDING_MODEL_ID, dimensions=EMBEDDING_DIMENSIONS,
+                 cache_size=EMBEDDING_CACHE_SIZE):
+        self.gateway = gateway
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+
+    def _cached(self, text):
+        with self._lock:
+            vector = self._cache.get(text)
+            if vector is not None:
+                self._cache.move_to_end(text)
+                self.cache_hits += 1
+            return vector
+
+    def _remember(self, text, vector):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def embed(self, text):
+        """Unit-length float32 vector for one text."""
+        text = text[:MAX_EMBED_CHARS]
+        vector = self._cached(text)
+        if vector is not None:
+            return vector
+        body = {"inputText": text, "dimensions": self.dimensions, "normalize": True}
+        self.requests += 1
+        response = await self.gateway.invoke_model_json(self.model_id, body)
+        vector = normalize(response["embedding"])
+        self._remember(text, vector)
+        return vector
+
+    async def embed_many(self, texts):
+        """
+        Returns:
+            np.ndarray: (len(texts), dimensions) float32 matrix, rows in input order
+        """
+        if not texts:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+        vectors = await asyncio.gather(*(self.embed(text) for text in texts))
+        return np.vstack(vectors)
+
+    def embed_sync(self, text):
+        return self.gateway.run(self.embed(text))
+
+    def embed_many_sync(self, texts):
+        return self.gateway.run(self.embed_many(texts))
+
+    def stats(self):
+        return {"requests": self.requests, "cache_hits": self.cache_hits, "cached": len(self._cache)}
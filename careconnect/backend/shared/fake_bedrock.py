@@ -0,0 +1,294 @@
+# careconnect/backend/shared/fake_bedrock.py
+"""
+Local stand-ins for the boto3 Bedrock and Translate clients.
+
+They mimic the response shapes of invoke_model, invoke_model_with_response_stream,
+converse, converse_stream, retrieve, retrieve_and_generate, invoke_agent,
+list_ingestion_jobs and translate_text closely enough for the services to run without AWS credentials, and they simulate
+latency so streaming and timing behaviour can be measured offline.
+
+Set CARECONNECT_FAKE_BEDROCK=1 and the shared gateway hands these out instead of
+boto3 clients.
+"""
+
+import hashlib
+import io
+import json
+import math
+import re
+import threading
+import time
+
+EMBEDDING_DIMENSIONS = 256
+
+
+def _split_tokens(text):
+    """Split text into word-sized "tokens" that keep their trailing whitespace."""
+    tokens = []
+    current = ""
+    for ch in text:
+        current += ch
+        if ch == " ":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def _prompt_text(messages):
+    """Return the text of the last user message in either Anthropic or Converse format."""
+    if not messages:
+        return ""
+    content = messages[-1].get("content", "")
+    if isinstance(content, str):
+        return content
+    return " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def fake_embedding(text, dimensions=EMBEDDING_DIMENSIONS):
+    """Deterministic unit-length bag-of-words embedding, so similar texts score high."""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class _EventStream:
+    """Iterable that yields events with a delay, like botocore's EventStream."""
+
+    def __init__(self, events, first_delay, delay):
+        self._events = events
+        self._first_delay = first_delay
+        self._delay = delay
+
+    def __iter__(self):
+        for i, event in enumerate(self._events):
+            time.sleep(self._first_delay if i == 0 else self._delay)
+            yield event
+
+    def close(self):
+        pass
+
+
+class FakeBedrockRuntime:
+    """
+    Fake "bedrock-runtime" client.
+
+    Args:
+        reply (callable or str): reply text, or a function mapping the prompt to one
+        first_token_latency (float): seconds before the first token is produced
+        token_latency (float): seconds between subsequent tokens
+        fail_stream (bool): make the streaming APIs raise, to exercise fallbacks
+        embedding_latency (float): seconds per Titan embedding request
+    """
+
+    def __init__(self, reply=None, first_token_latency=0.2, token_latency=0.01, fail_stream=False,
+                 embedding_latency=0.0):
+        self.reply = reply
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.fail_stream = fail_stream
+        self.embedding_latency = embedding_latency
+        self.calls = []
+        self._lock = threading.Lock()
+        self._cached_prefixes = set()
+
+    def _record(self, operation, **kwargs):
+        with self._lock:
+            self.calls.append((operation, kwargs))
+
+    def _reply_for(self, prompt):
+        if callable(self.reply):
+            return self.reply(prompt)
+        if self.reply is not None:
+            return self.reply
+        return (f"This is a simulated CareConnect answer to: {prompt}. "
+                "Please talk to your care team about anything that worries you.")
+
+    def _tokens_for(self, messages):
+        return _split_tokens(self._reply_for(_prompt_text(messages)))
+
+    def _full_latency(self, tokens):
+        return self.first_token_latency + self.token_latency * max(len(tokens) - 1, 0)
+
+    def _cache_usage(self, request):
+        """Mimic prompt caching: system blocks marked cache_control are written once, then read."""
+        cached = [block["text"] for block in request.get("system", [])
+                  if isinstance(block, dict) and "cache_control" in block]
+        if not cached:
+            return {}
+        prefix = "".join(cached)
+        tokens = len(prefix) // 4
+        with self._lock:
+            seen = prefix in self._cached_prefixes
+            self._cached_prefixes.add(prefix)
+        if seen:
+            return {"cache_read_input_tokens": tokens, "cache_creation_input_tokens": 0}
+        return {"cache_read_input_tokens": 0, "cache_creation_input_tokens": tokens}
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self._record("invoke_model", modelId=modelId, body=body)
+        request = json.loads(body)
+        if "inputText" in request:
+            # Titan-style embedding request
+            time.sleep(self.embedding_latency)
+            payload = {"embedding": fake_embedding(request["inputText"],
+                                                   request.get("dimensions", EMBEDDING_DIMENSIONS))}
+            return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+        tokens = self._tokens_for(request.get("messages", []))
+        time.sleep(self._full_latency(tokens))
+        payload = {
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": "".join(tokens)}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": len(body) // 4, "output_tokens": len(tokens), **self._cache_usage(request)},
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        self._record("invoke_model_with_response_stream", modelId=modelId, body=body)
+        if self.fail_stream:
+            raise RuntimeError("Simulated streaming failure")
+        request = json.loads(body)
+        tokens = self._tokens_for(request.get("messages", []))
+
+        def chunk(payload):
+            return {"chunk": {"bytes": json.dumps(payload).encode("utf-8")}}
+
+        events = [chunk({"type": "content_block_delta", "index": 0,
+                         "delta": {"type": "text_delta", "text": token}})
+                  for token in tokens]
+        events.append(chunk({"type": "message_stop"}))
+        return {"body": _EventStream(events, self.first_token_latency, self.token_latency)}
+
+    def converse(self, modelId, messages, **kwargs):
+        self._record("converse", modelId=modelId, messages=messages)
+        tokens = self._tokens_for(messages)
+        time.sleep(self._full_latency(tokens))
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "".join(tokens)}]}},
+            "stopReason": "end_turn",
+        }
+
+    def converse_stream(self, modelId, messages, **kwargs):
+        self._record("converse_stream", modelId=modelId, messages=messages)
+        if self.fail_stream:
+            raise RuntimeError("Simulated streaming failure")
+        tokens = self._tokens_for(messages)
+        events = [{"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": token}}}
+                  for token in tokens]
+        events.append({"messageStop": {"stopReason": "end_turn"}})
+        return {"stream": _EventStream(events, self.first_token_latency, self.token_latency)}
+
+
+class FakeBedrockAgentRuntime:
+    """
+    Fake "bedrock-agent-runtime" client answering knowledge base and agent queries.
+
+    Args:
+        reply (callable or str): retrieve_and_generate answer, or a function mapping the prompt to one
+        latency (float): seconds per retrieve_and_generate / invoke_agent call
+        retrieve_latency (float): seconds per retrieve call (the vector search alone)
+    """
+
+    def __init__(self, reply=None, latency=0.5, retrieve_latency=0.2):
+        self.reply = reply
+        self.latency = latency
+        self.retrieve_latency = retrieve_latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def retrieve(self, knowledgeBaseId, retrievalQuery, retrievalConfiguration=None, **kwargs):
+        with self._lock:
+            self.calls.append(("retrieve", {"knowledgeBaseId": knowledgeBaseId, "retrievalQuery": retrievalQuery}))
+        time.sleep(self.retrieve_latency)
+        count = ((retrievalConfiguration or {}).get("vectorSearchConfiguration") or {}).get("numberOfResults", 5)
+        query = retrievalQuery.get("text", "")
+        return {"retrievalResults": [{
+            "content": {"text": f"Record excerpt {n + 1} relevant to: {query}"},
+            "location": {"type": "S3", "s3Location": {"uri": f"s3://careconnect-kb/records/{n + 1}.txt"}},
+            "score": round(0.9 - 0.1 * n, 2),
+        } for n in range(min(count, 3))]}
+
+    def retrieve_and_generate(self, input, retrieveAndGenerateConfiguration, **kwargs):
+        with self._lock:
+            self.calls.append(("retrieve_and_generate", {"input": input, **kwargs}))
+        time.sleep(self.latency)
+        prompt = input.get("text", "")
+        if callable(self.reply):
+            text = self.reply(prompt)
+        else:
+            text = self.reply or f"According to your records, here is what we know about: {prompt}"
+        return {"output": {"text": text}, "sessionId": kwargs.get("sessionId", "fake-session")}
+
+    def invoke_agent(self, agentId, agentAliasId, sessionId, input=None, inputText=None, **kwargs):
+        with self._lock:
+            self.calls.append(("invoke_agent", {"sessionId": sessionId, "input": input, "inputText": inputText}))
+        time.sleep(self.latency)
+        prompt = inputText or (input or {}).get("text", "")
+        text = f"The care agent looked into: {prompt}"
+        return {"completion": [{"chunk": {"bytes": text.encode("utf-8")}}], "sessionId": sessionId}
+
+
+class FakeBedrockAgent:
+    """Fake "bedrock-agent" (control plane) client reporting knowledge base ingestion jobs."""
+
+    def __init__(self):
+        self.jobs = 0
+        self._lock = threading.Lock()
+
+    def complete_ingestion_job(self):
+        """Simulate a finished knowledge base sync."""
+        with self._lock:
+            self.jobs += 1
+
+    def list_ingestion_jobs(self, knowledgeBaseId, dataSourceId, **kwargs):
+        with self._lock:
+            jobs = self.jobs
+        if not jobs:
+            return {"ingestionJobSummaries": []}
+        return {"ingestionJobSummaries": [{
+            "ingestionJobId": f"job-{jobs}", "knowledgeBaseId": knowledgeBaseId, "dataSourceId": dataSourceId,
+            "status": "COMPLETE",
+        }]}
+
+
+class FakeTranslate:
+    """Fake "translate" client that tags text with the target language."""
+
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode, **kwargs):
+        with self._lock:
+            self.calls.append(("translate_text", {"Text": Text, "TargetLanguageCode": TargetLanguageCode}))
+        time.sleep(self.latency)
+        translated = "\n".join(f"[{TargetLanguageCode}] {line}" if line.strip() else line
+                               for line in Text.split("\n"))
+        return {
+            "TranslatedText": translated,
+            "SourceLanguageCode": SourceLanguageCode,
+            "TargetLanguageCode": TargetLanguageCode,
+        }
+
+
+FAKE_CLIENTS = {
+    "bedrock-runtime": FakeBedrockRuntime,
+    "bedrock-agent-runtime": FakeBedrockAgentRuntime,
+    "bedrock-agent": FakeBedrockAgent,
+    "translate": FakeTranslate,
+}
+
+
+def fake_client(service_name, **kwargs):
+    """Client factory with the same call shape as boto3.client."""
+    try:
+        return FAKE_CLIENTS[service_name]()
+    except KeyError:
+        raise ValueError(f"No fake client for service '{service_name}'")
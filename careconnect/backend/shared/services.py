@@ -0,0 +1,99 @@
+# careconnect/backend/shared/services.py
+"""
+Lazily created clients and heavy libraries.
+
+Importing a service should only define its routes. Anything that imports a big
+SDK (firebase_admin, twilio, numpy) or talks to the network on creation is
+registered here instead and built the first time a request needs it:
+
+    services = ServiceRegistry()
+    services.register("firestore", open_firestore)
+    ...
+    db = services.get("firestore")
+
+warm() builds registered services on a background thread, so a server can bind
+its port at once and still have the clients ready before most first requests.
+A request that arrives while one is being built waits for that build rather than
+starting another.
+"""
+
+import threading
+import time
+
+
+class ServiceRegistry:
+    """Named factories, each run at most once per process (until close())."""
+
+    def __init__(self):
+        self._factories = {}
+        self._closers = {}
+        self._instances = {}
+        self._locks = {}
+        self._init_ms = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory=None, close=None):
+        """
+        Args:
+            name (str): what callers get() it by
+            factory (callable): no arguments -> the service; may also be used as a decorator
+            close (callable): instance -> None, run by close() if the service was built
+        """
+        if factory is None:
+            return lambda f: self.register(name, f, close)
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+            if close is not None:
+                self._closers[name] = close
+        return factory
+
+    def get(self, name):
+        """The service, built now if this is the first use."""
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._locks[name]:
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                self._init_ms[name] = (time.perf_counter() - start) * 1000
+        return self._instances[name]
+
+    def ready(self, name):
+        return name in self._instances
+
+    def warm(self, names=None):
+        """Build the named services (all by default), in order, on a daemon thread."""
+        names = list(names if names is not None else self._factories)
+
+        def build():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    # Left for the first request to retry and report
+                    print(f"Error warming {name}: {e}")
+
+        thread = threading.Thread(target=build, daemon=True, name="services-warm")
+        thread.start()
+        return thread
+
+    def close(self):
+        """Run the close hooks of every service that was built, newest first."""
+        for name in reversed(list(self._instances)):
+            instance = self._instances.pop(name)
+            closer = self._closers.get(name)
+            if closer is not None:
+                try:
+                    closer(instance)
+                except Exception as e:
+                    print(f"Error closing {name}: {e}")
+
+    def stats(self):
+        return {
+            name: {"ready": name in self._instances,
+                   "init_ms": round(self._init_ms[name], 1) if name in self._init_ms else None}
+            for name in self._factories
+        }
@@ -0,0 +1,378 @@
+# careconnect/backend/shared/vector_index.py
+"""
+Vector indexes with one interface: Pinecone for deployments, NumPy in memory
+for local runs, tests and benchmarks.
+
+    index.upsert([(id, vector, metadata), ...])
+    index.query(vector, top_k=5, filter={"patient": "p-17", "doctor": {"$in": ["Dr. Phil D"]}})
+        -> [Match(id, score, metadata), ...]   # best first; score is cosine similarity
+    index.update_metadata([(id, metadata), ...])   # no re-embedding
+    index.delete([id, ...])
+
+Filters use Pinecone's metadata filter syntax: a bare value means $eq, and
+$eq/$ne/$in/$nin/$gt/$gte/$lt/$lte are supported on each field.
+
+InMemoryVectorIndex searches exactly (one matrix-vector product over the
+filtered rows) until it is trained; train() clusters the vectors with k-means
+into an inverted file (IVF), after which a query only scans the `nprobe`
+closest clusters - approximate, but a fraction of the work on a large corpus.
+
+open_vector_index() picks the backend from VECTOR_INDEX ("memory" or "pinecone").
+"""
+
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+VECTOR_INDEX = os.environ.get("VECTOR_INDEX", "memory")
+PINECONE_INDEX_NAME = os.environ.get("PINECONE_INDEX_NAME", "careconnect-quickstart-py")
+PINECONE_NAMESPACE = os.environ.get("PINECONE_NAMESPACE", "")
+# Pinecone recommends batches of up to ~100-200 vectors (2 MB) per upsert request
+PINECONE_UPSERT_BATCH = 200
+# Filtered queries matching at most this many rows skip the IVF and scan them all
+EXACT_SEARCH_ROWS = 20000
+
+Match = namedtuple("Match", ["id", "score", "metadata"])
+
+
+def _condition_mask(column, condition):
+    """Boolean mask of rows whose metadata value satisfies one field condition."""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    mask = np.ones(len(column), dtype=bool)
+    for op, operand in condition.items():
+        if op == "$eq":
+            mask &= column == operand
+        elif op == "$ne":
+            mask &= column != operand
+        elif op in ("$in", "$nin"):
+            found = np.zeros(len(column), dtype=bool)
+            for value in operand:
+                found |= column == value
+            mask &= found if op == "$in" else ~found
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            compare = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}[op]
+            numeric = np.array([isinstance(v, (int, float)) and not isinstance(v, bool) for v in column])
+            values = np.where(numeric, column, 0).astype(np.float64)
+            mask &= numeric & compare(values, operand)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return mask
+
+
+class InMemoryVectorIndex:
+    """
+    Cosine-similarity index in NumPy arrays.
+
+    Args:
+        dimension (int): vector size; taken from the first upsert when None
+        nlist (int): IVF clusters built by train()
+        nprobe (int): clusters scanned per query once trained
+    """
+
+    def __init__(self, dimension=None, nlist=None, nprobe=8):
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._size = 0
+        self._vectors = None
+        self._ids = []
+        self._row = {}
+        self._metadata = []
+        self._columns = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids = None
+        self._assignment = np.zeros(0, dtype=np.int32)
+        self._lists = None
+        self._lock = threading.RLock()
+        self.queries = 0
+
+    def __len__(self):
+        return len(self._row)
+
+    def _grow(self, extra):
+        needed = self._size + extra
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        assignment = np.full(capacity, -1, dtype=np.int32)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+            assignment[:self._size] = self._assignment[:self._size]
+        self._vectors, self._alive, self._assignment = vectors, alive, assignment
+        for field, column in self._columns.items():
+            grown = np.full(capacity, None, dtype=object)
+            grown[:self._size] = column[:self._size]
+            self._columns[field] = grown
+
+    def upsert(self, items):
+        """
+        Insert or replace (id, vector, metadata) items.
+
+        Returns:
+            int: number of items written
+        """
+        items = list(items)
+        if not items:
+            return 0
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = len(items[0][1])
+            self._grow(len(items))
+            for item_id, vector, metadata in items:
+                vector = np.asarray(vector, dtype=np.float32)
+                if vector.shape != (self.dimension,):
+                    raise ValueError(f"vector for {item_id!r} has dimension {vector.shape}, index has {self.dimension}")
+                norm = float(np.linalg.norm(vector))
+                row = self._row.get(item_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._row[item_id] = row
+                    self._ids.append(item_id)
+                    self._metadata.append(None)
+                self._vectors[row] = vector / norm if norm else vector
+                self._alive[row] = True
+                metadata = dict(metadata or {})
+                self._metadata[row] = metadata
+                for field in set(self._columns) | set(metadata):
+                    column = self._columns.get(field)
+                    if column is None:
+                        column = self._columns[field] = np.full(len(self._vectors), None, dtype=object)
+                    column[row] = metadata.get(field)
+                if self._centroids is not None:
+                    self._assignment[row] = int(np.argmax(self._centroids @ self._vectors[row]))
+            self._lists = None
+            return len(items)
+
+    def update_metadata(self, items):
+        """Replace the metadata of existing (id, metadata) items, keeping their vectors; unknown ids are skipped."""
+        with self._lock:
+            for item_id, metadata in items:
+                row = self._row.get(item_id)
+                if row is None:
+                    continue
+                metadata = dict(metadata or {})
+                self._metadata[row] = metadata
+                for field in set(self._columns) | set(metadata):
+                    column = self._columns.get(field)
+                    if column is None:
+                        column = self._columns[field] = np.full(len(self._vectors), None, dtype=object)
+                    column[row] = metadata.get(field)
+
+    def delete(self, ids):
+        with self._lock:
+            for item_id in ids:
+                row = self._row.pop(item_id, None)
+                if row is not None:
+                    # Rows are tombstoned, not moved; compact() reclaims them
+                    self._alive[row] = False
+                    self._metadata[row] = None
+
+    def fetch(self, ids):
+        """{id: metadata} for the ids present."""
+        with self._lock:
+            return {item_id: self._metadata[self._row[item_id]] for item_id in ids if item_id in self._row}
+
+    def compact(self):
+        """Rebuild the arrays without deleted rows."""
+        with self._lock:
+            live = [(item_id, self._vectors[row].copy(), self._metadata[row]) for item_id, row in self._row.items()]
+            centroids = self._centroids
+            self.__init__(self.dimension, self.nlist, self.nprobe)
+            self._centroids = centroids
+            self.upsert(live)
+
+    def train(self, nlist=None, iterations=10, sample=50000, seed=0):
+        """Cluster the current vectors into an IVF of `nlist` lists (spherical k-means)."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            nlist = nlist or self.nlist or max(1, int(np.sqrt(len(rows))))
+            if len(rows) < nlist:
+                return
+            rng = np.random.default_rng(seed)
+            data = self._vectors[rng.choice(rows, size=min(sample, len(rows)), replace=False)]
+            centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(data @ centroids.T, axis=1)
+                for k in range(nlist):
+                    members = data[labels == k]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        centroids[k] = centroid / (np.linalg.norm(centroid) or 1.0)
+            self._centroids = centroids
+            self.nlist = nlist
+            assignment = np.full(len(self._vectors), -1, dtype=np.int32)
+            for start in range(0, self._size, 65536):
+                block = self._vectors[start:min(self._size, start + 65536)]
+                assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            self._assignment = assignment
+            self._lists = None
+
+    @property
+    def trained(self):
+        return self._centroids is not None
+
+    def _filter_mask(self, filter):
+        mask = self._alive[:self._size].copy()
+        for field, condition in (filter or {}).items():
+            column = self._columns.get(field)
+            if column is None:
+                # No row has the field: only $ne/$nin can match
+                column = np.full(self._size, None, dtype=object)
+            mask &= _condition_mask(column[:self._size], condition)
+        return mask
+
+    def _probe_rows(self, vector, nprobe):
+        """Rows in the `nprobe` IVF lists closest to the query."""
+        if self._lists is None:
+            # Inverted lists as one argsort of the assignments; rebuilt after writes
+            assignment = self._assignment[:self._size]
+            order = np.argsort(assignment, kind="stable")
+            bounds = np.searchsorted(assignment[order], np.arange(len(self._centroids) + 1))
+            self._lists = (order, bounds)
+        order, bounds = self._lists
+        nprobe = min(nprobe or self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ vector), nprobe - 1)[:nprobe]
+        rows = np.concatenate([order[bounds[k]:bounds[k + 1]] for k in probes])
+        return rows[self._alive[rows]]
+
+    def query(self, vector, top_k=5, filter=None, nprobe=None, exact=False):
+        """
+        Best `top_k` matches for a vector.
+
+        A filter that leaves few rows (up to EXACT_SEARCH_ROWS) is searched
+        exactly over those rows, since probing a handful of IVF lists could
+        miss most of them.
+
+        Args:
+            filter (dict): Pinecone-style metadata filter
+            nprobe (int): IVF clusters to scan (trained index only)
+            exact (bool): scan every row even when trained
+        """
+        vector = normalize_query(vector)
+        with self._lock:
+            self.queries += 1
+            if self._size == 0:
+                return []
+            ivf = self._centroids is not None and not exact
+            if filter:
+                mask = self._filter_mask(filter)
+                if ivf and np.count_nonzero(mask) > EXACT_SEARCH_ROWS:
+                    rows = self._probe_rows(vector, nprobe)
+                    rows = rows[mask[rows]]
+                else:
+                    rows = np.flatnonzero(mask)
+            elif ivf:
+                rows = self._probe_rows(vector, nprobe)
+            else:
+                rows = None
+            if rows is None:
+                # Unfiltered exact search: one product over the contiguous matrix, no gather
+                scores = self._vectors[:self._size] @ vector
+                scores[~self._alive[:self._size]] = -np.inf
+                k = min(top_k, len(self._row))
+            else:
+                scores = self._vectors[rows] @ vector
+                k = min(top_k, len(rows))
+            if k == 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            ids = best if rows is None else rows[best]
+            return [Match(self._ids[row], float(scores[i]), self._metadata[row]) for i, row in zip(best, ids)]
+
+    def stats(self):
+        return {"backend": "memory", "vectors": len(self._row), "dimension": self.dimension,
+                "trained": self.trained, "nlist": self.nlist if self.trained else None, "nprobe": self.nprobe,
+                "queries": self.queries}
+
+
+def normalize_query(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class PineconeVectorIndex:
+    """
+    The same interface over a Pinecone index (cosine metric).
+
+    Args:
+        index: pinecone Index (pc.Index(name))
+        namespace (str): Pinecone namespace
+    """
+
+    def __init__(self, index, namespace=PINECONE_NAMESPACE, batch_size=PINECONE_UPSERT_BATCH):
+        self.index = index
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self.queries = 0
+
+    def upsert(self, items):
+        items = list(items)
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            self.index.upsert(
+                vectors=[{"id": item_id, "values": np.asarray(vector, dtype=np.float32).tolist(),
+                          "metadata": metadata or {}} for item_id, vector, metadata in batch],
+                namespace=self.namespace,
+            )
+        return len(items)
+
+    def update_metadata(self, items):
+        # Pinecone updates one vector per request; set_metadata merges into what is stored
+        for item_id, metadata in items:
+            self.index.update(id=item_id, set_metadata=metadata or {}, namespace=self.namespace)
+
+    def delete(self, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[start:start + 1000], namespace=self.namespace)
+
+    def fetch(self, ids):
+        response = self.index.fetch(ids=list(ids), namespace=self.namespace)
+        vectors = response.vectors if hasattr(response, "vectors") else response.get("vectors", {})
+        return {item_id: (vector.metadata if hasattr(vector, "metadata") else vector.get("metadata"))
+                for item_id, vector in vectors.items()}
+
+    def query(self, vector, top_k=5, filter=None, **kwargs):
+        self.queries += 1
+        response = self.index.query(vector=np.asarray(vector, dtype=np.float32).tolist(), top_k=top_k,
+                                    filter=filter or None, include_metadata=True, namespace=self.namespace)
+        matches = response.matches if hasattr(response, "matches") else response.get("matches", [])
+        return [Match(m["id"], float(m["score"]), m.get("metadata") or {}) if isinstance(m, dict)
+                else Match(m.id, float(m.score), m.metadata or {}) for m in matches]
+
+    def stats(self):
+        return {"backend": "pinecone", "namespace": self.namespace, "queries": self.queries}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_vector_index(name=PINECONE_INDEX_NAME, backend=VECTOR_INDEX):
+    """
+    The process-wide index called `name`: Pinecone (API key from PINECONE_API_KEY)
+    or an in-memory index.
+    """
+    with _indexes_lock:
+        index = _indexes.get((backend, name))
+        if index is None:
+            if backend == "pinecone":
+                from pinecone import Pinecone
+
+                index = PineconeVectorIndex(Pinecone(api_key=os.environ["PINECONE_API_KEY"]).Index(name))
+            elif backend == "memory":
+                index = InMemoryVectorIndex()
+            else:
+                raise ValueError(f"Unknown vector index backend: {backend}")
+            _indexes[(backend, name)] = index
+        return index
@@ -0,0 +1,23 @@
+# careconnect/backend/tests/conftest.py
+"""
+Each service is a directory of sibling modules run from that directory, so the
+tests put the service directories on sys.path the same way. Everything runs on
+the local fakes: no AWS, Firestore or Twilio access is needed.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("CARECONNECT_FAKE_BEDROCK", "1")
+os.environ.setdefault("CARECONNECT_FAKE_FIRESTORE", "1")
+os.environ.setdefault("CARECONNECT_FAKE_TWILIO", "1")
+os.environ.setdefault("CARECONNECT_FAKE_ZOOM", "1")
+os.environ.setdefault("CHAT_WARM_START", "0")
+os.environ.setdefault("REPORTS_WARM_START", "0")
+os.environ.setdefault("VITALS_SIMULATE", "0")
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for directory in ("careteam", "health", "bedrock-chat", ""):
+    path = os.path.join(BACKEND_DIR, directory) if directory else BACKEND_DIR
+    if path not in sys.path:
+        sys.path.insert(0, path)
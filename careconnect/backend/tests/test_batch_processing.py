@@ -0,0 +1,32 @@
+# careconnect/backend/tests/test_batch_processing.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "reports"))
+
+from batch_processing import MAX_BATCH_LANGUAGES, validate_batch  # noqa: E402
+
+REPORTS = [{"id": "r1", "text": "Blood pressure is high."}]
+
+
+@pytest.mark.parametrize("data", [
+    None,
+    ["not", "an", "object"],
+    "reports",
+    {"reports": REPORTS, "languages": "es"},
+    {"reports": REPORTS, "languages": []},
+    {"reports": REPORTS, "languages": [None]},
+    {"reports": REPORTS, "languages": ["x" * 50]},
+    {"reports": REPORTS, "languages": [f"l{n}" for n in range(MAX_BATCH_LANGUAGES + 1)]},
+    {"reports": [{"id": "r1", "text": ["not", "text"]}]},
+])
+def test_malformed_batches_are_rejected(data):
+    reports, languages, error = validate_batch(data)
+    assert error and reports is None and languages is None
+
+
+def test_languages_default_to_english_and_are_deduplicated():
+    assert validate_batch({"reports": REPORTS})[1:] == (["en"], None)
+    assert validate_batch({"reports": REPORTS, "languages": ["es", "es", "fr"]})[1] == ["es", "fr"]
@@ -0,0 +1,73 @@
+# careconnect/backend/tests/test_bedrock_gateway.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shared.bedrock_gateway import BedrockGateway
+
+
+class ThrottlingException(Exception):
+    response = {"Error": {"Code": "ThrottlingException"}}
+
+
+class Client:
+    """invoke(seconds, fail) sleeps on the worker thread, recording how many run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.most_running = 0
+        self.started = []
+        self._lock = threading.Lock()
+
+    def invoke(self, name, seconds=0.0, fail=False):
+        with self._lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+            self.started.append((name, time.monotonic()))
+        time.sleep(seconds)
+        with self._lock:
+            self.running -= 1
+        if fail:
+            raise ThrottlingException("slow down")
+        return name
+
+
+def gateway(client, **options):
+    return BedrockGateway(max_concurrency=1, client_factory=lambda service, region: client, **options)
+
+
+def test_a_timed_out_call_keeps_its_slot_until_its_thread_is_done():
+    client = Client()
+    bedrock = gateway(client, timeout=0.05)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await bedrock.call("bedrock-runtime", "invoke", name="slow", seconds=0.3)
+        # The caller has given up, but the thread is still running and still counts
+        assert bedrock._semaphore().locked()
+        return await bedrock.call("bedrock-runtime", "invoke", name="next")
+
+    assert asyncio.run(main()) == "next"
+    started = dict(client.started)
+    assert started["next"] - started["slow"] >= 0.3
+    assert client.most_running == 1
+
+
+def test_other_calls_run_while_one_backs_off():
+    client = Client()
+    bedrock = gateway(client, max_attempts=2)
+    bedrock._backoff = lambda attempt: 0.3
+
+    async def main():
+        throttled = asyncio.ensure_future(bedrock.call("bedrock-runtime", "invoke", name="throttled", fail=True))
+        await asyncio.sleep(0.05)
+        assert await bedrock.call("bedrock-runtime", "invoke", name="other") == "other"
+        with pytest.raises(ThrottlingException):
+            await throttled
+
+    start = time.monotonic()
+    asyncio.run(main())
+    other = dict(client.started)["other"]
+    assert other - start < 0.2
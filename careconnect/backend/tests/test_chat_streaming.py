@@ -0,0 +1,54 @@
+# careconnect/backend/tests/test_chat_streaming.py
+import json
+
+import pytest
+
+import app as chat_app
+from shared.fake_bedrock import FakeBedrockRuntime
+
+REPLY = "Your blood pressure reading is within the normal range today."
+
+
+@pytest.fixture
+def fake_runtime():
+    def install(**options):
+        runtime = FakeBedrockRuntime(reply=REPLY, first_token_latency=0, token_latency=0, **options)
+        chat_app.gateway.set_client("bedrock-runtime", runtime)
+        chat_app.response_cache.clear()
+        return runtime
+    return install
+
+
+def sse_events(response):
+    """(event name, data) pairs of a text/event-stream body."""
+    events = []
+    for block in response.get_data(as_text=True).split("\n\n"):
+        if not block.strip():
+            continue
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_chunks_arrive_in_order_and_end_with_done(fake_runtime):
+    runtime = fake_runtime()
+    response = chat_app.app.test_client().post("/api/chat", json={"prompt": "How is my blood pressure?",
+                                                                  "stream": True})
+    assert response.mimetype == "text/event-stream"
+    events = sse_events(response)
+    chunks = [data["text"] for name, data in events if name == "message"]
+    assert len(chunks) > 1
+    assert "".join(chunks) == REPLY
+    assert events[-1] == ("done", {"source": "bedrock_runtime", "session_id": None})
+    assert [operation for operation, _ in runtime.calls] == ["invoke_model_with_response_stream"]
+
+
+def test_failed_stream_falls_back_to_one_blocking_chunk(fake_runtime):
+    runtime = fake_runtime(fail_stream=True)
+    response = chat_app.app.test_client().post("/api/chat", json={"prompt": "How is my heart rate?",
+                                                                  "stream": True})
+    events = sse_events(response)
+    assert events[0] == ("message", {"text": REPLY})
+    assert events[-1][0] == "done"
+    assert len(events) == 2
+    assert [operation for operation, _ in runtime.calls] == ["invoke_model_with_response_stream", "invoke_model"]
@@ -0,0 +1,50 @@
+# careconnect/backend/tests/test_integrations.py
+import time
+
+import pytest
+
+from anomaly import Alert, AlertNotifier
+from integrations import IntegrationError, TMobileSmsClient, ZoomClient
+
+
+class Response:
+    def __init__(self, status_code, body=b"{}"):
+        self.status_code = status_code
+        self.content = body
+        self.text = body.decode()
+        self.headers = {}
+
+    def json(self):
+        return {}
+
+
+class Session:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return Response(self.status_code)
+
+
+def test_zoom_without_credentials_fails_before_calling_zoom():
+    session = Session(200)
+    client = ZoomClient(client_id=None, client_secret=None, account_id=None, session=session)
+    with pytest.raises(IntegrationError, match="ZOOM_CLIENT_ID"):
+        client.access_token()
+    assert session.calls == 0
+
+
+@pytest.mark.parametrize("status", [401, 429, 500])
+def test_rejected_tmobile_messages_count_as_failed_alerts(status):
+    client = TMobileSmsClient(access_token="token", session=Session(status))
+    with pytest.raises(IntegrationError):
+        client.send_sms("+15550001111", "hello")
+
+    notifier = AlertNotifier(["+15550001111"], send=client.send_sms)
+    notifier(Alert("p1", "heart_rate", "high", 180.0, time.time(), "above 150"))
+    deadline = time.time() + 5
+    while notifier.failed == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert (notifier.sent, notifier.failed) == (0, 1)
@@ -0,0 +1,21 @@
+# careconnect/backend/tests/test_intent_router.py
+import os
+
+from benchmarks.bench_router import LABELLED, accuracy, legacy_route
+from intent_router import BEDROCK_RUNTIME, KNOWLEDGE_BASE, IntentRouter
+
+CONFIG = os.path.join(os.path.dirname(__file__), "..", "bedrock-chat", "router_config.json")
+
+
+def test_router_is_more_accurate_than_the_keyword_scan_on_labelled_prompts():
+    router = IntentRouter.from_config(CONFIG)
+    routed = accuracy(lambda prompt: router.route(prompt).route == KNOWLEDGE_BASE)
+    assert routed >= 0.9
+    assert routed > accuracy(legacy_route)
+
+
+def test_keywords_match_whole_words_and_variants():
+    router = IntentRouter(["health", "heart rate", "symptom"])
+    assert router.route("I feel healthy").route == BEDROCK_RUNTIME
+    assert router.route("is my heart-rate ok").matched == "heart-rate"
+    assert router.route("new symptoms today").matched == "symptoms"
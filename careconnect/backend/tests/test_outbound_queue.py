@@ -0,0 +1,70 @@
+# careconnect/backend/tests/test_outbound_queue.py
+import sqlite3
+
+from outbound_queue import OutboundQueue
+
+
+def make_queue(sent):
+    return OutboundQueue(lambda sender, recipient, body: sent.append((sender, recipient, body)) or "SM1",
+                         path=":memory:")
+
+
+def test_enqueue_with_the_same_key_returns_the_first_message():
+    queue = make_queue([])
+    first_id, created = queue.enqueue("+1000", "+2000", "hello", idempotency_key="k1")
+    assert created
+    assert queue.enqueue("+1000", "+2000", "hello again", idempotency_key="k1") == (first_id, False)
+    assert queue.deduplicated == 1
+    assert queue.counts()["queued"] == 1
+
+
+def test_duplicate_keys_within_one_batch_queue_once():
+    queue = make_queue([])
+    results = queue.enqueue_many([
+        ("+1000", "+2000", "a", "k1"),
+        ("+1000", "+2000", "a", "k1"),
+        ("+1000", "+2000", "b", None),
+        ("+1000", "+2000", "b", None),
+    ])
+    assert results[1] == (results[0][0], False)
+    assert [created for _, created in results] == [True, False, True, True]
+    assert len({message_id for message_id, _ in results}) == 3
+
+
+def test_a_new_process_leaves_messages_another_one_is_sending(tmp_path):
+    path = str(tmp_path / "outbound.db")
+    sending = OutboundQueue(lambda *args: "SM1", path=path)
+    message_id, _ = sending.enqueue("+1000", "+2000", "hello")
+    assert [row[0] for row in sending._claim()[0]] == [message_id]
+
+    OutboundQueue(lambda *args: "SM1", path=path)._claim()
+    assert sending.status(message_id)["state"] == "sending"
+
+    # Past the lease the sender is presumed dead and the message is queued again
+    expired = OutboundQueue(lambda *args: "SM1", path=path, lease_seconds=-1)
+    assert [row[0] for row in expired._claim()[0]] == [message_id]
+    assert expired.reclaimed == 1
+
+
+def test_workers_survive_database_errors(monkeypatch):
+    sent = []
+    queue = make_queue(sent)
+    claim = queue._claim
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_claim():
+        if failures:
+            raise failures.pop()
+        return claim()
+
+    monkeypatch.setattr(queue, "_claim", flaky_claim)
+    monkeypatch.setattr(queue, "_backoff", lambda attempts: 0.01)
+    queue.workers = 1
+    queue.enqueue("+1000", "+2000", "hello")
+    queue.start()
+    try:
+        assert queue.wait_idle(timeout=5)
+    finally:
+        queue.stop()
+    assert sent == [("+1000", "+2000", "hello")]
+    assert queue.db_errors == 1
@@ -0,0 +1,27 @@
+# careconnect/backend/tests/test_pdf_cache.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "reports"))
+
+from pdf_cache import LocalDiskBlobStore  # noqa: E402
+
+
+def test_the_least_recently_read_pdf_is_evicted_past_the_cap(tmp_path):
+    store = LocalDiskBlobStore(str(tmp_path), max_bytes=250)
+    store.put("a", b"a" * 100)
+    store.put("b", b"b" * 100)
+    os.utime(tmp_path / "a.pdf", (1000, 1000))
+    os.utime(tmp_path / "b.pdf", (2000, 2000))
+    assert store.get("a") == b"a" * 100   # a is now more recent than b
+
+    store.put("c", b"c" * 100)
+    assert not store.exists("b")
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats() == {"bytes": 200, "max_bytes": 250, "evicted": 1}
+
+
+def test_the_size_on_disk_is_counted_when_reopened(tmp_path):
+    LocalDiskBlobStore(str(tmp_path)).put("a", b"a" * 100)
+    (tmp_path / "leftover.tmp").write_bytes(b"x" * 1000)
+    assert LocalDiskBlobStore(str(tmp_path)).total_bytes == 100
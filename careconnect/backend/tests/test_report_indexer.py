@@ -0,0 +1,36 @@
+# careconnect/backend/tests/test_report_indexer.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "reports"))
+
+from report_indexer import ReportIndexer  # noqa: E402
+from shared.bedrock_gateway import get_gateway  # noqa: E402
+from shared.embeddings import Embedder  # noqa: E402
+from shared.vector_index import InMemoryVectorIndex  # noqa: E402
+
+LONG = "Blood pressure remains elevated despite treatment and lifestyle changes. " * 40
+
+
+def report(diagnosis, recommendations="Walk daily.", doctor="Dr. Phil D"):
+    return {"title": "Checkup", "date": "2025-01-06", "doctor": doctor,
+            "content": {"diagnosis": diagnosis, "recommendations": recommendations}}
+
+
+def test_only_changed_text_is_embedded_again():
+    index = InMemoryVectorIndex()
+    indexer = ReportIndexer(Embedder(get_gateway(), cache_size=0), index)
+    first = indexer.index_reports([("r1", report(LONG))])
+    assert first["embedded"] == first["chunks"] > 2
+
+    # A new recommendation chunk changes the report's chunk count but not the diagnosis text
+    second = indexer.index_reports([("r1", report(LONG, recommendations="Walk daily. " * 200))])
+    assert second["embedded"] == second["chunks"] - first["chunks"] + 1
+    assert second["relabelled"] == first["chunks"] - 1
+    assert {metadata["chunks"] for metadata in index.fetch([f"r1#{n}" for n in range(second["chunks"])]).values()} \
+        == {second["chunks"]}
+
+    # Metadata outside the text is updated without embedding
+    third = indexer.index_reports([("r1", report(LONG, recommendations="Walk daily. " * 200, doctor="Dr. Lee Chen"))])
+    assert third["embedded"] == 0
+    assert index.query(index._vectors[0], top_k=1, filter={"doctor": "Dr. Lee Chen"})
@@ -0,0 +1,80 @@
+# careconnect/backend/tests/test_response_cache.py
+import response_cache
+from response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("model", "What is my pulse?", "72 bpm")
+    clock.now += 59
+    assert cache.get("model", "what is my pulse") == "72 bpm"   # normalized prompt
+    clock.now += 2
+    assert cache.get("model", "What is my pulse?") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("model", "a", "A")
+    cache.put("model", "b", "B")
+    assert cache.get("model", "a") == "A"   # a is now more recent than b
+    cache.put("model", "c", "C")
+    assert cache.get("model", "b") is None
+    assert cache.get("model", "a") == "A"
+    assert cache.get("model", "c") == "C"
+
+
+def test_namespaces_are_separate():
+    cache = ResponseCache()
+    cache.put("model", "hello", "from the model")
+    assert cache.get("knowledge-base", "hello") is None
+
+
+class Embedder:
+    """Maps each known prompt to a fixed vector, counting calls."""
+
+    VECTORS = {
+        "what is my pulse": [1.0, 0.0, 0.0],
+        "whats my pulse": [0.99, 0.1, 0.0],        # cosine ~0.995
+        "what is my blood pressure": [0.6, 0.8, 0.0],  # cosine 0.6
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return self.VECTORS[text]
+
+
+def test_semantic_hit_above_the_threshold_and_miss_below_it():
+    embed = Embedder()
+    cache = ResponseCache(embed_fn=embed, similarity_threshold=0.9)
+    assert cache.get("model", "What is my pulse?") is None
+    cache.put("model", "What is my pulse?", "72 bpm")
+    # The miss and the put that follows it share one embedding
+    assert embed.calls == ["what is my pulse"]
+
+    assert cache.get("model", "Whats my pulse") == "72 bpm"
+    assert cache.get("model", "What is my blood pressure?") is None
+    assert cache.get("other-model", "Whats my pulse") is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 3)
+
+
+def test_evicted_entries_are_no_longer_semantic_matches():
+    cache = ResponseCache(max_entries=1, embed_fn=Embedder(), similarity_threshold=0.9)
+    cache.put("model", "What is my pulse?", "72 bpm")
+    cache.put("model", "What is my blood pressure?", "120/80")
+    assert cache.get("model", "Whats my pulse") is None
+    assert cache.get("model", "What is my blood pressure") == "120/80"
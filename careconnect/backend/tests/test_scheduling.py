@@ -0,0 +1,77 @@
+# careconnect/backend/tests/test_scheduling.py
+import pytest
+
+import scheduling
+from integrations import IntegrationError
+from scheduling import MeetingStore, Scheduler, validate_appointment
+
+
+class FlakyZoom:
+    """Creates every meeting it is asked for, but answers the first `failures` creates with `error`."""
+
+    def __init__(self, error, failures=1):
+        self.error = error
+        self.failures = failures
+        self.meetings = []
+
+    def create_meeting(self, **meeting_args):
+        meeting = dict(meeting_args, id=len(self.meetings) + 1)
+        if self.error.status != 429:
+            # A gateway error can come back after Zoom created the meeting
+            self.meetings.append(meeting)
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        if self.error.status == 429:
+            self.meetings.append(meeting)
+        return dict(meeting, host_id="host", start_url=f"https://zoom.us/s/{meeting['id']}?zak=secret")
+
+    def get_meeting(self, meeting_id):
+        return {"id": meeting_id, "start_url": f"https://zoom.us/s/{meeting_id}?zak=fresh"}
+
+    def find_meeting(self, agenda_marker, user_id=None):
+        return next((m for m in self.meetings if agenda_marker in m["agenda"]), None)
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(scheduling.time, "sleep", lambda seconds: None)
+
+
+def schedule(client):
+    scheduler = Scheduler(client=client, store=MeetingStore(":memory:"), rate=1000)
+    results = list(scheduler.schedule([{"appointment_id": "a1", "start_time": "2025-01-06T09:00:00"}]))
+    return scheduler, results
+
+
+def test_server_error_finds_the_meeting_instead_of_creating_another():
+    client = FlakyZoom(IntegrationError("bad gateway", status=502))
+    scheduler, results = schedule(client)
+    assert results[0]["status"] == "created"
+    assert len(client.meetings) == 1
+    assert scheduler.lookups == 1 and scheduler.retries == 0
+
+
+def test_rate_limited_create_is_retried():
+    client = FlakyZoom(IntegrationError("slow down", status=429, retry_after=0.01))
+    scheduler, results = schedule(client)
+    assert results[0]["status"] == "created"
+    assert len(client.meetings) == 1
+    assert scheduler.retries == 1 and scheduler.lookups == 0
+
+
+def test_boolean_duration_is_rejected():
+    with pytest.raises(ValueError):
+        validate_appointment({"start_time": "2025-01-06T09:00:00", "duration": True})
+
+
+def test_the_host_start_url_is_neither_stored_nor_returned():
+    scheduler, results = schedule(FlakyZoom(IntegrationError("slow down", status=429), failures=0))
+    stored = scheduler.store.get("a1")
+    for meeting in (results[0]["meeting"], stored):
+        assert "start_url" not in meeting and "host_id" not in meeting
+    assert scheduler.start_url("a1") == f"https://zoom.us/s/{stored['id']}?zak=fresh"
+    assert scheduler.start_url("unknown") is None
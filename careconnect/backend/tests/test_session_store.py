@@ -0,0 +1,43 @@
+# careconnect/backend/tests/test_session_store.py
+import threading
+
+from session_store import SessionStore, SqliteSessionBackend
+
+
+def test_session_ids_are_generated_by_the_server():
+    store = SessionStore()
+    session = store.get_or_create("chosen-by-client")
+    assert session.session_id != "chosen-by-client"
+    assert len(store) == 0   # stored only once an exchange is recorded
+    store.record_exchange(session, "hi", "hello")
+    assert store.get_or_create(session.session_id) is session
+
+
+def test_sqlite_sessions_expire_and_are_pruned_oldest_first():
+    backend = SqliteSessionBackend(":memory:", ttl=60, max_sessions=2, prune_every=1)
+    store = SessionStore(backend)
+    sessions = [store.get_or_create() for _ in range(3)]
+    for n, session in enumerate(sessions):
+        store.record_exchange(session, f"question {n}", f"answer {n}")
+    assert len(store) == 2
+    assert backend.get(sessions[0].session_id) is None
+
+    sessions[1].updated_at -= 120
+    backend.put(sessions[1])
+    assert backend.get(sessions[1].session_id) is None
+    assert len(store) == 1
+
+
+def test_concurrent_exchanges_on_one_sqlite_session_are_all_kept():
+    store = SessionStore(SqliteSessionBackend(":memory:"), token_budget=100000)
+    session = store.get_or_create()
+    store.record_exchange(session, "first", "reply")
+    # Each request loads its own copy of the session from SQLite
+    copies = [store.get_or_create(session.session_id) for _ in range(8)]
+    threads = [threading.Thread(target=store.record_exchange, args=(copy, f"q{n}", f"a{n}"))
+               for n, copy in enumerate(copies)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get_or_create(session.session_id)) == 2 + 2 * len(copies)
@@ -0,0 +1,42 @@
+# careconnect/backend/tests/test_simplifier.py
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "reports"))
+
+from simplifier import ReportSimplifier, SimplificationStore, simplification_key  # noqa: E402
+
+
+class Gateway:
+    """Answers every simplification with the model id, counting calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def invoke_model_json(self, model_id, body, **kwargs):
+        self.calls += 1
+        return {"content": [{"text": f"simplified by {model_id}"}], "usage": {}}
+
+
+def simplify(simplifier, text):
+    return asyncio.run(simplifier.simplify(text))[0]
+
+
+def test_stored_simplifications_are_scoped_to_the_model_and_prompt():
+    assert simplification_key("text", "model-a") != simplification_key("text", "model-b")
+    assert simplification_key("text", "model-a") != simplification_key("text", "model-a", prompt="Be brief.")
+
+    store, gateway = SimplificationStore(":memory:"), Gateway()
+    assert simplify(ReportSimplifier(gateway, model_id="model-a", store=store), "BP 150/95") == "simplified by model-a"
+    # A new process on another model must not be served model-a's output from the store
+    assert simplify(ReportSimplifier(gateway, model_id="model-b", store=store), "BP 150/95") == "simplified by model-b"
+    assert simplify(ReportSimplifier(gateway, model_id="model-a", store=store), "BP 150/95") == "simplified by model-a"
+    assert gateway.calls == 2
+
+
+def test_expired_simplifications_are_misses():
+    store = SimplificationStore(":memory:", max_age=-1)
+    store.put("key", "simplified")
+    assert store.get("key") is None
+    assert store.stats()["entries"] == 0
@@ -0,0 +1,46 @@
+# careconnect/backend/tests/test_vitals_aggregate.py
+import numpy as np
+
+from aggregation import aggregate
+from timeseries import VitalsStore
+
+BASE = 1_700_000_000 // 3600 * 3600.0
+
+
+def make_store(capacity=10000):
+    store = VitalsStore(capacity=capacity)
+    # One sample a minute over three hours from BASE, value = minute number
+    store.ingest_many([{"patient_id": "p1", "timestamp": BASE + 60.0 * i, "heart_rate": i} for i in range(180)])
+    return store
+
+
+def test_rollup_edge_buckets_are_clipped_to_the_range():
+    store = make_store()
+    start, end = BASE + 1800, BASE + 9000   # half-way into the first hour, to half-way into the third
+    stats, source = aggregate(store, "p1", "heart_rate", "1h", start, end)
+    raw = stats_from_raw(store, start, end)
+    assert source == "rollup_1h"
+    assert stats["start"].tolist() == [BASE, BASE + 3600, BASE + 7200]
+    assert stats["count"].tolist() == raw["count"] == [30, 60, 31]
+    assert stats["min"].tolist() == raw["min"]
+    assert stats["max"].tolist() == raw["max"]
+    assert np.allclose(stats["mean"], raw["mean"])
+    # Percentiles come from the same samples
+    assert stats["p50"].tolist() == [44.5, 89.5, 135.0]
+
+
+def test_edge_bucket_stays_whole_once_raw_samples_age_out():
+    store = make_store(capacity=100)   # no path: only the newest 100 samples are kept raw
+    stats, _ = aggregate(store, "p1", "heart_rate", "1h", BASE + 1800, BASE + 9000, percentiles=())
+    assert stats["count"].tolist() == [60, 60, 31]
+
+
+def stats_from_raw(store, start, end):
+    timestamps, values = store.range("p1", "heart_rate", start, end)
+    hours = (timestamps // 3600).astype(int)
+    return {
+        "count": [int((hours == h).sum()) for h in np.unique(hours)],
+        "min": [float(values[hours == h].min()) for h in np.unique(hours)],
+        "max": [float(values[hours == h].max()) for h in np.unique(hours)],
+        "mean": [float(values[hours == h].mean()) for h in np.unique(hours)],
+    }
@@ -0,0 +1,90 @@
+# careconnect/backend/tests/test_vitals_ingest.py
+import numpy as np
+import pytest
+
+from anomaly import AnomalyDetector
+from timeseries import Series, VitalsStore
+
+
+def test_extend_drops_late_samples_and_returns_the_kept_ones():
+    series = Series(capacity=16)
+    series.append(100.0, 70.0)
+    timestamps, values = series.extend(np.array([90.0, 100.0, 110.0]), np.array([60.0, 71.0, 72.0], dtype=np.float32))
+    assert timestamps.tolist() == [100.0, 110.0]
+    assert values.tolist() == [71.0, 72.0]
+    assert series.dropped == 1
+
+
+def test_listeners_only_see_stored_samples():
+    store = VitalsStore()
+    seen = []
+    store.add_sample_listener(lambda patient_id, metric, timestamp, value: seen.append((timestamp, value)))
+    store.ingest({"patient_id": "p1", "timestamp": 100, "heart_rate": 70})
+    seen.clear()
+
+    result = store.ingest_many([
+        {"patient_id": "p1", "timestamp": 50, "heart_rate": 190},   # late: dropped, never stored
+        {"patient_id": "p1", "timestamp": 101, "heart_rate": 72},
+        {"patient_id": "p1", "timestamp": 102, "heart_rate": 73},
+    ])
+    assert result["accepted"] == 3
+    assert seen == [(101.0, 72.0), (102.0, 73.0)]
+    assert store.samples == 3
+
+
+def test_late_duplicate_does_not_alert():
+    alerts = []
+    detector = AnomalyDetector(on_alert=alerts.append)
+    store = VitalsStore()
+    store.add_sample_listener(detector.observe)
+    store.ingest({"patient_id": "p1", "timestamp": 100, "heart_rate": 70})
+
+    store.ingest_many([{"patient_id": "p1", "timestamp": 10, "heart_rate": 200},
+                       {"patient_id": "p1", "timestamp": 11, "heart_rate": 200}])
+    assert alerts == []
+    assert detector.samples == 1
+
+
+@pytest.mark.parametrize("patient_id", ["..", ".", ".hidden", "a/b", ""])
+def test_patient_ids_cannot_leave_the_data_directory(tmp_path, patient_id):
+    root = tmp_path / "vitals"
+    store = VitalsStore(str(root))
+    with pytest.raises(ValueError):
+        store.ingest({"patient_id": patient_id, "heart_rate": 70})
+    assert not list(tmp_path.glob("*.ts"))
+
+
+@pytest.mark.parametrize("reading", [
+    {"patient_id": "p1", "timestamp": [1], "heart_rate": 70},
+    {"patient_id": "p1", "timestamp": {"t": 1}, "heart_rate": 70},
+    {"patient_id": "p1", "timestamp": "nan", "heart_rate": 70},
+    {"patient_id": "p1", "timestamp": float("inf"), "heart_rate": 70},
+    {"patient_id": "p1", "timestamp": 100, "heart_rate": "nan"},
+    {"patient_id": "p1", "timestamp": 100, "blood_pressure": ["120", "80"]},
+])
+def test_malformed_numbers_are_rejected_before_storing(reading):
+    store = VitalsStore()
+    with pytest.raises(ValueError):
+        store.ingest(reading)
+    result = store.ingest_many([reading, {"patient_id": "p1", "timestamp": 100, "heart_rate": 70}])
+    assert (result["accepted"], result["rejected"]) == (1, 1)
+    assert store.samples == 1
+
+
+def test_reopened_series_builds_its_rollups_on_first_query(tmp_path):
+    root = str(tmp_path / "vitals")
+    store = VitalsStore(root, capacity=16)
+    store.ingest_many([{"patient_id": "p1", "timestamp": 3600 * 10 + i * 60, "heart_rate": 60 + i}
+                       for i in range(100)])
+    store.flush()
+    expected = store.series("p1", "heart_rate").rollup_query(3600)
+
+    series = VitalsStore(root, capacity=16).series("p1", "heart_rate", create=False)
+    assert not series.rolled_up and not any(len(rollup) for rollup in series.rollups.values())
+    # Readings stored before the first query are counted once, after the history on disk
+    series.append(3600 * 13, 200)
+    rows = series.rollup_query(3600)
+    assert rows["start"].tolist() == expected["start"].tolist() + [3600 * 13]
+    assert rows["count"].tolist() == expected["count"].tolist() + [1]
+    assert rows["mean"][:-1].tolist() == pytest.approx(expected["mean"].tolist())
+    assert series.rolled_up
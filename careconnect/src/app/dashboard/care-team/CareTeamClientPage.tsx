@@ -100,8 +100,9 @@ export default function CareTeamClientPage() {
       })
 
       const data = await response.json()
-      if (data.status === "success") {
-        console.log("Message sent:", data.sid)
+      // The backend queues the message and answers 202 right away
+      if (data.status === "queued" || data.status === "success") {
+        console.log("Message queued:", data.message_id)
         return data
       } else {
         console.error("Twilio error:", data.error)
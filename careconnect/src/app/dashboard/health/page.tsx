@@ -23,28 +23,44 @@ export default function HealthMetricsPage() {
     steps: 0,
   })
 
+  const VITALS_API = "http://127.0.0.1:5000/api/vitals" // or your deployed backend
+
+  const applyVitals = (data: any) => {
+    setHealthData({
+      heartRate: data.heart_rate,
+      bloodPressure: data.blood_pressure,
+      bloodGlucose: Math.floor(Math.random() * (110 - 70 + 1)) + 70, // simulate
+      temperatureF: data.temperature,
+      temperatureC: ((data.temperature - 32) * 5) / 9,
+      oxygenLevel: data.spo2,
+      steps: Math.floor(Math.random() * 10000), // simulate
+    })
+  }
+
   const fetchVitals = async () => {
     try {
-      const res = await fetch("http://127.0.0.1:5000/api/vitals") // or your deployed backend
-      const data = await res.json()
-      setHealthData({
-        heartRate: data.heart_rate,
-        bloodPressure: data.blood_pressure,
-        bloodGlucose: Math.floor(Math.random() * (110 - 70 + 1)) + 70, // simulate
-        temperatureF: data.temperature,
-        temperatureC: ((data.temperature - 32) * 5) / 9,
-        oxygenLevel: data.spo2,
-        steps: Math.floor(Math.random() * 10000), // simulate
-      })
+      const res = await fetch(VITALS_API)
+      applyVitals(await res.json())
     } catch (err) {
       console.error("Failed to fetch vitals:", err)
     }
   }
 
   useEffect(() => {
-    fetchVitals()
-    const interval = setInterval(fetchVitals, 5000)
-    return () => clearInterval(interval)
+    // New readings are pushed over Server-Sent Events; poll only if the stream isn't available
+    let interval: ReturnType<typeof setInterval> | undefined
+    const source = new EventSource(`${VITALS_API}/stream`)
+    source.addEventListener("vitals", (event) => applyVitals(JSON.parse((event as MessageEvent).data)))
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && !interval) {
+        fetchVitals()
+        interval = setInterval(fetchVitals, 5000)
+      }
+    }
+    return () => {
+      source.close()
+      if (interval) clearInterval(interval)
+    }
   }, [])
 
   return (